@@ -34,7 +34,7 @@ import sys
 'XML support'
 from xml.etree import ElementTree
 
-from TrATVid.Trajectory.Trajectory import CreateTrajectoryFromXML
+from TrATVid.Trajectory.Trajectory import CreateTrajectoryFromXML, IterXMLTrajectories
 
 def findBin(value):
     'Compute the histogram bin that corresponds to a given value'
@@ -96,11 +96,12 @@ for annFile in fileinput.input(listFile):
     annFile=annFile.strip();
     print("Reading "+annFile)
 
-    'Read data structure from XML file'
+    'Read data structure from XML file. Trajectories are read one by one, while the file is'
+    'parsed, to keep only one trajectory in memory'
     'NOTE: use the strip function to remove the trailing \n code of the line'
-    XMLElement=ElementTree.parse(annFile)
+    XMLEvents=ElementTree.iterparse(annFile, ('start', 'end'))
 
-    for XMLTrajectories in XMLElement.findall('Trajectory'):
+    for XMLTrajectories in IterXMLTrajectories(XMLEvents):
         'Read trajectory ID'
         finish=False
         try:
@@ -39,12 +39,18 @@ import os
 'XML support for program settings'
 from xml.etree import ElementTree
 
+from Trajectories.Settings import ReadSetting
 from Trajectories.PrintResults import printBlobs, saveVideoResult
 from Trajectories.Trajectories import Trajectories
 from Trajectories.EditNode import EditNode
 from Trajectories.Trajectory.Trajectory import Trajectory
 from Trajectories.Trajectory.Node import coord, RectangleNode, PointNode
 from Trajectories.Trajectory.Interpolator import Interpolator
+from Trajectories.Trajectory.FrameCache import FrameCache
+from Trajectories.FrameProvider import FrameProvider
+from Trajectories.VideoIndex import OpenVideoIndex
+from Trajectories.FrameStore import OpenFrameStore, BuildFrameStore, EstimateStoreSize
+from Trajectories.ProxyVideo import OpenProxyVideo, BuildProxyVideo
 
 '''
 SYSTEM STATES:
@@ -104,6 +110,44 @@ video=cv2.VideoCapture(str(projectPath+videoName))
 if not video.isOpened():
     raise Exception('Video '+videoName+' not found')
 print('Opening video:'+videoName)
+'Memory (in MB) used to cache decoded video frames, and number of frames decoded in background'
+'before and after the current frame'
+frameCacheSize=ReadSetting(settings, 'frames', 'cache', float, 256)
+framePrefetch=ReadSetting(settings, 'frames', 'prefetch', int, 30)
+'Scale of the raw frame store (0: frames are decoded from the video)'
+storeScale=ReadSetting(settings, 'store', 'scale', float, 0)
+'Scale of the proxy video used for the annotation (1: the video is annotated at full resolution)'
+proxyScale=ReadSetting(settings, 'proxy', 'scale', float, 1.0)
+if not 0<proxyScale<1: proxyScale=1.0
+'Key frames of the video, for frame accurate seeking. The video is indexed the first time it is'
+'opened (see VideoIndex)'
+videoIndex=OpenVideoIndex(str(projectPath+videoName))
+'Video shown for the annotation: the video itself, or its proxy (see ProxyVideo). The proxy is'
+'built the first time the video is opened. Blobs are always extracted from the video itself'
+displayName=videoName
+displayIndex=videoIndex
+if proxyScale<1:
+    proxyFile=OpenProxyVideo(str(projectPath+videoName), proxyScale)
+    if proxyFile is None:
+        print('Building proxy video. Please, wait...')
+        proxyFile=BuildProxyVideo(str(projectPath+videoName), proxyScale)
+    displayName=os.path.basename(proxyFile)
+    displayIndex=OpenVideoIndex(proxyFile)
+    print('Annotating proxy video:'+displayName)
+'Decoded frames stored on disk, built the first time the video is opened (see FrameStore)'
+frameStore=None
+if storeScale>0:
+    frameStore=OpenFrameStore(str(projectPath+displayName), storeScale)
+    if frameStore is None:
+        storeSize, storeFrames=EstimateStoreSize(str(projectPath+displayName), storeScale)
+        print('Building frame store. Please, wait...: %i frames, %.0f MB' % (storeFrames, storeSize/1048576.0))
+        BuildFrameStore(str(projectPath+displayName), storeScale)
+        frameStore=OpenFrameStore(str(projectPath+displayName), storeScale)
+'Frame store used to extract blobs (only if it holds the frames of the video itself)'
+blobStore=frameStore if displayName==videoName else None
+'Decoded frames for the video navigation (see FrameProvider)'
+if frameStore is not None: frames=frameStore
+else: frames=FrameProvider(str(projectPath+displayName), int(frameCacheSize*1024*1024), framePrefetch, displayIndex)
 # 'Generate name for video results'
 # videoResultName=projectPath+'res_'+videoName
 
@@ -124,6 +168,23 @@ except (AttributeError, KeyError):
     'If the key does not exist, take default interpolator' 
     print('Interpolation type: Default')
 
+'Number of nodes of each piece of the spline for long trajectories (0: single spline)'
+Interpolator.windowNodes=ReadSetting(settings, 'interpolation', 'window', int, Interpolator.windowNodes)
+
+'Storage used for the nodes of the trajectories (list or columnar). If the key does not exist,'
+'take default storage'
+storageType=ReadSetting(settings, 'storage', 'type')
+if storageType is not None:
+    Trajectory.defaultStorage=storageType
+    print('Node storage: '+Trajectory.defaultStorage)
+
+'Memory (in MB) used to cache the interpolated nodes of the trajectories (0: no cache). If the key'
+'does not exist, keep the default cache'
+cacheSize=ReadSetting(settings, 'cache', 'size', float)
+if cacheSize is not None:
+    if cacheSize>0: Trajectory.frameCache=FrameCache(int(cacheSize*1024*1024))
+    else: Trajectory.frameCache=None
+
 'Read annotation file'
 annXmlFile=settings.find('file').attrib['name']
 annotationFile=projectPath+annXmlFile
@@ -131,8 +192,11 @@ print('Opening annotation file:'+annotationFile)
 windowTitle='Trajectories - ('+annotationFile+')'
 'File to save complete trajectories (if needed)'
 annCompleteFile=projectPath+'co_'+annXmlFile
-'Create object for the trajectory list (read trajectories from the XML file, if it exists)'
-trajectories=Trajectories(annotationFile)
+'Frames around the current one whose trajectories are loaded (0: load all the trajectories)'
+loadWindow=ReadSetting(settings, 'loading', 'window', int, 0)
+'Create object for the trajectory list (read trajectories from the XML file, if it exists). The'
+'coordinates of the file are scaled to the video shown'
+trajectories=Trajectories(annotationFile, loadWindow, proxyScale)
 
 'Reading information for back up'
 backupInterval=int(settings.find('backup').attrib['time'])
@@ -147,6 +211,9 @@ activeID=0
 frame=0
 'Structure for communications between mouse events and main program'
 mousePoints={'x':0, 'y':0, 'p':-1}
+'Maximum distance (pixels) to the closest node to select a trajectory, when the user does not'
+'click inside any node'
+selectDistance=10
 
 'Indicates if current editions has already been saved.'
 saved=True
@@ -156,13 +223,10 @@ saved=True
 #saved=False
 
 'Read first frame of the video'
-video.set(cv2.CAP_PROP_POS_FRAMES, frame)
-ret, imgAux=video.read();
+imgAux=frames.read(frame)
 cv2.imshow(windowTitle, imgAux)
 'Read number of frames for the video'
-'NOTE: function get from OpenCV return the value as a double. Since the frame count is'
-'an integer value, convert it to its correct type (int)'
-totalFrames=int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+totalFrames=len(frames)
 'Initialize mouse listener with the default one: trajectory selection'
 cv2.setMouseCallback(windowTitle, mouseSelectNode, mousePoints)
 
@@ -224,7 +288,7 @@ while True:
     'Check if the user has double clicking on a trajectory'
     if mousePoints['p']==cv2.EVENT_LBUTTONDBLCLK:
         if activeTrajectory is None:
-            activeTrajectory, activeID=trajectories.selectTrajectory(frame, mousePoints['x'], mousePoints['y'])
+            activeTrajectory, activeID=trajectories.selectTrajectory(frame, mousePoints['x'], mousePoints['y'], selectDistance)
         mousePoints['p']=-1
     'Check the key pressed (if any).'
 ###############################################################################
@@ -326,19 +390,20 @@ while True:
     elif c==ord('p'):
         'Extract blobs corresponding to all the nodes of the trajectories'
         if activeTrajectory is None:
+            trajectories.loadAll()
             print('Extract blob for', len(trajectories.trajectories), 'trajectories (y/n)?')
             if (cv2.waitKey(0) & 0xFF)==ord('y'):
                 'Extract blob for all the trajectories'
                 for ID, trajectory in trajectories.trajectories.items():
-                    printBlobs(video, trajectory, projectPath, ID)
+                    printBlobs(video, trajectory, projectPath, ID, videoIndex, blobStore, proxyScale)
                 print('Blobs extracted for', len(trajectories.trajectories),'trajectories at', projectPath)
         else:
             'Extract blob only for selected trajectory'
-            printBlobs(video, activeTrajectory, projectPath, activeID)
+            printBlobs(video, activeTrajectory, projectPath, activeID, videoIndex, blobStore, proxyScale)
 ###############################################################################
     elif c==ord('v'):
         if activeNode is None and activeTrajectory is None:
-            saveVideoResult(videoName, projectPath, trajectories)
+            saveVideoResult(displayName, projectPath, trajectories, frameStore)
         else:
             print('Please, save changes before savint the video.')
 ###############################################################################
@@ -407,12 +472,12 @@ while True:
                 frame=0
             if frame>=totalFrames:
                 frame=totalFrames-1
-            'Move along the video sequence'
-            video.set(cv2.CAP_PROP_POS_FRAMES, frame)
             'Get the new required frame from the video'
-            ret, imgAux=video.read();
-            if not ret:
+            imgFrame=frames.read(frame)
+            if imgFrame is None:
                 print("Error Frame:", frame)
+            else:
+                imgAux=imgFrame
 ###############################################################################
     elif c==ord('i'):
         print('Trajectory ID: '+str(activeID))
@@ -420,5 +485,6 @@ while True:
     elif c==ord('o'):
         print(trajectories.timeIndex)
 
+frames.close()
 print('End of program.')
 
@@ -0,0 +1,213 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Benchmark of the interpolation methods: time, memory and accuracy on synthetic trajectories.
+#Usage:
+#    python -m Trajectories.Benchmark [length] [keyframe interval] [output file]
+#The results are written in JSON format, or CSV if the output file ends with .csv
+
+import json
+import csv
+import math
+'Time and memory measurements'
+import time
+import tracemalloc
+'Access program arguments'
+import sys
+import numpy
+
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import RectangleNode, PointNode, coord
+
+'Focal length and image size of the synthetic camera'
+focal=500.0
+imageSize=(640, 480)
+
+def syntheticTrajectory(length, seed=0):
+    'Generate the ground truth (t, x, y, w, h) of an object moving in 3D for the given number of'
+    'frames, as numpy arrays. The object follows a smooth random path (sum of sinusoids), and is'
+    'projected with a pinhole camera, so that its size changes with depth'
+    rng=numpy.random.default_rng(seed)
+    t=numpy.arange(length)
+    def path(amplitude, offset):
+        'Sum of three sinusoids of random period (from 1/4 to the whole trajectory) and phase'
+        value=numpy.full(length, offset, float)
+        for k in range(3):
+            period=rng.uniform(0.25, 1)*length
+            value+=amplitude/(k+1)*numpy.sin(2*math.pi*t/period+rng.uniform(0, 2*math.pi))
+        return value
+    X=path(2.0, 0)
+    Y=path(1.0, 0)
+    Z=path(3.0, 12)
+    W=rng.uniform(0.5, 1.5)
+    H=rng.uniform(0.5, 1.5)
+    x=imageSize[0]/2+focal*X/Z
+    y=imageSize[1]/2+focal*Y/Z
+    return t, x, y, focal*W/Z, focal*H/Z
+
+def keyframes(length, interval):
+    'Frames annotated as nodes: one every interval frames, and the last frame'
+    frames=list(range(0, length, interval))
+    if frames[-1]!=length-1: frames.append(length-1)
+    return frames
+
+def createTrajectory(truth, frames, method, rectangle=True):
+    'Create a trajectory with the ground truth nodes at the frames given. As in annotation files,'
+    'node coordinates are integer values'
+    t, x, y, w, h=truth
+    nodes=[]
+    for f in frames:
+        pos=coord(int(round(x[f])), int(round(y[f])))
+        if rectangle: nodes.append(RectangleNode(f, pos, coord(int(round(w[f])), int(round(h[f])))))
+        else: nodes.append(PointNode(f, pos))
+    trajectory=Trajectory(nodes[0], method)
+    with trajectory.batchEdit():
+        for node in nodes[1:]:
+            trajectory.addNode(node)
+    return trajectory
+
+def benchmarkMethod(truth, frames, method, rectangle=True, queries=2000, edits=20):
+    'Measure one interpolation method for the ground truth and keyframes given. Return a'
+    'dictionary with the results'
+    result={'method':method, 'type':'rectangle' if rectangle else 'point',
+            'frames':len(truth[0]), 'nodes':len(frames)}
+
+    'Construction (including the interpolator update)'
+    start=time.perf_counter()
+    trajectory=createTrajectory(truth, frames, method, rectangle)
+    result['buildTime']=time.perf_counter()-start
+    'Memory used by the trajectory. NOTE: Memory tracing slows down the program, so the'
+    'trajectory is built again to measure it'
+    tracemalloc.start()
+    copy=createTrajectory(truth, frames, method, rectangle)
+    result['memory'], peak=tracemalloc.get_traced_memory()
+
+    'Refit: update after moving one node (as when editing a node in the GUI)'
+    rng=numpy.random.default_rng(1)
+    edited=rng.choice(frames[1:-1] if len(frames)>2 else frames, edits).tolist()
+    def edit(trajectory, f, shift):
+        node=trajectory.selectNode(f)
+        node.pos=node.pos+shift
+        trajectory.addNode(node)
+    'Memory needed by the refit'
+    tracemalloc.reset_peak()
+    current, peak=tracemalloc.get_traced_memory()
+    edit(copy, edited[0], coord(1, 1))
+    copy.refreshInterpolator()
+    result['refitPeakMemory']=tracemalloc.get_traced_memory()[1]-current
+    tracemalloc.stop()
+    del copy
+    elapsed=0
+    for f in edited:
+        start=time.perf_counter()
+        edit(trajectory, f, coord(1, 1))
+        trajectory.refreshInterpolator()
+        elapsed+=time.perf_counter()-start
+        'Restore the node'
+        edit(trajectory, f, coord(-1, -1))
+        trajectory.refreshInterpolator()
+    result['refitTime']=elapsed/edits
+
+    'Query cost: a single frame (as when playing the video) and all the frames at once'
+    sample=rng.integers(0, len(truth[0]), min(queries, len(truth[0])))
+    start=time.perf_counter()
+    for f in sample.tolist():
+        trajectory.selectNode(f)
+    result['queryTime']=(time.perf_counter()-start)/len(sample)
+    start=time.perf_counter()
+    time_, x, y, w, h, nodeType=trajectory.selectRange()
+    result['rangeTime']=(time.perf_counter()-start)/len(time_)
+
+    'Accuracy on the frames without node'
+    t, xt, yt, wt, ht=truth
+    interpolated=numpy.ones(len(t), bool)
+    interpolated[frames]=False
+    if rectangle:
+        error=[]
+        relative=[]
+        for f in numpy.flatnonzero(interpolated).tolist():
+            node=RectangleNode(f, coord(x[f], y[f]), coord(w[f], h[f]))
+            reference=RectangleNode(f, coord(xt[f], yt[f]), coord(wt[f], ht[f]))
+            error.append(node.areaError(reference))
+            relative.append(error[-1]/(wt[f]*ht[f]))
+        result['areaError']=float(numpy.mean(error)) if error else 0.0
+        result['relativeAreaError']=float(numpy.mean(relative)) if relative else 0.0
+    else:
+        error=numpy.hypot(x-xt, y-yt)[interpolated]
+        result['positionError']=float(error.mean()) if len(error) else 0.0
+    return result
+
+def runBenchmark(length=3000, interval=10, seed=0):
+    'Run the benchmark for all the interpolation methods, for rectangle and point trajectories'
+    'NOTE: The frame cache is disabled, to measure the cost of the interpolation itself'
+    frameCache=Trajectory.frameCache
+    Trajectory.frameCache=None
+    results=[]
+    try:
+        truth=syntheticTrajectory(length, seed)
+        frames=keyframes(length, interval)
+        for rectangle in (True, False):
+            for method in sorted(Interpolator.interpolatorMethod):
+                results.append(benchmarkMethod(truth, frames, method, rectangle))
+    finally:
+        Trajectory.frameCache=frameCache
+    return results
+
+def saveResults(results, fileName):
+    'Write the results in JSON format, or CSV if the file name ends with .csv'
+    with open(fileName, 'w', newline='') as f:
+        if fileName.endswith('.csv'):
+            fields=[]
+            for r in results:
+                fields+=[k for k in r if not k in fields]
+            writer=csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump(results, f, indent=1)
+
+def printResults(results):
+    'Print a summary of the results'
+    print('Method Type       Nodes  Build(ms) Refit(ms) Query(us) Range(us) Memory(kB) Error')
+    for r in results:
+        error=r.get('relativeAreaError', r.get('positionError'))
+        print('%-6s %-10s %6d %9.2f %9.3f %9.2f %9.3f %10.1f %.4f' % (
+            r['method'], r['type'], r['nodes'], 1e3*r['buildTime'], 1e3*r['refitTime'],
+            1e6*r['queryTime'], 1e6*r['rangeTime'], r['memory']/1024.0, error))
+
+if __name__=='__main__':
+    try: length=int(sys.argv[1])
+    except IndexError: length=3000
+    try: interval=int(sys.argv[2])
+    except IndexError: interval=10
+    try: fileName=sys.argv[3]
+    except IndexError: fileName='benchmark.json'
+    results=runBenchmark(length, interval)
+    printResults(results)
+    saveResults(results, fileName)
+    print('Results written to '+fileName)
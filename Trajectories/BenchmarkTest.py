@@ -0,0 +1,91 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the benchmark of the interpolation methods (see Benchmark): the accuracy reported for each
+#method must be the same as computed frame by frame on a trajectory built from the keyframes (the
+#editions done to measure the refit time must be undone), frames with a node have no error, and the
+#results are saved in JSON and CSV format. Times are not checked.
+#Run with: python -m Trajectories.BenchmarkTest
+
+import os
+import csv
+import json
+import tempfile
+import numpy
+
+from .Benchmark import syntheticTrajectory, keyframes, createTrajectory, runBenchmark, saveResults
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import coord, RectangleNode
+
+def accuracy(truth, frames, method, rectangle):
+    'Mean error of the frames without node, interpolating each frame with selectNode'
+    trajectory=createTrajectory(truth, frames, method, rectangle)
+    t, x, y, w, h=truth
+    error=[]
+    for f in sorted(set(t.tolist())-set(frames)):
+        node=trajectory.selectNode(f)
+        if rectangle:
+            reference=RectangleNode(f, coord(x[f], y[f]), coord(w[f], h[f]))
+            error.append(node.areaError(reference)/(w[f]*h[f]))
+        else:
+            error.append(numpy.hypot(node.pos.x-x[f], node.pos.y-y[f]))
+    return numpy.mean(error) if error else 0.0
+
+methods=sorted(Interpolator.interpolatorMethod)
+truth=syntheticTrajectory(300, 3)
+assert all(len(v)==300 for v in truth)
+assert keyframes(300, 7)==list(range(0, 300, 7))+[299]
+assert keyframes(141, 7)==list(range(0, 141, 7))
+frameCache=Trajectory.frameCache
+for interval in (1, 12):
+    results=runBenchmark(300, interval, 3)
+    assert Trajectory.frameCache is frameCache, 'Frame cache not restored'
+    assert [(r['type'], r['method']) for r in results]==[(k, m) for k in ('rectangle', 'point') for m in methods]
+    for r in results:
+        rectangle=r['type']=='rectangle'
+        assert r['frames']==300 and r['nodes']==len(keyframes(300, interval))
+        assert all(r[k]>=0 for k in ('buildTime', 'refitTime', 'queryTime', 'rangeTime', 'memory'))
+        error=r['relativeAreaError'] if rectangle else r['positionError']
+        if interval==1: assert error==0.0, 'Error in frames with a node'
+        else: assert numpy.isclose(error, accuracy(truth, keyframes(300, interval), r['method'], rectangle)), r
+    print('Interval '+str(interval)+' OK')
+'The methods are actually compared: interpolation is more accurate than no interpolation'
+errors={r['method']: r['relativeAreaError'] for r in results if r['type']=='rectangle'}
+assert all(errors[m]<errors['NI'] for m in methods if m!='NI')
+
+'Results files'
+path=tempfile.mkdtemp()
+saveResults(results, os.path.join(path, 'results.json'))
+assert json.load(open(os.path.join(path, 'results.json')))==results
+saveResults(results, os.path.join(path, 'results.csv'))
+rows=list(csv.DictReader(open(os.path.join(path, 'results.csv'), newline='')))
+assert [(row['method'], row['type']) for row in rows]==[(r['method'], r['type']) for r in results]
+assert all(numpy.isclose(float(row['areaError'] or row['positionError']), r.get('areaError', r.get('positionError'))) for row, r in zip(rows, results))
+print('Results files OK')
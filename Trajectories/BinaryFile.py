@@ -0,0 +1,175 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Binary annotation files.
+#Binary files store the same data as XML annotation files, but nodes are stored as packed arrays,
+#which are loaded (memory mapped) without parsing each node. The file consists on:
+#- Header: file identifier, version, number of trajectories and total number of nodes
+#- Trajectory table: ID, interpolation type, node type, start, end, and position (offset) and
+#  number of nodes of each trajectory in the node arrays
+#- Node arrays, one after the other: time, x, y, w, h (NaN for point nodes) and intMask (which
+#  coordinates are integer values, see NodeArray)
+#All the values are little endian.
+#Conversion between XML and binary files:
+#    python -m Trajectories.BinaryFile inputFile outputFile
+#The format of each file is given by its extension (see binaryExtension)
+
+import sys
+import os
+import numpy
+
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.NodeArray import NodeArray
+from .Trajectory.Exceptions import TrajectoryException
+
+'Extension of binary annotation files'
+binaryExtension='.tbin'
+
+fileIdentifier=b'TrATVidB'
+fileVersion=1
+
+headerType=numpy.dtype([
+    ('identifier', 'S8'), ('version', '<u4'), ('trajectories', '<u4'), ('nodes', '<u8')])
+tableType=numpy.dtype([
+    ('ID', '<i8'), ('interpolation', 'S2'), ('type', 'S1'), ('reserved', 'V5'),
+    ('start', '<i8'), ('end', '<i8'), ('offset', '<u8'), ('count', '<u8')])
+'Node arrays, in the order they are stored'
+nodeColumns=(('time', '<i8'), ('x', '<f8'), ('y', '<f8'), ('w', '<f8'), ('h', '<f8'), ('intMask', 'u1'))
+
+def IsBinaryFile(fileName):
+    'Check whether the file given is a binary annotation file, according to its extension'
+    return isinstance(fileName, str) and fileName.endswith(binaryExtension)
+
+def ReadBinaryFile(fileName, scale=1.0):
+    'Generator with the trajectories (ID, trajectory) stored in a binary annotation file. The node'
+    'coordinates are multiplied by scale'
+    data=numpy.memmap(fileName, numpy.uint8, 'r') if os.path.getsize(fileName)>0 else numpy.zeros(0, numpy.uint8)
+    if len(data)<headerType.itemsize:
+        raise TrajectoryException('File '+fileName+' is not a valid binary annotation file')
+    header=data[:headerType.itemsize].view(headerType)[0]
+    if header['identifier']!=fileIdentifier or header['version']!=fileVersion:
+        raise TrajectoryException('File '+fileName+' is not a valid binary annotation file')
+    n=int(header['nodes'])
+    offset=headerType.itemsize
+    table=data[offset:offset+int(header['trajectories'])*tableType.itemsize].view(tableType)
+    offset+=table.nbytes
+    columns={}
+    for name, dtype in nodeColumns:
+        size=n*numpy.dtype(dtype).itemsize
+        columns[name]=data[offset:offset+size].view(dtype)
+        offset+=size
+    for entry in table:
+        a=int(entry['offset'])
+        b=a+int(entry['count'])
+        t, x, y, w, h, intMask=(columns[name][a:b] for name, dtype in nodeColumns)
+        if entry['type']==b'P': w=h=None
+        trajectory=createTrajectory(entry['interpolation'].decode(), t, x, y, w, h, intMask)
+        if scale!=1.0:
+            'Keep the trajectory read from the file, to write it back without rounding (see'
+            'Trajectory.setOriginal)'
+            original=trajectory
+            x, y=x*scale, y*scale
+            if w is not None: w, h=w*scale, h*scale
+            intMask=numpy.zeros_like(intMask)
+            trajectory=createTrajectory(entry['interpolation'].decode(), t, x, y, w, h, intMask)
+            trajectory.setOriginal(original, scale)
+        yield int(entry['ID']), trajectory
+
+def createTrajectory(interType, t, x, y, w, h, intMask):
+    'Create a trajectory with the node arrays given (see Trajectory.setArrays). The arrays are not'
+    'copied: with columnar storage, the nodes are read from the memory mapped file until the'
+    'trajectory is edited. With list storage, the node objects are created from the arrays'
+    'Create the trajectory with the first node, and then set all the nodes at once'
+    nodes=NodeArray()
+    nodes.setArrays(t[:1], x[:1], y[:1], None if w is None else w[:1], None if h is None else h[:1],
+                    None, intMask[:1])
+    trajectory=Trajectory(nodes[0], interType)
+    trajectory.setArrays(t, x, y, w, h, intMask, False)
+    return trajectory
+
+def nodeArrays(trajectory, complete=False, scale=1.0):
+    'Return the node data of the trajectory (t, x, y, w, h, intMask), as written in binary files.'
+    'If complete is True, the nodes of all the frames of the trajectory are included. If scale is'
+    'given, the coordinates are scaled as in XML files (see Trajectory.XMLWrite)'
+    original=trajectory.originalTrajectory(scale)
+    if not original is None: trajectory, scale=original, 1.0
+    if complete: nodes=NodeArray(list(trajectory.completeNodes()))
+    elif isinstance(trajectory.nodes, NodeArray): nodes=trajectory.nodes
+    else: nodes=NodeArray(trajectory.nodes)
+    n=len(nodes)
+    t, x, y, w, h, intMask=(getattr(nodes, name)[:n] for name, dtype in nodeColumns)
+    if scale!=1.0:
+        x, y, w, h=(numpy.round(v*scale, Trajectory.scaleDigits) for v in (x, y, w, h))
+        intMask=numpy.zeros(n, numpy.uint8)
+        for bit, v in enumerate((x, y, w, h)):
+            intMask|=(v==numpy.floor(v)).astype(numpy.uint8)<<bit
+    return t, x, y, w, h, intMask
+
+def WriteBinaryFile(fileName, trajectories, complete=False, scale=1.0):
+    'Write the trajectories given (list of tuples (ID, trajectory)) to a binary annotation file.'
+    'If complete is True, the nodes of all the frames of the trajectory are written. The node'
+    'coordinates are multiplied by scale'
+    arrays=[nodeArrays(tr, complete, scale) for ID, tr in trajectories]
+    table=numpy.zeros(len(trajectories), tableType)
+    offset=0
+    for entry, (ID, tr), a in zip(table, trajectories, arrays):
+        entry['ID']=ID
+        entry['interpolation']=tr.InterpolationType().encode()
+        entry['type']=b'P' if numpy.isnan(a[3][0]) else b'R'
+        entry['start']=tr.start
+        entry['end']=tr.end
+        entry['offset']=offset
+        entry['count']=len(a[0])
+        offset+=len(a[0])
+    header=numpy.zeros(1, headerType)
+    header['identifier']=fileIdentifier
+    header['version']=fileVersion
+    header['trajectories']=len(trajectories)
+    header['nodes']=offset
+    'The data is written to a temporary file, which replaces the file at the end: the trajectories'
+    'may be reading their nodes from the memory mapped file (see ReadBinaryFile), which can not be'
+    'truncated while it is used'
+    f=open(fileName+'.tmp', 'wb')
+    f.write(header.tobytes())
+    f.write(table.tobytes())
+    for i, (name, dtype) in enumerate(nodeColumns):
+        for a in arrays:
+            f.write(a[i].astype(dtype).tobytes())
+    f.close()
+    os.replace(fileName+'.tmp', fileName)
+
+if __name__=='__main__':
+    'Conversion between annotation formats'
+    from .Trajectories import Trajectories
+    try:
+        inputFile=sys.argv[1]
+        outputFile=sys.argv[2]
+    except IndexError:
+        print('Usage: python -m Trajectories.BinaryFile inputFile outputFile')
+        sys.exit(1)
+    Trajectories(inputFile).SaveXMLFile(outputFile)
+    print('File '+inputFile+' converted to '+outputFile)
@@ -0,0 +1,140 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that converting annotation files from XML to binary format (see BinaryFile) and back to XML
+#does not lose any data: point and rectangle nodes, integer and float coordinates (intMask),
+#interpolation methods and IDs. Run with: python -m Trajectories.BinaryFileTest
+
+from copy import deepcopy
+import os
+import re
+import tempfile
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import coord, PointNode, RectangleNode
+from .Trajectory.Exceptions import TrajectoryException
+
+def fileData(fileName):
+    'Content of the file, without the date'
+    return re.sub(b' date="[^"]*"', b'', open(fileName, 'rb').read())
+
+def nodeData(node):
+    'Node data, including the type of each coordinate'
+    values=[node.time, node.pos.x, node.pos.y]
+    try: values+=[node.size.x, node.size.y]
+    except AttributeError: pass
+    return [(type(v), v) for v in values]
+
+def randomTrajectories(count, rng):
+    'Point and rectangle trajectories, with integer, float and mixed coordinates'
+    trajectories=Trajectories()
+    methods=sorted(Interpolator.interpolatorMethod)
+    for ID in range(count):
+        rectangle=ID%2==0
+        frames=numpy.sort(rng.choice(500, int(rng.integers(1, 10)), replace=False))
+        nodes=[]
+        for f in frames.tolist():
+            x, y=int(rng.integers(0, 640)), int(rng.integers(0, 480))
+            if ID%3==1: x+=0.5
+            if ID%3==2 and f%2: y=y/7.0
+            if rectangle: nodes.append(RectangleNode(f, coord(x, y), coord(int(rng.integers(5, 100)), 12.75 if f%3 else 12)))
+            else: nodes.append(PointNode(f, coord(x, y)))
+        trajectory=Trajectory(nodes[0], methods[ID%len(methods)])
+        trajectory.setNodes(nodes)
+        trajectories.addTrajectory(trajectory, 7*ID+1)
+    return trajectories
+
+path=tempfile.mkdtemp()
+rng=numpy.random.default_rng(0)
+xmlFile=os.path.join(path, 'annotation.xml')
+binaryFile=os.path.join(path, 'annotation.tbin')
+xmlFile2=os.path.join(path, 'converted.xml')
+for count in (0, 1, 40):
+    randomTrajectories(count, rng).SaveXMLFile(xmlFile)
+    'XML -> binary -> XML'
+    original=Trajectories(xmlFile)
+    original.SaveXMLFile(binaryFile)
+    binary=Trajectories(binaryFile)
+    binary.SaveXMLFile(xmlFile2)
+    assert fileData(xmlFile)==fileData(xmlFile2), 'Different XML files'
+    'Trajectories read from the binary file'
+    assert sorted(binary.trajectories)==sorted(original.trajectories)
+    assert binary.ID==original.ID
+    for ID, tr in original.trajectories.items():
+        tr2=binary.trajectories[ID]
+        assert tr2.InterpolationType()==tr.InterpolationType()
+        assert (tr2.start, tr2.end)==(tr.start, tr.end)
+        assert [nodeData(n) for n in tr2.nodes]==[nodeData(n) for n in tr.nodes]
+        assert type(tr2.nodes[0]) is type(tr.nodes[0])
+    print('Trajectories: '+str(count)+' OK')
+
+def memoryMapped(a):
+    'Check whether the array is a view of a memory mapped file'
+    while a is not None:
+        if isinstance(a, numpy.memmap) and a._mmap is not None: return True
+        a=a.base
+    return False
+
+'With columnar storage, the nodes are read from the memory mapped file until the trajectory is'
+'edited. List storage creates the node objects'
+randomTrajectories(40, rng).SaveXMLFile(binaryFile)
+for storage in ('list', 'columnar'):
+    Trajectory.defaultStorage=storage
+    binary=Trajectories(binaryFile)
+    for tr in binary.trajectories.values():
+        assert memoryMapped(tr.nodes.x) if storage=='columnar' else isinstance(tr.nodes, list)
+    'Edit a trajectory and save over the same file'
+    ID=min(binary.trajectories)
+    tr=binary.trajectories[ID]
+    node=deepcopy(tr.nodes[-1])
+    node.time+=10
+    tr.addNode(node)
+    binary.addTrajectory(tr, ID)
+    if storage=='columnar':
+        assert not memoryMapped(tr.nodes.x)
+        assert all(memoryMapped(t.nodes.x) for t in binary.trajectories.values() if t is not tr)
+    binary.SaveXMLFile(xmlFile)
+    binary.SaveXMLFile(binaryFile)
+    'The trajectories still read the previous file'
+    binary.SaveXMLFile(xmlFile2)
+    assert fileData(xmlFile)==fileData(xmlFile2), 'Memory mapped data changed'
+    Trajectories(binaryFile).SaveXMLFile(xmlFile2)
+    assert fileData(xmlFile)==fileData(xmlFile2), 'Different XML files'
+    print('Storage '+storage+' OK')
+Trajectory.defaultStorage='list'
+
+'Empty (zero bytes) file: it is not a valid binary file'
+open(binaryFile, 'wb').close()
+try:
+    Trajectories(binaryFile)
+except TrajectoryException as e:
+    print('Empty file rejected: '+str(e))
+else:
+    raise AssertionError('Empty file accepted')
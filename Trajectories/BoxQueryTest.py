@@ -0,0 +1,122 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the bulk box queries of the trajectories (see Trajectories.boxesInRange and boxesAt) against
+#the nodes selected one by one (Trajectory.selectNode) for each trajectory and frame: all the
+#interpolation methods, point and rectangle trajectories, after editing the trajectories, and with
+#the trajectories loaded on demand.
+#Run with: python -m Trajectories.BoxQueryTest
+
+import os
+import tempfile
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import coord, PointNode, RectangleNode
+
+rng=numpy.random.default_rng(0)
+methods=sorted(Interpolator.interpolatorMethod)
+
+def randomTrajectory():
+    'Point or rectangle trajectory with a few nodes, and a random interpolation method'
+    start=int(rng.integers(0, 300))
+    frames=start+numpy.sort(rng.choice(120, int(rng.integers(1, 7)), replace=False))
+    rectangle=rng.random()<0.6
+    nodes=[]
+    for f in frames.tolist():
+        pos=coord(int(rng.integers(0, 640)), float(rng.integers(0, 480))+0.5)
+        if rectangle: nodes.append(RectangleNode(f, pos, coord(int(rng.integers(5, 100)), int(rng.integers(5, 100)))))
+        else: nodes.append(PointNode(f, pos))
+    trajectory=Trajectory(nodes[0], methods[int(rng.integers(0, len(methods)))])
+    trajectory.setNodes(nodes)
+    return trajectory
+
+def bruteForce(trajectories, start, end):
+    'Boxes of the frames from start to end, selecting the node of each trajectory and frame'
+    boxes={}
+    for ID, tr in trajectories.trajectories.items():
+        for f in range(max(start, tr.start), min(end, tr.end)+1):
+            node=tr.selectNode(f)
+            try: size=(node.size.x, node.size.y)
+            except AttributeError: size=(numpy.nan, numpy.nan)
+            boxes[(f, ID)]=(node.pos.x, node.pos.y)+size+(node.nodeType.value,)
+    return boxes
+
+def checkBoxes(boxes, expected):
+    'Compare the arrays returned by the box queries with the boxes expected'
+    frame, ID, x, y, w, h, nodeType=boxes
+    assert (numpy.diff(frame)>=0).all(), 'Boxes not sorted by frame'
+    keys=list(zip(frame.tolist(), ID.tolist()))
+    assert len(set(keys))==len(keys) and set(keys)==set(expected)
+    for k, values in zip(keys, zip(x.tolist(), y.tolist(), w.tolist(), h.tolist(), nodeType.tolist())):
+        assert numpy.allclose(values[:4], expected[k][:4], rtol=1e-9, atol=1e-6, equal_nan=True), k
+        assert values[4]==expected[k][4], k
+
+def checkQueries(trajectories, reference):
+    'Check random frame ranges and frames (the boxes expected are computed with reference)'
+    for k in range(10):
+        start=int(rng.integers(-20, 450))
+        end=start+int(rng.integers(0, 80))
+        checkBoxes(trajectories.boxesInRange(start, end), bruteForce(reference, start, end))
+        frame=int(rng.integers(-5, 450))
+        expected=bruteForce(reference, frame, frame)
+        checkBoxes(trajectories.boxesAt(frame), expected)
+        checkBoxes(trajectories.boxesInRange(frame, frame), expected)
+    'Empty range'
+    assert all(len(a)==0 for a in trajectories.boxesInRange(1000, 1100))
+
+trajectories=Trajectories()
+for k in range(60):
+    trajectories.addTrajectory(randomTrajectory(), 0)
+checkQueries(trajectories, trajectories)
+print('Boxes OK')
+'Edit the trajectories: add nodes, delete and add trajectories'
+for k in range(30):
+    IDs=sorted(trajectories.trajectories)
+    ID=IDs[int(rng.integers(0, len(IDs)))]
+    operation=rng.integers(0, 3)
+    if operation==0:
+        tr=trajectories.trajectories[ID]
+        node=tr.selectNode(tr.end)
+        node.time=tr.end+int(rng.integers(1, 30))
+        tr.addNode(node)
+        trajectories.addTrajectory(tr, ID)
+    elif operation==1: trajectories.deleteTrajectory(ID)
+    else: trajectories.addTrajectory(randomTrajectory(), 0)
+    checkQueries(trajectories, trajectories)
+print('Edited trajectories OK')
+'Trajectories loaded on demand'
+fileName=os.path.join(tempfile.mkdtemp(), 'annotation.xml')
+trajectories.SaveXMLFile(fileName)
+full=Trajectories(fileName)
+lazy=Trajectories(fileName, 50)
+checkQueries(lazy, full)
+print('Trajectories loaded on demand OK')
@@ -0,0 +1,169 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Keyframe decimation: reduce dense trajectories (for instance, with a node for each frame) to
+#the nodes needed to reproduce them, with the interpolation method of each trajectory, within a
+#given tolerance.
+#Usage:
+#    python -m Trajectories.Decimation annotationFile outputFile [tolerance] [measure] [processes]
+#measure is 'pixels' (maximum shift of the rectangle corners or the point, default) or 'iou'
+#(loss of intersection over union, only for rectangles; point trajectories are kept unchanged)
+
+'Access program arguments'
+import sys
+'Parallel processing of trajectories'
+from multiprocessing import Pool
+from copy import deepcopy
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+
+def frameErrors(x, y, w, h, xi, yi, wi, hi, measure='pixels'):
+    'Error between the actual (x, y, w, h) and the interpolated (xi, yi, wi, hi) nodes, as numpy'
+    'arrays. For measure=pixels, the error is the maximum shift of the rectangle corners (or the'
+    'distance, for points). For measure=iou, it is 1-IoU'
+    if w is None:
+        return numpy.hypot(xi-x, yi-y)
+    wi=numpy.abs(wi)
+    hi=numpy.abs(hi)
+    if measure=='iou':
+        'Same computation as RectangleNode.intersection and union'
+        iw=numpy.minimum(x+w/2, xi+wi/2)-numpy.maximum(x-w/2, xi-wi/2)
+        ih=numpy.minimum(y+h/2, yi+hi/2)-numpy.maximum(y-h/2, yi-hi/2)
+        intersection=numpy.where((iw<0) | (ih<0), 0, iw*ih)
+        return 1-intersection/(w*h+wi*hi-intersection)
+    dx=numpy.abs(xi-x)+numpy.abs(wi-w)/2
+    dy=numpy.abs(yi-y)+numpy.abs(hi-h)/2
+    return numpy.maximum(dx, dy)
+
+def decimateArrays(t, x, y, w, h, method, tolerance, measure='pixels'):
+    'Select the nodes of the trajectory given as numpy arrays (t, x, y, w, h, with w and h None'
+    'for points) needed to interpolate the rest of them, with the interpolation method given,'
+    'within the tolerance (see frameErrors). Return the sorted list of indexes of the nodes'
+    'selected. The first and last nodes are always selected'
+    n=len(t)
+    if n<=2 or (w is None and measure=='iou'):
+        'NOTE: IoU is not defined for points, so point trajectories are not decimated in this case'
+        return list(range(n))
+    interpolator=Interpolator(method)
+    columns=(t, x, y, w, h)
+    def errors(keep, frames):
+        'Error at the nodes given (indexes), interpolated from the nodes to keep'
+        data=[None if c is None else c[keep] for c in columns]
+        interpolator.updateInterpolatorArrays(*data)
+        xi, yi, wi, hi, nodeType=interpolator.interpolateArray(*(data+[t[frames]]))
+        return frameErrors(x[frames], y[frames], None if w is None else w[frames],
+                           None if h is None else h[frames], xi, yi, wi, hi, measure)
+
+    if not interpolator.updatable:
+        'Interpolation between two nodes only depends on these nodes. Starting from the first'
+        'node, select the furthest node that interpolates all the nodes in between within the'
+        'tolerance (doubling the distance, and then using binary search)'
+        def valid(a, b):
+            return b==a+1 or errors([a, b], numpy.arange(a+1, b)).max()<=tolerance
+        keep=[0]
+        a=0
+        while a<n-1:
+            good, step=a+1, 2
+            while a+step<n and valid(a, a+step):
+                good=a+step
+                step*=2
+            bad=min(a+step, n)
+            while bad-good>1:
+                middle=(good+bad)//2
+                if valid(a, middle): good=middle
+                else: bad=middle
+            keep.append(good)
+            a=good
+        return keep
+
+    'Splines depend on all the nodes. Starting from the first and the last nodes, add at each'
+    'step the node with the largest error between each pair of nodes, until all the errors are'
+    'within the tolerance'
+    keep=numpy.array([0, n-1])
+    frames=numpy.arange(n)
+    while True:
+        e=errors(keep, frames)
+        e[keep]=0
+        if e.max()<=tolerance: return keep.tolist()
+        'Worst node of each interval between selected nodes'
+        interval=numpy.searchsorted(keep, frames, 'right')-1
+        order=numpy.lexsort((-e, interval))
+        first=order[numpy.r_[True, interval[order][1:]!=interval[order][:-1]]]
+        keep=numpy.union1d(keep, first[e[first]>tolerance])
+
+def decimateData(data):
+    'Decimation of a trajectory. data is the tuple (ID, method, tolerance, measure, t, x, y, w, h)'
+    'Return (ID, list of indexes of the nodes to keep)'
+    'NOTE: This function is run in the worker processes'
+    ID, method, tolerance, measure=data[:4]
+    return ID, decimateArrays(*(data[4:]+(method, tolerance, measure)))
+
+def decimateTrajectory(trajectory, keep):
+    'Return a new trajectory, with the same interpolation type, with the nodes given (indexes).'
+    'The nodes are copies, so that the trajectory given is not modified (addNode changes the type'
+    'of the nodes added)'
+    nodes=trajectory.nodes
+    decimated=Trajectory(deepcopy(nodes[keep[0]]), trajectory.InterpolationType())
+    with decimated.batchEdit():
+        for i in keep[1:]:
+            decimated.addNode(deepcopy(nodes[i]))
+    return decimated
+
+def decimateTrajectories(trajectories, tolerance, measure='pixels', processes=None):
+    'Decimate all the trajectories (see Trajectories), distributing them among a pool of processes'
+    'Return the number of nodes before and after the decimation'
+    data=[(ID, tr.InterpolationType(), tolerance, measure)+tuple(tr.getArrays())
+          for ID, tr in trajectories.trajectories.items()]
+    before=after=0
+    with Pool(processes) as pool:
+        for ID, keep in pool.imap_unordered(decimateData, data, chunksize=8):
+            trajectory=trajectories.trajectories[ID]
+            before+=len(trajectory.nodes)
+            after+=len(keep)
+            trajectories.addTrajectory(decimateTrajectory(trajectory, keep), ID)
+    return before, after
+
+if __name__=='__main__':
+    try:
+        annotationFile=sys.argv[1]
+        outputFile=sys.argv[2]
+    except IndexError:
+        print('Usage: python -m Trajectories.Decimation annotationFile outputFile [tolerance] [measure] [processes]')
+        sys.exit(1)
+    try: tolerance=float(sys.argv[3])
+    except IndexError: tolerance=1.0
+    try: measure=sys.argv[4]
+    except IndexError: measure='pixels'
+    try: processes=int(sys.argv[5])
+    except IndexError: processes=None
+    trajectories=Trajectories(annotationFile)
+    before, after=decimateTrajectories(trajectories, tolerance, measure, processes)
+    print('Nodes: '+str(before)+' -> '+str(after))
+    trajectories.SaveXMLFile(outputFile)
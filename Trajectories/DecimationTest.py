@@ -0,0 +1,108 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check the keyframe decimation (see Decimation) of dense trajectories (a node for each frame) for
+#every interpolation method: the decimated trajectory must reproduce all the frames of the dense
+#trajectory within the tolerance, with less nodes, and the dense trajectory must not change.
+#Run with: python -m Trajectories.DecimationTest
+
+from copy import deepcopy
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import NodeType
+from .Benchmark import syntheticTrajectory, createTrajectory
+from .Decimation import frameErrors, decimateArrays, decimateTrajectory, decimateTrajectories
+
+def nodeData(trajectory):
+    'Data of all the nodes of the trajectory, including their type'
+    return [(n.time, n.pos.x, n.pos.y, getattr(n, 'size', n.pos).x, getattr(n, 'size', n.pos).y, n.nodeType)
+            for n in trajectory.nodes]
+
+def denseTrajectory(method, rectangle, seed, storage=None):
+    'Trajectory with a node for each frame, as in the complete files (the nodes keep the type'
+    'of the interpolated nodes)'
+    truth=syntheticTrajectory(400, seed)
+    trajectory=createTrajectory(truth, range(400), method, rectangle)
+    nodes=list(trajectory.nodes)
+    for node in nodes[1:-1]: node.nodeType=NodeType.interpolated
+    dense=Trajectory(nodes[0], method, storage)
+    dense.setNodes(nodes)
+    return dense
+
+def checkDecimation(dense, keep, tolerance, measure):
+    'The decimated trajectory must reproduce the dense one within the tolerance, and the dense'
+    'trajectory must not change'
+    data=nodeData(dense)
+    decimated=decimateTrajectory(dense, keep)
+    assert nodeData(dense)==data, 'The dense trajectory has been modified'
+    assert len(decimated.nodes)==len(keep)<len(dense.nodes)
+    t, x, y, w, h=dense.getArrays()
+    time, xi, yi, wi, hi, nodeType=decimated.selectNodes(t)
+    error=frameErrors(x, y, w, h, xi, yi, None if w is None else wi, None if h is None else hi, measure)
+    assert error.max()<=tolerance+1e-9, (dense.InterpolationType(), measure, error.max())
+    'The nodes of both trajectories are different objects'
+    decimated.nodes[0].pos.x+=1000
+    assert nodeData(dense)==data
+    return decimated
+
+Trajectory.frameCache=None
+for method in sorted(Interpolator.interpolatorMethod):
+    for rectangle in (True, False):
+        for tolerance, measure in ((1.0, 'pixels'), (3.0, 'pixels'), (0.05, 'iou')):
+            if measure=='iou' and not rectangle: continue
+            for seed in range(2):
+                dense=denseTrajectory(method, rectangle, seed)
+                keep=decimateArrays(*(dense.getArrays()+(method, tolerance, measure)))
+                assert keep[0]==0 and keep[-1]==len(dense.nodes)-1 and keep==sorted(set(keep))
+                checkDecimation(dense, keep, tolerance, measure)
+    print('Method '+method+' OK')
+
+'IoU is not defined for points: point trajectories are kept'
+dense=denseTrajectory('LI', False, 0)
+assert decimateArrays(*(dense.getArrays()+('LI', 0.1, 'iou')))==list(range(len(dense.nodes)))
+
+if __name__=='__main__':
+    'Decimation of a trajectory list, in parallel'
+    trajectories=Trajectories()
+    for k, method in enumerate(sorted(Interpolator.interpolatorMethod)):
+        trajectories.addTrajectory(denseTrajectory(method, k%2==0, k, ('list', 'columnar')[k%2]), 0)
+    reference=deepcopy(trajectories.trajectories)
+    before, after=decimateTrajectories(trajectories, 2.0, 'pixels', 2)
+    assert before==sum(len(tr.nodes) for tr in reference.values())
+    assert after==sum(len(tr.nodes) for tr in trajectories.trajectories.values())<before
+    for ID, dense in reference.items():
+        decimated=trajectories.trajectories[ID]
+        assert decimated.InterpolationType()==dense.InterpolationType()
+        t, x, y, w, h=dense.getArrays()
+        time, xi, yi, wi, hi, nodeType=decimated.selectNodes(t)
+        error=frameErrors(x, y, w, h, xi, yi, None if w is None else wi, None if h is None else hi)
+        assert error.max()<=2.0+1e-9
+    print('Trajectories OK')
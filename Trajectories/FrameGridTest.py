@@ -0,0 +1,113 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the spatial index of the nodes of a frame (see SpatialIndex.FrameGrid) against a brute force
+#search over the node objects (Node.selectNode): nodes in several cells, nodes larger than maxCells
+#cells, points on the cell limits and on the node limits. The grids kept by Trajectories (see
+#Trajectories.spatialIndex) are limited to maxFrameGrids.
+#Run with: python -m Trajectories.FrameGridTest
+
+import math
+import numpy
+
+from .SpatialIndex import FrameGrid
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, PointNode, RectangleNode
+
+rng=numpy.random.default_rng(0)
+
+def randomNodes(count):
+    'Point and rectangle nodes, with integer coordinates (so that many points are on the limits)'
+    nodes=[]
+    for k in range(count):
+        pos=coord(int(rng.integers(0, 320)), int(rng.integers(0, 240)))
+        if rng.random()<0.3: nodes.append(PointNode(0, pos))
+        else: nodes.append(RectangleNode(0, pos, coord(2*int(rng.integers(1, 60)), 2*int(rng.integers(1, 60)))))
+    return nodes
+
+def arrays(nodes):
+    'Node data as given to FrameGrid'
+    x=numpy.array([n.pos.x for n in nodes], float)
+    y=numpy.array([n.pos.y for n in nodes], float)
+    w=numpy.array([n.size.x if isinstance(n, RectangleNode) else numpy.nan for n in nodes])
+    h=numpy.array([n.size.y if isinstance(n, RectangleNode) else numpy.nan for n in nodes])
+    return numpy.arange(len(nodes)), x, y, w, h
+
+def distance(node, x, y):
+    'Distance from the point to the limits of the node (0 inside)'
+    size=node.size if isinstance(node, RectangleNode) else coord(2*FrameGrid.pointMargin, 2*FrameGrid.pointMargin)
+    dx=max(node.pos.x-size.x/2-x, x-node.pos.x-size.x/2, 0)
+    dy=max(node.pos.y-size.y/2-y, y-node.pos.y-size.y/2, 0)
+    return math.hypot(dx, dy)
+
+for cellSize, maxCells in ((64, 64), (16, 8), (8, 2)):
+    FrameGrid.cellSize, FrameGrid.maxCells=cellSize, maxCells
+    for count in (0, 1, 30, 200):
+        nodes=randomNodes(count)
+        grid=FrameGrid(*arrays(nodes))
+        assert len(grid)==count
+        if count>30 and maxCells<64: assert len(grid.large)>0
+        points=[(float(rng.uniform(-20, 340)), float(rng.uniform(-20, 260))) for k in range(300)]
+        'Points on the cell limits and on the node limits'
+        points+=[(float(cellSize*rng.integers(0, 320//cellSize)), float(rng.integers(0, 240))) for k in range(100)]
+        for n in nodes[:50]:
+            p=n.getPoints() if isinstance(n, RectangleNode) else [n.pos-coord(4, 4), n.pos+coord(4, 4)]
+            points+=[(p[0].x, p[0].y), (p[1].x, p[1].y), (p[0].x, n.pos.y), (n.pos.x, p[1].y)]
+        for x, y in points:
+            expected=next((i for i, n in enumerate(nodes) if n.selectNode(x, y)), None)
+            assert grid.select(x, y)==expected, (x, y)
+            distances=[distance(n, x, y) for n in nodes]
+            for maxDistance in (0, 10, numpy.inf):
+                nearest=grid.nearest(x, y, maxDistance)
+                if not distances or min(distances)>maxDistance: assert nearest is None
+                else: assert math.isclose(distances[nearest], min(distances), abs_tol=1e-9)
+    print('cellSize=%d maxCells=%d OK' % (cellSize, maxCells))
+FrameGrid.cellSize, FrameGrid.maxCells=64, 64
+
+'Nodes with coordinates not finite are always checked'
+nodes=randomNodes(20)
+ID, x, y, w, h=arrays(nodes)
+x[3]=numpy.inf
+grid=FrameGrid(ID, x, y, w, h)
+assert 3 in grid.large
+
+'Grids kept by Trajectories'
+trajectories=Trajectories()
+for k in range(40):
+    node=RectangleNode(k, coord(100, 100), coord(20, 20))
+    trajectory=Trajectory(node, 'LI')
+    trajectory.addNode(RectangleNode(k+50, coord(200, 100), coord(20, 20)))
+    trajectories.addTrajectory(trajectory, 0)
+for frame in range(60):
+    grid=trajectories.spatialIndex(frame)
+    assert trajectories.spatialIndex(frame) is grid
+    assert len(trajectories.frameGrids)<=trajectories.maxFrameGrids
+    assert len(grid)==len([tr for tr in trajectories.trajectories.values() if tr.start<=frame<=tr.end])
+print('Frame grids OK')
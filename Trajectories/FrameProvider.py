@@ -0,0 +1,158 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Decoded frames of a video, with a cache and background decoding of the frames around the
+#current one.
+
+__metaclass__=type
+
+from collections import OrderedDict
+import threading
+'Opencv'
+import cv2
+
+class FrameProvider:
+    '''Decoded frames of a video.
+    Seeking a frame in a compressed video decodes all the frames from the previous key frame, which
+    is very slow for long GOP videos (specially when moving backwards). To avoid it, decoded frames
+    are kept in a cache of up to maxBytes (the least recently used frames are discarded first), and a
+    background thread decodes the frames around the last frame read (from prefetch frames before to
+    prefetch frames after it). The thread decodes the frames sequentially, seeking only at the
+    beginning of each run of frames, so that moving one frame forwards or backwards is served from
+    the cache.
+    If the seek index of the video is given (see VideoIndex), it is used to seek the frames.
+    The video is opened with its own capture object, so other captures of the same video can be used
+    at the same time (see PrintResults)'''
+
+    def __init__(self, fileName, maxBytes=256*1024*1024, prefetch=30, index=None):
+        self.capture=cv2.VideoCapture(fileName)
+        if not self.capture.isOpened():
+            raise IOError('Video '+fileName+' not found')
+        'Seek index of the video (see VideoIndex). If not given, frames are seeked with OpenCV'
+        self.index=index
+        if index is not None:
+            self.frameCount=index.frameCount
+        else:
+            'NOTE: function get from OpenCV return the value as a double'
+            self.frameCount=int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.maxBytes=maxBytes
+        self.prefetch=prefetch
+        'Decoded frames, in least recently used order'
+        self.frames=OrderedDict()
+        self.usedBytes=0
+        'Frames that cannot be decoded'
+        self.failed=set()
+        'Frame returned by the next read of the capture (None if unknown)'
+        self.position=0
+        'Last frame read'
+        self.current=0
+        self.closed=False
+        'Lock for the cache and the current frame. The thread waits on it for changes of the current frame'
+        self.lock=threading.Condition()
+        'Lock for the capture'
+        self.captureLock=threading.Lock()
+        self.thread=threading.Thread(target=self.decodeFrames, daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return self.frameCount
+
+    def read(self, frame):
+        'Return the image of the given frame, or None if the frame cannot be read. The image is kept'
+        'in the cache, so it must not be modified'
+        with self.lock:
+            self.current=frame
+            image=self.frames.get(frame)
+            if image is not None: self.frames.move_to_end(frame)
+            'Update the frames decoded in background'
+            self.lock.notify()
+        if image is None:
+            image=self.decode(frame)
+        return image
+
+    def decode(self, frame):
+        'Decode the given frame, and store it in the cache'
+        with self.captureLock:
+            if self.index is not None:
+                ret=self.index.seek(self.capture, frame, self.position)
+            elif self.position!=frame:
+                ret=self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame)
+            else: ret=True
+            if ret: ret, image=self.capture.read()
+            self.position=frame+1 if ret else None
+        if not ret:
+            with self.lock: self.failed.add(frame)
+            return None
+        with self.lock:
+            if not frame in self.frames:
+                self.frames[frame]=image
+                self.usedBytes+=image.nbytes
+            'Discard least recently used frames, if needed'
+            while self.usedBytes>self.maxBytes and len(self.frames)>1:
+                oldFrame, oldImage=self.frames.popitem(False)
+                self.usedBytes-=oldImage.nbytes
+        return image
+
+    def nextFrame(self):
+        'Return the next frame to decode in background, or None if all the frames around the current'
+        'one are already in the cache. Must be called with the lock acquired'
+        prefetch=self.prefetch
+        if self.frames:
+            'Do not prefetch more frames than the cache can keep'
+            frameBytes=next(iter(self.frames.values())).nbytes
+            prefetch=min(prefetch, max(self.maxBytes//(2*frameBytes)-1, 0))
+        first=max(self.current-prefetch, 0)
+        last=min(self.current+prefetch, self.frameCount-1)
+        missing=lambda frame: not (frame in self.frames or frame in self.failed)
+        'Continue decoding sequentially, if possible'
+        if self.position is not None and first<=self.position<=last and missing(self.position):
+            return self.position
+        'Otherwise, start with the following frames, and then the previous ones'
+        for frame in range(self.current+1, last+1):
+            if missing(frame): return frame
+        for frame in range(first, self.current):
+            if missing(frame): return frame
+        return None
+
+    def decodeFrames(self):
+        'Decode the frames around the current one, until the provider is closed (background thread)'
+        while True:
+            with self.lock:
+                frame=self.nextFrame()
+                while frame is None and not self.closed:
+                    self.lock.wait()
+                    frame=self.nextFrame()
+                if self.closed: return
+            self.decode(frame)
+
+    def close(self):
+        'Stop the background thread, and release the video'
+        with self.lock:
+            self.closed=True
+            self.lock.notify()
+        self.thread.join()
+        self.capture.release()
@@ -0,0 +1,97 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the frames read from the frame provider (see FrameProvider) against the frames read
+#sequentially from the video: random jumps and steps forwards and backwards, with and without the
+#video index, while the background thread decodes the frames around the current one. The cache must
+#not exceed its size, and the thread must decode the frames around the current one (only the
+#frames decoded are checked, not the time needed). The test video (FFV1, with a key frame every 12
+#frames) is written with OpenCV.
+#Run with: python -m Trajectories.FrameProviderTest
+
+import os
+import sys
+import time
+import tempfile
+import numpy
+'Opencv'
+import cv2
+
+from .FrameProvider import FrameProvider
+from .VideoIndex import BuildVideoIndex
+
+def waitPrefetch(provider, frames, timeout=30):
+    'Wait until the background thread decodes the frames given (all of them must be decoded)'
+    deadline=time.time()+timeout
+    while True:
+        with provider.lock:
+            missing=[f for f in frames if not f in provider.frames]
+        if not missing: return
+        assert time.time()<deadline, 'Frames not decoded in background: '+str(missing)
+        time.sleep(0.01)
+
+rng=numpy.random.default_rng(0)
+fileName=os.path.join(tempfile.mkdtemp(), 'video.mkv')
+writer=cv2.VideoWriter(fileName, cv2.VideoWriter_fourcc(*'FFV1'), 25, (64, 48))
+if not writer.isOpened():
+    print('FFV1 videos cannot be written with this OpenCV build. Test not run')
+    sys.exit(0)
+for frame in range(120):
+    writer.write(rng.integers(0, 256, (48, 64, 3), numpy.uint8))
+writer.release()
+capture=cv2.VideoCapture(fileName)
+frames=[capture.read()[1] for frame in range(120)]
+capture.release()
+frameBytes=frames[0].nbytes
+
+for index in (None, BuildVideoIndex(fileName)):
+    for maxFrames, prefetch in ((200, 10), (12, 10), (1, 3)):
+        provider=FrameProvider(fileName, maxFrames*frameBytes, prefetch, index)
+        assert len(provider)==120
+        frame=0
+        for k in range(200):
+            if k%10==0: frame=int(rng.integers(0, 120))
+            else: frame=min(max(frame+int(rng.choice((-1, 1, 2))), 0), 119)
+            image=provider.read(frame)
+            assert image is not None and numpy.array_equal(image, frames[frame]), frame
+            with provider.lock:
+                assert provider.usedBytes==sum(i.nbytes for i in provider.frames.values())
+                assert provider.usedBytes<=max(maxFrames*frameBytes, frameBytes), 'Cache too large'
+                for f, i in provider.frames.items(): assert numpy.array_equal(i, frames[f]), f
+        'The frames around the current one are decoded in background (as many as fit in the cache)'
+        frame=60
+        provider.read(frame)
+        window=min(prefetch, max(maxFrames//2-1, 0))
+        waitPrefetch(provider, range(frame-window, frame+window+1))
+        'Frames beyond the end of the video'
+        assert provider.read(130) is None
+        assert numpy.array_equal(provider.read(119), frames[119])
+        provider.close()
+        assert not provider.thread.is_alive()
+        print('Index: %s, cache: %d frames, prefetch: %d OK' % ('no' if index is None else 'yes', maxFrames, prefetch))
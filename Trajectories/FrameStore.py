@@ -0,0 +1,182 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Raw frame store of video files.
+#The frame store holds all the frames of a video, decoded once and stored uncompressed (optionally
+#at a reduced resolution) in a file along with the video file (same name, adding storeExtension).
+#The file is memory mapped, so that any frame is read without decoding or copying it. Frames
+#stored at a reduced resolution (scale other than 1) are not decoded either, but they must be
+#resized to the size of the video (a new image for each frame, see FrameStore.read). The file
+#consists on:
+#- Header: file identifier, version, size and modification time of the video file, scale of the
+#  frames, number of frames, and size of the frames (height, width and channels) and of the video
+#- Frames, one after the other, as uint8 arrays (height, width, channels)
+#All the values are little endian.
+#The frame store of a video can be built with:
+#    python -m Trajectories.FrameStore videoFile [scale]
+
+__metaclass__=type
+
+import sys
+import os
+import numpy
+'Opencv'
+import cv2
+
+from .IndexFile import fileStamp
+from .VideoIndex import ReadVideoIndex
+
+'Extension of frame store files'
+storeExtension='.frames'
+
+fileIdentifier=b'TrATVidR'
+fileVersion=1
+
+headerType=numpy.dtype([
+    ('identifier', 'S8'), ('version', '<u4'), ('reserved', 'V4'), ('size', '<u8'), ('mtime', '<i8'),
+    ('scale', '<f8'), ('frames', '<u8'), ('height', '<u4'), ('width', '<u4'), ('channels', '<u4'),
+    ('videoHeight', '<u4'), ('videoWidth', '<u4'), ('padding', 'V12')])
+
+def StoreFileName(fileName):
+    'Name of the frame store file of the video file given'
+    return fileName+storeExtension
+
+def frameSize(width, height, scale):
+    'Size (width, height) of the frames stored for a video of the given size'
+    return max(int(round(width*scale)), 1), max(int(round(height*scale)), 1)
+
+def EstimateStoreSize(fileName, scale=1.0):
+    'Return the size (in bytes) of the frame store of the video file given, and the number of frames.'
+    'The number of frames is taken from the video index, if it exists (see VideoIndex), or estimated'
+    'by OpenCV'
+    capture=cv2.VideoCapture(fileName)
+    if not capture.isOpened():
+        raise IOError('Video '+fileName+' not found')
+    index=ReadVideoIndex(fileName)
+    if index is not None: frames=index.frameCount
+    else: frames=int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    width, height=frameSize(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), scale)
+    capture.release()
+    return headerType.itemsize+frames*width*height*3, frames
+
+def BuildFrameStore(fileName, scale=1.0):
+    'Decode all the frames of the video file given, and write them to its frame store, resized by'
+    'the given scale'
+    capture=cv2.VideoCapture(fileName)
+    if not capture.isOpened():
+        raise IOError('Video '+fileName+' not found')
+    header=numpy.zeros(1, headerType)
+    header['identifier']=fileIdentifier
+    header['version']=fileVersion
+    header['size'], header['mtime']=fileStamp(fileName)
+    header['scale']=scale
+    'The store is written to a temporary file, which replaces the old store once it is complete'
+    f=open(StoreFileName(fileName)+'.tmp', 'wb')
+    f.write(header.tobytes())
+    frames=0
+    ret, image=capture.read()
+    while ret:
+        if frames==0:
+            header['videoHeight'], header['videoWidth']=image.shape[:2]
+            size=frameSize(image.shape[1], image.shape[0], scale)
+        if scale!=1.0:
+            image=cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        f.write(numpy.ascontiguousarray(image).tobytes())
+        frames+=1
+        ret, image=capture.read()
+    capture.release()
+    if frames>0:
+        header['height'], header['width']=size[1], size[0]
+        header['channels']=3
+    header['frames']=frames
+    f.seek(0)
+    f.write(header.tobytes())
+    f.close()
+    os.replace(StoreFileName(fileName)+'.tmp', StoreFileName(fileName))
+
+def OpenFrameStore(fileName, scale=None):
+    'Return the frame store of the video file given, or None if the store does not exist, if it does'
+    'not correspond to the current video file, or if it was built with a scale different from the'
+    'one given (if any)'
+    try:
+        size, mtime=fileStamp(fileName)
+        header=numpy.fromfile(StoreFileName(fileName), headerType, 1)
+    except (TypeError, IOError):
+        return None
+    if len(header)==0: return None
+    header=header[0]
+    if header['identifier']!=fileIdentifier or header['version']!=fileVersion: return None
+    if header['size']!=size or header['mtime']!=mtime: return None
+    if scale is not None and header['scale']!=scale: return None
+    return FrameStore(StoreFileName(fileName), header)
+
+class FrameStore:
+    '''Frames of a video, read from its frame store (see BuildFrameStore). Frames are memory mapped:
+    each frame is a read only view of the file'''
+
+    def __init__(self, storeFile, header):
+        self.scale=float(header['scale'])
+        'Size of the video frames (width, height)'
+        self.videoSize=(int(header['videoWidth']), int(header['videoHeight']))
+        shape=(int(header['frames']), int(header['height']), int(header['width']), int(header['channels']))
+        if shape[0]>0:
+            self.frames=numpy.memmap(storeFile, numpy.uint8, 'r', headerType.itemsize, shape)
+        else:
+            self.frames=numpy.zeros(shape, numpy.uint8)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, frame):
+        'Return the stored image of the given frame (read only, at the scale of the store)'
+        return self.frames[frame]
+
+    def read(self, frame):
+        'Return the image of the given frame at the size of the video, or None if the frame does not'
+        'exist. Only stores with scale 1 return the frames without copying them (read only views of'
+        'the file). Otherwise, each frame is resized (a new image, with the detail lost when the store'
+        'was built). Use the frames at the scale of the store (see __getitem__) to avoid resizing them'
+        if not 0<=frame<len(self.frames): return None
+        if self.scale==1.0: return self.frames[frame]
+        return cv2.resize(self.frames[frame], self.videoSize, interpolation=cv2.INTER_LINEAR)
+
+    def close(self):
+        'Release the memory mapped file'
+        del self.frames
+
+if __name__=='__main__':
+    try:
+        fileName=sys.argv[1]
+    except IndexError:
+        print('Usage: python -m Trajectories.FrameStore videoFile [scale]')
+        sys.exit(1)
+    try: scale=float(sys.argv[2])
+    except IndexError: scale=1.0
+    size, frames=EstimateStoreSize(fileName, scale)
+    print('Building frame store of '+fileName+': '+str(frames)+' frames, %.1f MB' % (size/1024.0/1024.0))
+    BuildFrameStore(fileName, scale)
+    print('Frame store written to '+StoreFileName(fileName))
@@ -0,0 +1,113 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the frames read from frame stores (see FrameStore), built with scale 1 and with a reduced
+#scale: stores with scale 1 give the frames of the video without copying them, and stores with
+#other scales give the frames resized. The blobs extracted with a frame store (see
+#PrintResults.printBlobs) are the same as the blobs extracted from the video. The test video (FFV1)
+#is written with OpenCV.
+#Run with: python -m Trajectories.FrameStoreTest
+
+import os
+import sys
+import tempfile
+import numpy
+'Opencv'
+import cv2
+
+from .FrameStore import BuildFrameStore, OpenFrameStore, StoreFileName, frameSize
+from .PrintResults import printBlobs
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, PointNode, RectangleNode
+
+def blobs(path):
+    'Images of the blobs written in the directory given'
+    return {name: cv2.imread(os.path.join(path, name)) for name in sorted(os.listdir(path))}
+
+rng=numpy.random.default_rng(0)
+path=tempfile.mkdtemp()
+fileName=os.path.join(path, 'video.mkv')
+writer=cv2.VideoWriter(fileName, cv2.VideoWriter_fourcc(*'FFV1'), 25, (64, 48))
+if not writer.isOpened():
+    print('FFV1 videos cannot be written with this OpenCV build. Test not run')
+    sys.exit(0)
+for frame in range(40):
+    writer.write(rng.integers(0, 256, (48, 64, 3), numpy.uint8))
+writer.release()
+'Frames read from the video'
+capture=cv2.VideoCapture(fileName)
+frames=[capture.read()[1] for frame in range(40)]
+capture.release()
+
+'Trajectory whose blobs are extracted (margin set by the application, see TrATVid)'
+PointNode.interMargin=2
+nodes=[RectangleNode(3, coord(10, 12), coord(8, 6)), RectangleNode(20, coord(40, 30), coord(12, 10))]
+trajectory=Trajectory(nodes[0], 'LI')
+trajectory.setNodes(nodes)
+video=cv2.VideoCapture(fileName)
+printBlobs(video, trajectory, os.path.join(path, 'video'), 1)
+expected=blobs(os.path.join(path, 'video001'))
+assert len(expected)==18
+
+assert OpenFrameStore(fileName) is None
+for scale in (1.0, 0.5):
+    BuildFrameStore(fileName, scale)
+    assert OpenFrameStore(fileName, 0.25 if scale==1.0 else 1.0) is None, 'Wrong scale accepted'
+    store=OpenFrameStore(fileName, scale)
+    assert store is not None and len(store)==40 and store.videoSize==(64, 48)
+    for frame in range(40):
+        stored=store[frame]
+        'Frames at the scale of the store are read only views of the file'
+        assert not stored.flags.writeable and numpy.shares_memory(stored, store.frames)
+        assert stored.shape[1::-1]==frameSize(64, 48, scale)
+        image=store.read(frame)
+        assert image.shape==frames[frame].shape
+        if scale==1.0:
+            'The frames of the video, without copying them'
+            assert numpy.shares_memory(image, store.frames)
+            assert numpy.array_equal(image, frames[frame])
+        else:
+            'The frames of the video resized, in new images'
+            assert numpy.array_equal(stored, cv2.resize(frames[frame], stored.shape[1::-1], interpolation=cv2.INTER_AREA))
+            assert not numpy.shares_memory(image, store.frames)
+            assert numpy.array_equal(image, cv2.resize(stored, (64, 48), interpolation=cv2.INTER_LINEAR))
+    assert store.read(-1) is None and store.read(40) is None
+    'The blobs are the same as read from the video (stores with a reduced scale are not used)'
+    blobPath=os.path.join(path, 'store%g' % scale)
+    printBlobs(None if scale==1.0 else cv2.VideoCapture(fileName), trajectory, blobPath, 1, frameStore=store)
+    result=blobs(blobPath+'001')
+    assert sorted(result)==sorted(expected)
+    assert all(numpy.array_equal(result[name], expected[name]) for name in expected), 'Different blobs'
+    store.close()
+    print('Scale '+str(scale)+' OK')
+
+'The store is not used when the video changes'
+os.utime(fileName, (0, 0))
+assert OpenFrameStore(fileName) is None
+os.remove(StoreFileName(fileName))
@@ -0,0 +1,128 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Index files of XML annotation files.
+#The index file is written along with the XML annotation file (same name, adding indexExtension),
+#and stores, for each trajectory, its ID, start and end frames, and the position (offset and
+#length, in bytes) of the Trajectory element in the XML file. Thus, the trajectories that exist
+#in a range of frames can be read without parsing the whole XML file (see Trajectories.loadRange).
+#The file consists on:
+#- Header: file identifier, version, size and modification time of the XML file (the index is
+#  ignored if the XML file has been modified after writing the index), and number of trajectories
+#- Table with the data of each trajectory
+#All the values are little endian.
+#The index of an existing XML file can be built with:
+#    python -m Trajectories.IndexFile annotationFile
+
+import sys
+import os
+import re
+import numpy
+'XML support'
+from xml.etree import ElementTree
+
+'Extension of index files'
+indexExtension='.idx'
+
+fileIdentifier=b'TrATVidI'
+fileVersion=1
+
+headerType=numpy.dtype([
+    ('identifier', 'S8'), ('version', '<u4'), ('reserved', 'V4'), ('size', '<u8'), ('mtime', '<i8'),
+    ('trajectories', '<u8')])
+entryType=numpy.dtype([
+    ('ID', '<i8'), ('start', '<i8'), ('end', '<i8'), ('offset', '<u8'), ('length', '<u8')])
+
+'Trajectory elements in the XML file (see BuildIndex)'
+trajectoryPattern=re.compile(br'<Trajectory[\s>].*?</Trajectory>', re.DOTALL)
+
+def IndexFileName(fileName):
+    'Name of the index file of the XML annotation file given'
+    return fileName+indexExtension
+
+def fileStamp(fileName):
+    'Size and modification time of the file given'
+    s=os.stat(fileName)
+    return s.st_size, s.st_mtime_ns
+
+def ReadIndexFile(fileName):
+    'Return the index (numpy array of entryType) of the XML annotation file given, or None if the'
+    'index file does not exist, or if it does not correspond to the current XML file'
+    try:
+        size, mtime=fileStamp(fileName)
+        data=numpy.fromfile(IndexFileName(fileName), numpy.uint8)
+    except (TypeError, IOError):
+        return None
+    if len(data)<headerType.itemsize: return None
+    header=data[:headerType.itemsize].view(headerType)[0]
+    if header['identifier']!=fileIdentifier or header['version']!=fileVersion: return None
+    if header['size']!=size or header['mtime']!=mtime: return None
+    table=data[headerType.itemsize:]
+    if len(table)!=int(header['trajectories'])*entryType.itemsize: return None
+    return table.view(entryType)
+
+def WriteIndexFile(fileName, table):
+    'Write the index (numpy array of entryType) of the XML annotation file given. The index must'
+    'be written once the XML file is written'
+    header=numpy.zeros(1, headerType)
+    header['identifier']=fileIdentifier
+    header['version']=fileVersion
+    header['size'], header['mtime']=fileStamp(fileName)
+    header['trajectories']=len(table)
+    f=open(IndexFileName(fileName), 'wb')
+    f.write(header.tobytes())
+    f.write(numpy.asarray(table, entryType).tobytes())
+    f.close()
+
+def BuildIndex(fileName):
+    'Build the index of an existing XML annotation file. Each Trajectory element is found in the'
+    'file and parsed (on its own), to get the trajectory ID, start and end frames'
+    f=open(fileName, 'rb')
+    data=f.read()
+    f.close()
+    table=[]
+    for match in trajectoryPattern.finditer(data):
+        XMLTrajectory=ElementTree.fromstring(match.group())
+        try:
+            ID=int(XMLTrajectory.attrib['ID'])
+            times=[int(XMLNode.attrib['time']) for XMLNode in XMLTrajectory.iterfind('TrajectoryNodes/Node')]
+        except KeyError:
+            'Trajectories without ID or incorrect nodes are ignored (as when reading the XML file)'
+            continue
+        if times:
+            table.append((ID, min(times), max(times), match.start(), match.end()-match.start()))
+    return numpy.array(table, entryType)
+
+if __name__=='__main__':
+    try:
+        fileName=sys.argv[1]
+    except IndexError:
+        print('Usage: python -m Trajectories.IndexFile annotationFile')
+        sys.exit(1)
+    table=BuildIndex(fileName)
+    WriteIndexFile(fileName, table)
+    print('Index of '+str(len(table))+' trajectories written to '+IndexFileName(fileName))
@@ -0,0 +1,110 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that editing an annotation file loaded on demand (see Trajectories.loadRange) and saving it
+#over the same file gives the same file than loading all the trajectories: the trajectories not
+#loaded are copied from the original file, and the index file is updated.
+#Run with: python -m Trajectories.LazyLoadTest
+
+from copy import deepcopy
+import os
+import re
+import tempfile
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, RectangleNode
+from .IndexFile import ReadIndexFile, BuildIndex
+
+rng=numpy.random.default_rng(0)
+
+def fileData(fileName):
+    'Content of the file, without the date'
+    return re.sub(b' date="[^"]*"', b'', open(fileName, 'rb').read())
+
+def randomTrajectory(start):
+    'Rectangle trajectory with a few nodes from the frame given'
+    frames=start+numpy.sort(rng.choice(150, int(rng.integers(2, 6)), replace=False))
+    nodes=[RectangleNode(f, coord(int(rng.integers(0, 640)), int(rng.integers(0, 480))),
+                         coord(int(rng.integers(5, 100)), int(rng.integers(5, 100)))) for f in frames.tolist()]
+    trajectory=Trajectory(nodes[0], 'LI')
+    trajectory.setNodes(nodes)
+    return trajectory
+
+def edit(trajectories, frame, new):
+    'Delete, modify and add trajectories around the frame given (the trajectories visible in the'
+    'GUI). new is the trajectory added'
+    IDs=sorted(ID for ID, tr in trajectories.trajectories.items() if tr.start<=frame+100 and tr.end>=frame-100)
+    assert len(IDs)>=3
+    trajectories.deleteTrajectory(IDs[0])
+    trajectory=trajectories.trajectories[IDs[1]]
+    trajectory.addNode(RectangleNode(trajectory.end+10, coord(5, 5), coord(10, 10)))
+    trajectories.addTrajectory(trajectory, IDs[1])
+    trajectories.addTrajectory(deepcopy(new), 0)
+
+def checkIndex(fileName):
+    'The index file must be valid, and give the position of each trajectory in the file'
+    index=ReadIndexFile(fileName)
+    assert index is not None, 'Index file not updated'
+    assert numpy.array_equal(index, BuildIndex(fileName)), 'Wrong index file'
+
+path=tempfile.mkdtemp()
+lazyFile=os.path.join(path, 'lazy.xml')
+fullFile=os.path.join(path, 'full.xml')
+trajectories=Trajectories()
+for k in range(80):
+    trajectories.addTrajectory(randomTrajectory(75*k), 0)
+trajectories.SaveXMLFile(lazyFile)
+trajectories.SaveXMLFile(fullFile)
+
+for frame in (1000, 3000, 200, 4300):
+    lazy=Trajectories(lazyFile, 200)
+    full=Trajectories(fullFile)
+    assert lazy.pending is not None and len(lazy.pending)>0, 'Trajectories not loaded on demand'
+    lazy.loadFrame(frame)
+    assert len(lazy.trajectories)<len(full.trajectories)
+    new=randomTrajectory(frame)
+    edit(lazy, frame, new)
+    edit(full, frame, new)
+    'Save the changes over the same file (the trajectories not loaded are copied from it)'
+    lazy.SaveXMLFile(lazyFile)
+    full.SaveXMLFile(fullFile)
+    assert fileData(lazyFile)==fileData(fullFile), 'Different files'
+    checkIndex(lazyFile)
+    'Save again without reloading the file (the trajectories not loaded are now in the new file)'
+    lazy.loadFrame(frame+1500)
+    new=randomTrajectory(frame+1500)
+    edit(lazy, frame+1500, new)
+    edit(full, frame+1500, new)
+    lazy.SaveXMLFile(lazyFile)
+    full.SaveXMLFile(fullFile)
+    assert fileData(lazyFile)==fileData(fullFile), 'Different files'
+    checkIndex(lazyFile)
+    print('Frame '+str(frame)+' OK')
+'All the trajectories can be read back'
+assert sorted(Trajectories(lazyFile).trajectories)==sorted(Trajectories(fullFile).trajectories)
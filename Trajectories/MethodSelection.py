@@ -0,0 +1,152 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Automatic selection of the interpolation method of each trajectory, by leave-one-out
+#cross-validation of the nodes of the trajectory.
+#Usage:
+#    python -m Trajectories.MethodSelection annotationFile [outputFile] [processes] [metric] [neighbours]
+#The selected method is written in the Interpolation attribute of each trajectory. If the output
+#file is not given, the annotation file is overwritten. metric is the error measure used to compare
+#the methods (area or IoU, see metrics), and neighbours the number of nodes used to interpolate each
+#node left out (see neighbours, 0 to use all the nodes)
+
+'Access program arguments'
+import sys
+'Parallel processing of trajectories'
+from multiprocessing import Pool
+from functools import partial
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import CreateNodeFromValues
+
+'Number of nodes at each side of the node left out used to interpolate it (0 to use all the'
+'nodes). This makes the validation time linear with the number of nodes. The result is the same'
+'as using all the nodes for the methods that only use the two nodes around each frame (NI, LI,'
+'GI and LM). For the spline methods (CS and GC), the spline is fitted to the window of nodes'
+'instead of to the whole trajectory: this is an approximation, since the influence of distant'
+'nodes on a spline decays quickly, but it is not zero. With 0, the validation time of the'
+'spline methods is quadratic with the number of nodes'
+neighbours=16
+
+'Error measures used to compare the methods for rectangle trajectories: mean area error (see'
+'RectangleNode.areaError), or mean IoU loss (1-IoU). For point trajectories, the mean distance'
+'between the interpolated and the actual points is always used'
+metrics=('area', 'IoU')
+
+def crossValidation(t, x, y, w, h, method, neighbours=neighbours):
+    'Leave-one-out cross-validation of the interpolation method given, for the node data (numpy'
+    'arrays t, x, y, w, h, with w and h None for points). Each node (except the first and the last'
+    'ones, which can only be extrapolated) is removed, and interpolated from the rest of nodes (or'
+    'from the neighbours nodes at each side, see neighbours).'
+    'Return the mean error between the interpolated and the actual nodes: (area error, IoU) for'
+    'rectangles (see RectangleNode.areaError), and (distance, None) for points, or None if the'
+    'trajectory does not have enough nodes'
+    n=len(t)
+    if n<3: return None
+    if neighbours<=0: neighbours=n
+    interpolator=Interpolator(method)
+    error=[]
+    IoU=[]
+    for k in range(1, n-1):
+        'Neighbour nodes, without node k'
+        window=numpy.r_[max(0, k-neighbours):k, k+1:min(n, k+neighbours+1)]
+        data=[None if c is None else c[window] for c in (t, x, y, w, h)]
+        interpolator.updateInterpolatorArrays(*data)
+        xi, yi, wi, hi, nodeType=interpolator.interpolateArray(*(data+[t[k:k+1]]))
+        if w is None:
+            error.append(numpy.hypot(xi[0]-x[k], yi[0]-y[k]))
+        else:
+            node=CreateNodeFromValues(t[k], xi[0], yi[0], abs(wi[0]), abs(hi[0]))
+            actual=CreateNodeFromValues(t[k], x[k], y[k], w[k], h[k])
+            error.append(node.areaError(actual))
+            IoU.append(node.intersection(actual)/node.union(actual))
+    if w is None: return float(numpy.mean(error)), None
+    return float(numpy.mean(error)), float(numpy.mean(IoU))
+
+def scoreMethods(data, neighbours=neighbours):
+    'Cross-validation of all the interpolation methods for a trajectory. data is the tuple'
+    '(ID, t, x, y, w, h). Return (ID, scores), where scores is a dictionary with the result of'
+    'crossValidation for each method'
+    'NOTE: This function is run in the worker processes'
+    ID=data[0]
+    return ID, {method:crossValidation(*(data[1:]+(method, neighbours))) for method in Interpolator.interpolatorMethod}
+
+def methodError(score, metric='area'):
+    'Error of the result of crossValidation for the metric given (see metrics)'
+    if metric=='IoU' and score[1] is not None: return 1-score[1]
+    return score[0]
+
+def bestMethod(scores, current, metric='area'):
+    'Method with the lowest error for the metric given (see metrics). If no method can be'
+    'validated, or the current method is as good as the best one, the current method is kept'
+    if not metric in metrics:
+        raise ValueError('Unknown metric '+str(metric))
+    valid=[(methodError(s, metric), method) for method, s in scores.items() if not s is None]
+    if not valid: return current
+    error, method=min(valid)
+    if scores.get(current) is not None and methodError(scores[current], metric)<=error: return current
+    return method
+
+def selectMethods(trajectories, processes=None, metric='area', neighbours=neighbours):
+    'Select the interpolation method for all the trajectories (see Trajectories), distributing the'
+    'trajectories among a pool of processes. The trajectories are updated with the best method for'
+    'the metric given (see metrics). neighbours is the number of nodes used to interpolate each'
+    'node (see neighbours). Return a dictionary with (method, scores) for each trajectory ID'
+    if not metric in metrics:
+        raise ValueError('Unknown metric '+str(metric))
+    data=[(ID,)+tuple(tr.getArrays()) for ID, tr in trajectories.trajectories.items()]
+    results={}
+    with Pool(processes) as pool:
+        for ID, scores in pool.imap_unordered(partial(scoreMethods, neighbours=neighbours), data, chunksize=8):
+            trajectory=trajectories.trajectories[ID]
+            method=bestMethod(scores, trajectory.InterpolationType(), metric)
+            trajectory.updateInterpolator(method)
+            results[ID]=(method, scores)
+    return results
+
+if __name__=='__main__':
+    try:
+        annotationFile=sys.argv[1]
+    except IndexError:
+        print('Usage: python -m Trajectories.MethodSelection annotationFile [outputFile] [processes] [metric] [neighbours]')
+        sys.exit(1)
+    try: outputFile=sys.argv[2]
+    except IndexError: outputFile=annotationFile
+    try: processes=int(sys.argv[3])
+    except IndexError: processes=None
+    try: metric=sys.argv[4]
+    except IndexError: metric='area'
+    try: neighbours=int(sys.argv[5])
+    except IndexError: pass
+    trajectories=Trajectories(annotationFile)
+    results=selectMethods(trajectories, processes, metric, neighbours)
+    for ID, (method, scores) in sorted(results.items()):
+        s=' '.join(m+':'+('-' if v is None else '%.4g' % methodError(v, metric)) for m, v in sorted(scores.items()))
+        print('Trajectory '+str(ID)+': '+method+' ('+s+')')
+    trajectories.SaveXMLFile(outputFile)
@@ -0,0 +1,128 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check that the automatic selection of the interpolation method (see MethodSelection) picks the
+#method that generated the data, for synthetic trajectories that each method reproduces exactly
+#(or, with corners, better than the rest of methods):
+#- NI: piecewise constant motion
+#- LI: piecewise linear motion in the image
+#- CS: quadratic motion in the image
+#- GC: quadratic motion of a rigid rectangle in 3D
+#- GI: linear motion of a rigid rectangle in 3D. LM and GC also reproduce it exactly, so any of
+#  the three methods is valid
+#Run with: python -m Trajectories.MethodSelectionTest
+
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, RectangleNode, PointNode
+from .MethodSelection import crossValidation, scoreMethods, bestMethod, selectMethods, metrics
+
+rng=numpy.random.default_rng(0)
+t=numpy.arange(0, 200, 5)
+s=t/200.0
+knots=[0, 60, 130, 200]
+
+def projection(X, Y, Z):
+    'Image rectangle (x, y, w, h) of a rigid 3D rectangle with center (X, Y, Z)'
+    W, H=rng.uniform(0.2, 0.5, 2)
+    return 320+500*X/Z, 240+500*Y/Z, 500*W/Z, 500*H/Z
+
+def constant():
+    return rng.uniform(0, 1, len(knots))[numpy.searchsorted(knots, t, 'right')-1]
+
+def linear():
+    return numpy.interp(t, knots, rng.uniform(0, 1, len(knots)))
+
+def quadratic():
+    return numpy.polyval(rng.uniform(-1, 1, 3), s)
+
+generators={
+    'NI':lambda: (300+200*constant(), 200+100*constant(), 50+30*constant(), 40+20*constant()),
+    'LI':lambda: (300+200*linear(), 200+100*linear(), 50+30*linear(), 40+20*linear()),
+    'CS':lambda: (300+100*quadratic(), 200+100*quadratic(), 60+20*quadratic(), 60+20*quadratic()),
+    'GC':lambda: projection(quadratic(), quadratic(), 3+quadratic()),
+    'GI':lambda: projection(2*s-1+rng.uniform(-1, 1), 1-s+rng.uniform(-1, 1), 2.5+s*rng.uniform(-1, 1))}
+valid={'NI':('NI',), 'LI':('LI',), 'CS':('CS',), 'GC':('GC',), 'GI':('GI', 'LM', 'GC')}
+
+for generator, data in sorted(generators.items()):
+    for k in range(5):
+        x, y, w, h=data()
+        ID, scores=scoreMethods((k, t, x, y, w, h))
+        for metric in metrics:
+            'The current method is not kept when it is worse'
+            current='NI' if generator!='NI' else 'LI'
+            method=bestMethod(scores, current, metric)
+            assert method in valid[generator], (generator, metric, method, scores)
+    print('Method '+generator+' OK')
+
+'Point trajectories are scored by distance'
+x, y, w, h=generators['CS']()
+scores=scoreMethods((1, t, x, y, None, None))[1]
+assert all(v[1] is None for v in scores.values())
+assert bestMethod(scores, 'NI', 'IoU')=='CS'
+'With equal errors, the current method is kept'
+assert bestMethod({'LI':(1.0, 0.5), 'CS':(1.0, 0.5)}, 'LI')=='LI'
+assert bestMethod({'LI':None, 'CS':None}, 'GC')=='GC'
+try:
+    bestMethod(scores, 'NI', 'distance')
+    assert False, 'Unknown metric accepted'
+except ValueError: pass
+
+'The window of neighbours only changes the result of the spline methods, and for short'
+'trajectories (all the nodes within the window) it gives the same result as using all the nodes'
+x, y, w, h=generators['GC']()
+for method in ('NI', 'LI', 'GI', 'LM'):
+    assert crossValidation(t, x, y, w, h, method, 4)==crossValidation(t, x, y, w, h, method, 0)
+assert crossValidation(t, x, y, w, h, 'CS', len(t))==crossValidation(t, x, y, w, h, 'CS', 0)
+print('Scores OK')
+
+if __name__=='__main__':
+    'Selection for a trajectory list, in parallel'
+    trajectories=Trajectories()
+    expected={}
+    for generator in ('NI', 'LI', 'CS', 'GC'):
+        for k in range(3):
+            x, y, w, h=generators[generator]()
+            nodes=[RectangleNode(int(f), coord(float(a), float(b)), coord(float(c), float(d)))
+                   for f, a, b, c, d in zip(t, x, y, w, h)]
+            trajectory=Trajectory(nodes[0], 'LM')
+            trajectory.setNodes(nodes)
+            trajectories.addTrajectory(trajectory, 0)
+            expected[trajectories.ID]=generator
+    'A trajectory with two nodes can not be validated: it keeps its method'
+    trajectory=Trajectory(PointNode(0, coord(1, 2)), 'LM')
+    trajectory.addNode(PointNode(10, coord(5, 2)))
+    trajectories.addTrajectory(trajectory, 0)
+    expected[trajectories.ID]='LM'
+    results=selectMethods(trajectories, 2, 'IoU')
+    assert sorted(results)==sorted(expected)
+    for ID, generator in expected.items():
+        assert results[ID][0]==generator and trajectories.trajectories[ID].InterpolationType()==generator
+    print('Trajectories OK')
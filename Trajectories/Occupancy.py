@@ -0,0 +1,98 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Number of trajectories that exist in each frame.
+
+__metaclass__=type
+
+import numpy
+
+def frameRuns(frames, mask):
+    'Return the runs of consecutive frames where mask is True, as a list of tuples (first, last)'
+    edges=numpy.diff(numpy.concatenate(([0], numpy.asarray(mask, numpy.int8), [0])))
+    first=numpy.flatnonzero(edges==1)
+    last=numpy.flatnonzero(edges==-1)-1
+    return [(int(frames[a]), int(frames[b])) for a, b in zip(first, last)]
+
+class Occupancy:
+    '''Number of trajectories that exist in each frame, computed from the start and end frames of the
+    trajectories with a difference array: each trajectory adds 1 to its start frame, and subtracts 1
+    from the frame after its end, so that the number of trajectories in each frame is the cumulative
+    sum of the array. Adding or removing a trajectory takes O(1) time, and the counts for F frames are
+    computed in O(F) time, only after the trajectories change'''
+
+    def __init__(self):
+        'Difference array, from frame first on'
+        self.first=0
+        self.diff=numpy.zeros(0, numpy.int64)
+        'Cumulative sum of the difference array (None when it must be computed again)'
+        self.cumulative=None
+
+    def resize(self, first, last):
+        'Ensure that the difference array includes the frames from first to last'
+        if len(self.diff)==0: self.first=first
+        end=self.first+len(self.diff)
+        if first>=self.first and last<end: return
+        'Reserve twice the space needed, so that the array is not resized on every change'
+        margin=max(last+1, end)-min(first, self.first)
+        newFirst=first-margin if first<self.first else self.first
+        newEnd=last+1+margin if last>=end else end
+        diff=numpy.zeros(newEnd-newFirst, numpy.int64)
+        diff[self.first-newFirst:end-newFirst]=self.diff
+        self.first=newFirst
+        self.diff=diff
+
+    def add(self, start, end, count=1):
+        'Add count trajectories that exist from start to end frames. start and end can also be arrays,'
+        'to add several trajectories at once'
+        start=numpy.asarray(start)
+        end=numpy.asarray(end)
+        if start.size==0: return
+        self.resize(int(start.min()), int(end.max())+1)
+        numpy.add.at(self.diff, start-self.first, count)
+        numpy.add.at(self.diff, end+1-self.first, -count)
+        self.cumulative=None
+
+    def remove(self, start, end):
+        'Remove the trajectories that exist from start to end frames (see add)'
+        self.add(start, end, -1)
+
+    def counts(self, start, end):
+        'Return the number of trajectories that exist in each frame from start to end (numpy array)'
+        if self.cumulative is None: self.cumulative=numpy.cumsum(self.diff)
+        counts=numpy.zeros(max(end-start+1, 0), numpy.int64)
+        a=max(start, self.first)
+        b=min(end, self.first+len(self.diff)-1)
+        if a<=b: counts[a-start:b-start+1]=self.cumulative[a-self.first:b-self.first+1]
+        return counts
+
+    def extent(self):
+        'Return the first and last frames where any trajectory exists (None if there is none)'
+        if self.cumulative is None: self.cumulative=numpy.cumsum(self.diff)
+        frames=numpy.flatnonzero(self.cumulative)
+        if len(frames)==0: return None
+        return self.first+int(frames[0]), self.first+int(frames[-1])
@@ -0,0 +1,142 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check the number of trajectories in each frame (see Occupancy, and Trajectories.occupancy,
+#maxConcurrency and idleGaps) against a brute force count over the time intervals of the
+#trajectories, after adding, editing and deleting random trajectories, with all the trajectories
+#loaded and loaded on demand.
+#Run with: python -m Trajectories.OccupancyTest
+
+import os
+import tempfile
+import numpy
+
+from .Occupancy import Occupancy
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, PointNode
+
+rng=numpy.random.default_rng(0)
+
+def bruteForce(intervals, start, end):
+    'Number of intervals that include each frame from start to end'
+    return numpy.array([sum(1 for s, e in intervals if s<=f<=e) for f in range(start, end+1)], numpy.int64)
+
+def runs(frames, mask):
+    'Runs of consecutive frames where mask is True (first, last)'
+    result=[]
+    for f, m in zip(frames, mask):
+        if m and result and result[-1][1]==f-1: result[-1]=(result[-1][0], f)
+        elif m: result.append((f, f))
+    return result
+
+'Difference array: single and multiple intervals, with negative frames and growing on both sides'
+occupancy=Occupancy()
+intervals=[]
+for k in range(400):
+    if intervals and rng.integers(0, 3)==0:
+        s, e=intervals.pop(int(rng.integers(0, len(intervals))))
+        occupancy.remove(s, e)
+    elif rng.integers(0, 4)==0:
+        start=rng.integers(-300, 3000, 5)
+        end=start+rng.integers(0, 200, 5)
+        occupancy.add(start, end)
+        intervals+=list(zip(start.tolist(), end.tolist()))
+    else:
+        start=int(rng.integers(-300, 3000))//(k%7+1)
+        end=start+int(rng.integers(0, 300))
+        occupancy.add(start, end)
+        intervals.append((start, end))
+    if k%10==0:
+        start=int(rng.integers(-500, 3300))
+        end=start+int(rng.integers(-1, 400))
+        assert numpy.array_equal(occupancy.counts(start, end), bruteForce(intervals, start, end))
+        extent=(min(s for s, e in intervals), max(e for s, e in intervals)) if intervals else None
+        assert occupancy.extent()==extent
+occupancy.add([], [])
+assert len(occupancy.counts(5, 4))==0
+print('Occupancy OK')
+
+def randomTrajectory():
+    start=int(rng.integers(0, 2000))
+    trajectory=Trajectory(PointNode(start, coord(1, 2)), 'LI')
+    trajectory.addNode(PointNode(start+int(rng.integers(1, 300)), coord(3, 4)))
+    return trajectory
+
+def checkTrajectories(trajectories, intervals):
+    'Compare the occupancy, maximum concurrency and idle gaps with the brute force count'
+    for k in range(5):
+        if k==0: start=end=None
+        else:
+            start=int(rng.integers(-100, 2400))
+            end=start+int(rng.integers(0, 600))
+        frames, counts=trajectories.occupancy(start, end)
+        if start is None:
+            start=min(s for s, e in intervals.values())
+            end=max(e for s, e in intervals.values())
+        assert numpy.array_equal(frames, numpy.arange(start, end+1))
+        reference=bruteForce(intervals.values(), start, end)
+        assert numpy.array_equal(counts, reference)
+        maximum, where=trajectories.maxConcurrency(start, end)
+        assert maximum==reference.max() and where==runs(frames.tolist(), reference==maximum)
+        minLength=int(rng.integers(1, 20))
+        gaps=[(a, b) for a, b in runs(frames.tolist(), reference==0) if b-a+1>=minLength]
+        assert trajectories.idleGaps(start, end, minLength)==gaps
+
+trajectories=Trajectories()
+intervals={}
+for k in range(150):
+    operation=rng.integers(0, 4)
+    if operation<2 or len(intervals)<2:
+        trajectories.addTrajectory(randomTrajectory(), 0)
+        ID=trajectories.ID
+    elif operation==2:
+        'Edit a trajectory: extend it, and add it again'
+        ID=int(rng.choice(sorted(intervals)))
+        trajectory=trajectories.trajectories[ID]
+        trajectory.addNode(PointNode(trajectory.start-int(rng.integers(1, 50)), coord(0, 0)))
+        trajectories.addTrajectory(trajectory, ID)
+    else:
+        ID=int(rng.choice(sorted(intervals)))
+        trajectories.deleteTrajectory(ID)
+        del intervals[ID]
+        continue
+    intervals[ID]=(trajectories.trajectories[ID].start, trajectories.trajectories[ID].end)
+    if k%10==0: checkTrajectories(trajectories, intervals)
+print('Trajectories OK')
+
+'Trajectories loaded on demand: the trajectories not loaded yet are also counted'
+fileName=os.path.join(tempfile.mkdtemp(), 'trajectories.xml')
+trajectories.SaveXMLFile(fileName)
+lazy=Trajectories(fileName, 100)
+assert len(lazy.trajectories)<len(intervals)
+checkTrajectories(lazy, intervals)
+for frame in (500, 1500):
+    lazy.loadFrame(frame)
+    checkTrajectories(lazy, intervals)
+print('Trajectories loaded on demand OK')
@@ -29,26 +29,45 @@ This file is part of the TrATVid Software
 import os
 'Opencv'
 import cv2
+import numpy
+from .Trajectory.Node import NodeType, CreateNodeFromValues
 
-def printBlobs(video, trajectory, path, ID):
+def printBlobs(video, trajectory, path, ID, videoIndex=None, frameStore=None, scale=1.0):
+    'Extract the blobs of all the nodes of the trajectory from the video. If videoIndex is given, it'
+    'is used to seek the first frame (see VideoIndex). If frameStore is given, and its frames have the'
+    'size of the video, frames are read from it instead (see FrameStore). Stores with a reduced'
+    'resolution are not used, since blobs must have the detail of the video. scale is the scale of'
+    'the trajectory coordinates with respect to the video (see Trajectories.scale)'
     'Create directory for all the images'
     blobPath='%s%03i' % (path, ID)
     try:os.makedirs(blobPath)
     except OSError: pass
-    'Set the video at the beginning of the trajectory'
-    for fr in range(trajectory.start, trajectory.end+1):
-        video.set(cv2.CAP_PROP_POS_FRAMES, fr)
-        ret, imgFr=video.read()
-        del ret
-        node=trajectory.selectNode(fr)
+    'Interpolate all the nodes of the trajectory at once'
+    time, x, y, w, h, nodeType=trajectory.selectRange()
+    x, y, w, h=(x/scale).tolist(), (y/scale).tolist(), (w/scale).tolist(), (h/scale).tolist()
+    if frameStore is not None and frameStore.scale!=1.0:
+        print('Warning: Frame store with scale '+str(frameStore.scale)+' not used for the blobs. Reading the video')
+        frameStore=None
+    'Set the video at the beginning of the trajectory. The following frames are read sequentially'
+    if frameStore is None:
+        if videoIndex is not None: videoIndex.seek(video, trajectory.start)
+        else: video.set(cv2.CAP_PROP_POS_FRAMES, trajectory.start)
+    for i, fr in enumerate(time.tolist()):
+        if frameStore is None: ret, imgFr=video.read()
+        else:
+            imgFr=frameStore.read(fr)
+            ret=imgFr is not None
+        if not ret: break
+        node=CreateNodeFromValues(fr, x[i], y[i], w[i], h[i], NodeType(nodeType[i]))
         blob=node.extractBlob(imgFr)
         imgName='%s%s%04i.png' % (blobPath, os.sep, fr)
         cv2.imwrite(imgName, blob)
 
 
-def saveVideoResult(videoInName, path, trajectories):
-    'Save an augmented video as a sequence of images'
-    videoIn=cv2.VideoCapture(str(path+videoInName))
+def saveVideoResult(videoInName, path, trajectories, frameStore=None):
+    'Save an augmented video as a sequence of images. If frameStore is given, frames are read from it'
+    'instead of decoding the video (see FrameStore)'
+    videoIn=cv2.VideoCapture(str(path+videoInName)) if frameStore is None else None
     'Create directory for the images'
     imagePath=path+'video'
     try:os.makedirs(imagePath)
@@ -56,7 +75,12 @@ def saveVideoResult(videoInName, path, trajectories):
     
     print('Generating video. Please, wait...')
     frame=0
-    ret, img=videoIn.read()
+    def readFrame(frame):
+        'Return the next frame (a copy, since it is modified)'
+        if frameStore is None: return videoIn.read()
+        img=frameStore.read(frame)
+        return img is not None, None if img is None else numpy.array(img)
+    ret, img=readFrame(frame)
     while (ret):
         'Draw trajectories in the image'
         trajectories.drawPath(img, frame)
@@ -64,11 +88,11 @@ def saveVideoResult(videoInName, path, trajectories):
         'Generate image name'
         imageName=imagePath+'%simg%05i.jpg' % (os.sep, frame)
         cv2.imwrite(imageName, img)
-        ret, img=videoIn.read()
         frame+=1
+        ret, img=readFrame(frame)
         if frame%100==0: print('Frame '+str(frame))
     
-    videoIn.release();
+    if videoIn is not None: videoIn.release();
     print('Enhanced video saved on '+path)
     
     
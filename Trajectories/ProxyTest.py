@@ -0,0 +1,117 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check that loading an annotation file with a scale (for instance, with a proxy video) and saving it
+#again does not round the coordinates of the trajectories not edited (see Trajectory.setOriginal),
+#for XML and binary files. Run with: python -m Trajectories.ProxyTest
+
+import os
+import re
+import tempfile
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, PointNode, RectangleNode
+
+rng=numpy.random.default_rng(0)
+
+def fileData(fileName):
+    'Content of the file, without the date'
+    return re.sub(b' date="[^"]*"', b'', open(fileName, 'rb').read())
+
+def value(integer):
+    'Random coordinate, integer or with 3 decimal places (not kept by Trajectory.scaleDigits)'
+    if integer: return int(rng.integers(10, 600))
+    return round(float(rng.uniform(10, 600)), 3)
+
+def randomTrajectory(start, method, rectangle):
+    'Trajectory with a few nodes from the frame given, with integer and decimal coordinates'
+    frames=start+numpy.sort(rng.choice(60, int(rng.integers(2, 8)), replace=False))
+    nodes=[]
+    for f in frames.tolist():
+        integer=rng.random()<0.5
+        pos=coord(value(integer), value(integer))
+        if rectangle: nodes.append(RectangleNode(f, pos, coord(value(integer), value(integer))))
+        else: nodes.append(PointNode(f, pos))
+    trajectory=Trajectory(nodes[0], method)
+    trajectory.setNodes(nodes)
+    return trajectory
+
+def arrays(trajectory):
+    'Node data of the trajectory'
+    return [numpy.array([numpy.nan] if v is None else v) for v in trajectory.getArrays()]
+
+path=tempfile.mkdtemp()
+trajectories=Trajectories()
+for k in range(24):
+    trajectories.addTrajectory(randomTrajectory(20*k, ('LI', 'CS', 'GC', 'NI')[k%4], k%3!=0), 0)
+
+for extension in ('.xml', '.tbin'):
+    for complete in (False, True):
+        originalFile=os.path.join(path, 'original'+extension)
+        proxyFile=os.path.join(path, 'proxy'+extension)
+        trajectories.SaveXMLFile(originalFile, complete)
+        for scale in (0.5, 1.0/3, 0.37):
+            'Without editions, the file saved is the same as the file read'
+            proxy=Trajectories(originalFile, 0, scale)
+            proxy.SaveXMLFile(proxyFile, complete)
+            assert fileData(proxyFile)==fileData(originalFile), 'Coordinates changed by the scale'
+            'Edit some trajectories'
+            IDs=sorted(proxy.trajectories)
+            edited=proxy.trajectories[IDs[0]]
+            edited.addNode(RectangleNode(edited.end+5, coord(50.5, 60.5), coord(20, 30)) if
+                           edited.getArrays()[3] is not None else PointNode(edited.end+5, coord(50.5, 60.5)))
+            proxy.addTrajectory(edited, IDs[0])
+            method=proxy.trajectories[IDs[1]]
+            method.updateInterpolator('LI' if method.InterpolationType()!='LI' else 'CS')
+            moved=proxy.trajectories[IDs[2]]
+            moved.setNodes(list(moved.nodes))
+            proxy.SaveXMLFile(proxyFile, complete)
+            read=Trajectories(proxyFile)
+            original=Trajectories(originalFile)
+            for ID in IDs[3:]:
+                for a, b in zip(arrays(read.trajectories[ID]), arrays(original.trajectories[ID])):
+                    assert numpy.array_equal(a, b, equal_nan=True), 'Coordinates changed by the scale'
+            'Changing the interpolation method does not change the nodes'
+            if not complete:
+                for a, b in zip(arrays(read.trajectories[IDs[1]]), arrays(original.trajectories[IDs[1]])):
+                    assert numpy.array_equal(a, b, equal_nan=True), 'Coordinates changed by the scale'
+            assert read.trajectories[IDs[1]].InterpolationType()==method.InterpolationType()
+            'The trajectories edited are written with the coordinates rounded (in complete files,'
+            'the coordinates of the interpolated frames are also rounded to 1 decimal place)'
+            for ID in IDs[:3]:
+                tolerance=0.06/scale if complete else 0.01
+                a=arrays(read.trajectories[ID])
+                if complete: b=proxy.trajectories[ID].selectRange()[:5]
+                else: b=arrays(proxy.trajectories[ID])
+                assert numpy.array_equal(a[0], b[0])
+                for va, vb in zip(a[1:], b[1:]):
+                    assert numpy.allclose(va, vb/scale, atol=tolerance, equal_nan=True)
+        print(extension+(' complete' if complete else '')+' OK')
@@ -0,0 +1,100 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Proxy videos.
+#A proxy is a copy of a video at a reduced resolution, used to annotate very large videos (as 4K
+#videos), where decoding and drawing the frames at full resolution is slow. The proxy is written
+#along with the video file (same name, adding the scale and proxyExtension), with an intra frame
+#codec (MJPG), so that any frame is decoded without decoding the previous ones.
+#The modification time of the proxy is set to the one of the video file, to detect if the video
+#file changes after building the proxy.
+#The annotations are always stored in the coordinates of the original video (see
+#Trajectories.scale). The proxy of a video can be built with:
+#    python -m Trajectories.ProxyVideo videoFile [scale]
+
+__metaclass__=type
+
+import sys
+import os
+'Opencv'
+import cv2
+
+from .FrameStore import frameSize
+
+'Extension of proxy videos'
+proxyExtension='.avi'
+'Codec of proxy videos'
+proxyCodec='MJPG'
+
+def ProxyFileName(fileName, scale):
+    'Name of the proxy of the video file given, for the given scale'
+    return '%s.proxy%g%s' % (fileName, scale, proxyExtension)
+
+def BuildProxyVideo(fileName, scale):
+    'Write the proxy of the video file given, with its frames resized by the given scale. Return'
+    'the name of the proxy'
+    capture=cv2.VideoCapture(fileName)
+    if not capture.isOpened():
+        raise IOError('Video '+fileName+' not found')
+    fps=capture.get(cv2.CAP_PROP_FPS)
+    size=frameSize(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), scale)
+    'The proxy is written to a temporary file, which replaces the old proxy once it is complete'
+    'NOTE: OpenCV selects the container by the extension of the file'
+    tmpName=ProxyFileName(fileName, scale)+'.tmp'+proxyExtension
+    writer=cv2.VideoWriter(tmpName, cv2.VideoWriter_fourcc(*proxyCodec), fps if fps>0 else 25, size)
+    if not writer.isOpened():
+        capture.release()
+        raise IOError('Proxy video '+tmpName+' can not be written')
+    ret, image=capture.read()
+    while ret:
+        writer.write(cv2.resize(image, size, interpolation=cv2.INTER_AREA))
+        ret, image=capture.read()
+    capture.release()
+    writer.release()
+    os.utime(tmpName, ns=(os.stat(tmpName).st_atime_ns, os.stat(fileName).st_mtime_ns))
+    os.replace(tmpName, ProxyFileName(fileName, scale))
+    return ProxyFileName(fileName, scale)
+
+def OpenProxyVideo(fileName, scale):
+    'Return the name of the proxy of the video file given for the given scale, or None if the proxy'
+    'does not exist, or it does not correspond to the current video file'
+    try:
+        if os.stat(ProxyFileName(fileName, scale)).st_mtime_ns!=os.stat(fileName).st_mtime_ns: return None
+    except (TypeError, OSError):
+        return None
+    return ProxyFileName(fileName, scale)
+
+if __name__=='__main__':
+    try:
+        fileName=sys.argv[1]
+    except IndexError:
+        print('Usage: python -m Trajectories.ProxyVideo videoFile [scale]')
+        sys.exit(1)
+    try: scale=float(sys.argv[2])
+    except IndexError: scale=0.5
+    print('Building proxy video of '+fileName+'. Please, wait...')
+    print('Proxy video written to '+BuildProxyVideo(fileName, scale))
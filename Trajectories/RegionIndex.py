@@ -0,0 +1,180 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Spatio-temporal index of the trajectories, to find the trajectories that pass through an image
+#region during a range of frames.
+
+__metaclass__=type
+
+import math
+import numpy
+
+def boxLimits(x, y, w, h):
+    'Return the limits (x1, y1, x2, y2) of the nodes given as numpy arrays (see'
+    'Trajectory.selectBoxes). Point nodes (NaN size) are boxes of size 0'
+    w=numpy.nan_to_num(w)
+    h=numpy.nan_to_num(h)
+    return x-w/2, y-h/2, x+w/2, y+h/2
+
+class RegionIndex:
+    '''Spatio-temporal index of the trajectories of a trajectory list.
+    Each trajectory is divided into segments of segmentFrames frames (starting at multiples of
+    segmentFrames), and the bounding box of the nodes of each segment (for all the frames, including
+    interpolated nodes) is stored in the cells of a (x, y, t) grid it overlaps. Grid cells are
+    cellSize by cellSize pixels, and one segment long. Thus, a query only checks the trajectories with
+    a segment in the cells of the region and frame range given, and only for the frames of those
+    segments. Segments overlapping more than maxCells cells are stored in a single cell for the whole
+    segment, checked by any query.
+    Trajectories are indexed (or indexed again) in the first query after adding them'''
+
+    'Frames of each segment'
+    segmentFrames=32
+    'Size of the grid cells, in pixels'
+    cellSize=128
+    'Maximum number of cells of a segment'
+    maxCells=256
+
+    def __init__(self):
+        'Trajectories of the index, by ID'
+        self.trajectories={}
+        'Trajectories added since the last query (not indexed yet)'
+        self.pending=set()
+        'Cells of the grid: dictionary (segment, column, row): set of IDs. Segments overlapping too'
+        'many cells are stored in the cell (segment, None, None)'
+        self.cells={}
+        'For each trajectory indexed, numpy arrays with the number and bounding box (x1, y1, x2, y2)'
+        'of its segments, and the list of cells where the trajectory is stored'
+        self.segments={}
+        self.trajectoryCells={}
+        'Limits of the cells used (first and last segment, column and row)'
+        self.limits=None
+
+    def add(self, ID, trajectory):
+        'Add the trajectory to the index. If the ID is already in the index, the trajectory is replaced'
+        self.remove(ID)
+        self.trajectories[ID]=trajectory
+        self.pending.add(ID)
+
+    def remove(self, ID):
+        'Remove the trajectory with the given ID from the index (if it exists)'
+        self.trajectories.pop(ID, None)
+        self.pending.discard(ID)
+        self.segments.pop(ID, None)
+        for key in self.trajectoryCells.pop(ID, []):
+            cell=self.cells[key]
+            cell.discard(ID)
+            if not cell: del self.cells[key]
+
+    def update(self):
+        'Index the trajectories added since the last update'
+        for ID in self.pending:
+            self.insert(ID, self.trajectories[ID])
+        self.pending.clear()
+
+    def insert(self, ID, trajectory):
+        'Compute the segments of the trajectory, and store them in the grid'
+        time, x, y, w, h, nodeType=trajectory.selectBoxes()
+        x1, y1, x2, y2=boxLimits(x, y, w, h)
+        segment=time//self.segmentFrames
+        'Bounding box of each segment'
+        first=numpy.flatnonzero(numpy.diff(segment, prepend=segment[0]-1))
+        segment=segment[first]
+        x1, y1=numpy.minimum.reduceat(x1, first), numpy.minimum.reduceat(y1, first)
+        x2, y2=numpy.maximum.reduceat(x2, first), numpy.maximum.reduceat(y2, first)
+        self.segments[ID]=(segment, x1, y1, x2, y2)
+        keys=[]
+        c=float(self.cellSize)
+        for s, a, b, d, e in zip(segment.tolist(), x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist()):
+            if math.isfinite(a+b+d+e):
+                columns=range(int(math.floor(a/c)), int(math.floor(d/c))+1)
+                rows=range(int(math.floor(b/c)), int(math.floor(e/c))+1)
+            if not math.isfinite(a+b+d+e) or len(columns)*len(rows)>self.maxCells:
+                keys.append((s, None, None))
+                self.extendLimits(s, None, None)
+                continue
+            for column in columns:
+                for row in rows:
+                    keys.append((s, column, row))
+            self.extendLimits(s, columns, rows)
+        for key in keys:
+            self.cells.setdefault(key, set()).add(ID)
+        self.trajectoryCells[ID]=keys
+
+    def extendLimits(self, segment, columns, rows):
+        'Update the limits of the cells used, with the cells given'
+        if self.limits is None: self.limits=[segment, segment, None, None, None, None]
+        self.limits[0]=min(self.limits[0], segment)
+        self.limits[1]=max(self.limits[1], segment)
+        if columns is None: return
+        if self.limits[2] is None: self.limits[2:]=[columns[0], columns[-1], rows[0], rows[-1]]
+        self.limits[2]=min(self.limits[2], columns[0])
+        self.limits[3]=max(self.limits[3], columns[-1])
+        self.limits[4]=min(self.limits[4], rows[0])
+        self.limits[5]=max(self.limits[5], rows[-1])
+
+    def candidates(self, x1, y1, x2, y2, start, end):
+        'Return the IDs of the trajectories with a segment in the grid cells overlapping the region'
+        '(x1, y1)-(x2, y2) and the frames from start to end'
+        self.update()
+        IDs=set()
+        if self.limits is None: return IDs
+        c=float(self.cellSize)
+        segments=range(max(start//self.segmentFrames, self.limits[0]), min(end//self.segmentFrames, self.limits[1])+1)
+        if self.limits[2] is None:
+            columns=rows=range(0)
+        else:
+            columns=range(max(int(math.floor(x1/c)), self.limits[2]), min(int(math.floor(x2/c)), self.limits[3])+1)
+            rows=range(max(int(math.floor(y1/c)), self.limits[4]), min(int(math.floor(y2/c)), self.limits[5])+1)
+        for s in segments:
+            IDs.update(self.cells.get((s, None, None), ()))
+            for column in columns:
+                for row in rows:
+                    IDs.update(self.cells.get((s, column, row), ()))
+        return IDs
+
+    def query(self, x1, y1, x2, y2, start, end):
+        'Return the IDs (sorted) of the trajectories with any node overlapping the region (x1, y1)-(x2,'
+        'y2) (limits included) in any frame from start to end'
+        IDs=[]
+        first=start//self.segmentFrames
+        last=end//self.segmentFrames
+        for ID in sorted(self.candidates(x1, y1, x2, y2, start, end)):
+            'Segments of the trajectory whose bounding box overlaps the region and frames'
+            segment, sx1, sy1, sx2, sy2=self.segments[ID]
+            overlap=(segment>=first)&(segment<=last)&(sx1<=x2)&(sx2>=x1)&(sy1<=y2)&(sy2>=y1)
+            'Check the nodes of those segments'
+            trajectory=self.trajectories[ID]
+            for s in segment[overlap].tolist():
+                a=max(start, trajectory.start, s*self.segmentFrames)
+                b=min(end, trajectory.end, (s+1)*self.segmentFrames-1)
+                if a>b: continue
+                time, x, y, w, h, nodeType=trajectory.selectBoxes(a, b)
+                bx1, by1, bx2, by2=boxLimits(x, y, w, h)
+                if ((bx1<=x2)&(bx2>=x1)&(by1<=y2)&(by2>=y1)).any():
+                    IDs.append(ID)
+                    break
+        return IDs
@@ -0,0 +1,140 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check the region queries of the trajectory list (see Trajectories.regionQuery and RegionIndex)
+#against a brute force search over the nodes of every frame, for random (x, y, t) boxes. The
+#trajectories are edited between queries (after being indexed, or before the first query that
+#indexes them), and also loaded on demand from an annotation file.
+#Run with: python -m Trajectories.RegionQueryTest
+
+from copy import deepcopy
+import os
+import tempfile
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, PointNode, RectangleNode
+from .Trajectory.Interpolator import Interpolator
+
+rng=numpy.random.default_rng(0)
+
+def randomNode(frame, point):
+    'Point or rectangle node, with some nodes bigger than the cells of the index'
+    pos=coord(int(rng.integers(-100, 1000)), int(rng.integers(-100, 800)))
+    if point: return PointNode(frame, pos)
+    size=int(rng.choice([2000, 4000])) if rng.integers(0, 20)==0 else int(rng.integers(1, 300))
+    return RectangleNode(frame, pos, coord(size, int(rng.integers(1, 300))))
+
+def randomTrajectory():
+    'Trajectory with a few nodes, spanning several segments of the index'
+    start=int(rng.integers(0, 2000))
+    frames=start+numpy.sort(rng.choice(300, int(rng.integers(1, 6)), replace=False))
+    point=bool(rng.integers(0, 2))
+    nodes=[randomNode(f, point) for f in frames.tolist()]
+    trajectory=Trajectory(nodes[0], str(rng.choice(sorted(Interpolator.interpolatorMethod))))
+    trajectory.setNodes(nodes)
+    return trajectory
+
+def edit(trajectory):
+    'Add, move or delete a node of the trajectory'
+    operation=rng.integers(0, 3)
+    frame=int(rng.integers(trajectory.start-100, trajectory.end+100))
+    point=not isinstance(trajectory.nodes[0], RectangleNode)
+    if operation==0:
+        trajectory.addNode(randomNode(frame, point))
+    elif operation==1:
+        trajectory.addNode(randomNode(trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time, point))
+    elif len(trajectory.nodes)>1:
+        trajectory.deleteNode(trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time)
+
+def bruteForce(trajectories, x1, y1, x2, y2, start, end):
+    'IDs (sorted) of the trajectories with a node overlapping the region in any frame of the range'
+    IDs=[]
+    for ID, trajectory in sorted(trajectories.trajectories.items()):
+        for frame in range(max(start, trajectory.start), min(end, trajectory.end)+1):
+            p=trajectory.selectNode(frame).getPoints()
+            if p[0].x<=x2 and p[-1].x>=x1 and p[0].y<=y2 and p[-1].y>=y1:
+                IDs.append(ID)
+                break
+    return IDs
+
+def randomQuery():
+    'Random region and range of frames, from a single pixel and frame to the whole video'
+    x1, y1=int(rng.integers(-200, 1000)), int(rng.integers(-200, 800))
+    size=int(rng.choice([0, 10, 200, 2000]))
+    start=int(rng.integers(-50, 2400))
+    return x1, y1, x1+size, y1+int(rng.integers(0, size+1)), start, start+int(rng.choice([0, 5, 60, 3000]))
+
+def check(trajectories, reference, count):
+    'Compare the queries of the trajectory list with the brute force search on the reference list'
+    for k in range(count):
+        query=randomQuery()
+        assert trajectories.regionQuery(*query)==bruteForce(reference, *query), query
+
+trajectories=Trajectories()
+for k in range(60):
+    trajectories.addTrajectory(randomTrajectory(), 0)
+check(trajectories, trajectories, 100)
+for k in range(40):
+    'Edit some trajectories, as done in the GUI: a copy is edited and added with the same ID'
+    for j in range(3):
+        ID=int(rng.choice(sorted(trajectories.trajectories)))
+        trajectory=deepcopy(trajectories.trajectories[ID])
+        edit(trajectory)
+        trajectories.addTrajectory(trajectory, ID)
+    'Edit a trajectory of the list, and add it again'
+    ID=int(rng.choice(sorted(trajectories.trajectories)))
+    trajectory=trajectories.trajectories[ID]
+    edit(trajectory)
+    trajectories.addTrajectory(trajectory, ID)
+    'Add and delete trajectories'
+    trajectories.addTrajectory(randomTrajectory(), 0)
+    trajectories.deleteTrajectory(int(rng.choice(sorted(trajectories.trajectories))))
+    check(trajectories, trajectories, 10)
+print('Edited trajectories OK')
+
+'Trajectories loaded on demand: the reference list has all the trajectories of the file, edited in'
+'the same way'
+fileName=os.path.join(tempfile.mkdtemp(), 'trajectories.xml')
+trajectories.SaveXMLFile(fileName)
+lazy=Trajectories(fileName, 100)
+full=Trajectories(fileName)
+assert len(lazy.trajectories)<len(full.trajectories)
+for k in range(40):
+    check(lazy, full, 5)
+    ID=int(rng.choice(sorted(lazy.trajectories)))
+    trajectory=deepcopy(lazy.trajectories[ID])
+    edit(trajectory)
+    lazy.addTrajectory(trajectory, ID)
+    full.addTrajectory(deepcopy(trajectory), ID)
+    new=randomTrajectory()
+    lazy.addTrajectory(deepcopy(new), 0)
+    full.addTrajectory(new, 0)
+    assert lazy.ID==full.ID
+print('Trajectories loaded on demand OK')
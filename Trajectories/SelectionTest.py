@@ -0,0 +1,93 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check the selection of trajectories (see Trajectories.selectTrajectory) against the linear search
+#used before the spatial index: the nodes of the frame are checked in the order the trajectories
+#were added (an edited trajectory, added again, goes to the end) and the first one selected wins.
+#Run with: python -m Trajectories.SelectionTest
+
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Node import coord, PointNode, RectangleNode
+from .Trajectory.Interpolator import Interpolator
+
+rng=numpy.random.default_rng(0)
+
+def randomTrajectory():
+    'Point or rectangle trajectory in a small image, so that many nodes overlap'
+    start=int(rng.integers(0, 200))
+    frames=start+numpy.sort(rng.choice(100, int(rng.integers(1, 6)), replace=False))
+    if rng.integers(0, 2):
+        nodes=[PointNode(f, coord(int(rng.integers(0, 60)), int(rng.integers(0, 60)))) for f in frames.tolist()]
+    else:
+        nodes=[RectangleNode(f, coord(int(rng.integers(0, 60)), int(rng.integers(0, 60))),
+                             coord(int(rng.integers(1, 40)), int(rng.integers(1, 40)))) for f in frames.tolist()]
+    trajectory=Trajectory(nodes[0], str(rng.choice(sorted(Interpolator.interpolatorMethod))))
+    trajectory.setNodes(nodes)
+    return trajectory
+
+def linearSearch(trajectories, order, frame, x, y):
+    'Old selection: first trajectory, in the order they were added, with a node including the point'
+    for ID in order:
+        trajectory=trajectories.trajectories[ID]
+        if trajectory.start<=frame<=trajectory.end and trajectory.selectNode(frame).selectNode(x, y):
+            return ID
+    return 0
+
+trajectories=Trajectories()
+'IDs in the order the trajectories were added'
+order=[]
+for k in range(300):
+    operation=rng.integers(0, 4)
+    if operation<2 or not order:
+        trajectories.addTrajectory(randomTrajectory(), 0)
+        order.append(trajectories.ID)
+    elif operation==2:
+        'Edit a trajectory: it is added again with the same ID'
+        ID=order.pop(int(rng.integers(0, len(order))))
+        trajectory=trajectories.trajectories[ID]
+        trajectory.addNode(RectangleNode(trajectory.end+int(rng.integers(1, 20)),
+                                         coord(int(rng.integers(0, 60)), int(rng.integers(0, 60))), coord(30, 30)))
+        trajectories.addTrajectory(trajectory, ID)
+        order.append(ID)
+    else:
+        ID=order.pop(int(rng.integers(0, len(order))))
+        trajectories.deleteTrajectory(ID)
+    if k%10==0:
+        for j in range(50):
+            frame=int(rng.integers(0, 320))
+            x, y=float(rng.uniform(-5, 100)), float(rng.uniform(-5, 100))
+            ID=linearSearch(trajectories, order, frame, x, y)
+            trajectory, selected=trajectories.selectTrajectory(frame, x, y)
+            assert selected==ID, (frame, x, y, selected, ID)
+            'The selection of a node never depends on the distance to other nodes'
+            if ID: assert trajectories.selectTrajectory(frame, x, y, 20)[1]==ID
+            if ID: assert trajectory.start==trajectories.trajectories[ID].start
+print('Selection OK')
@@ -0,0 +1,66 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the settings read by the program (see Settings.ReadSetting): the values of the settings file
+#distributed with the program, and the default values used when an element or attribute does not
+#exist, or its value is not valid.
+#Run with: python -m Trajectories.SettingsTest
+
+import os
+from xml.etree import ElementTree
+
+from .Settings import ReadSetting
+from .Trajectory.Interpolator import Interpolator
+
+'Settings file distributed with the program'
+settings=ElementTree.parse(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'settings.xml'))
+
+def checkSetting(tag, attribute, convert, default, expected):
+    'Check the value of the setting in the settings file, and the default values'
+    value=ReadSetting(settings, tag, attribute, convert, default)
+    assert value==expected and type(value) is type(expected), (tag, attribute, value)
+    'Element or attribute missing'
+    for text in ('<VideoAnnotation />', '<VideoAnnotation><'+tag+' /></VideoAnnotation>'):
+        assert ReadSetting(ElementTree.fromstring(text), tag, attribute, convert, default)==default, text
+    'Value not valid (any text is valid for text settings)'
+    if convert is not str:
+        for invalid in ('', 'x1'):
+            text='<VideoAnnotation><'+tag+' '+attribute+'="'+invalid+'" /></VideoAnnotation>'
+            assert ReadSetting(ElementTree.fromstring(text), tag, attribute, convert, default)==default, text
+    print(tag+' '+attribute+': '+str(expected)+' OK')
+
+checkSetting('storage', 'type', str, None, 'list')
+'Optional attribute, not in the settings file: single spline'
+checkSetting('interpolation', 'window', int, Interpolator.windowNodes, 0)
+checkSetting('cache', 'size', float, None, 64.0)
+checkSetting('loading', 'window', int, 0, 0)
+checkSetting('frames', 'cache', float, 256, 256.0)
+checkSetting('frames', 'prefetch', int, 30, 30)
+checkSetting('store', 'scale', float, 0, 0.0)
+checkSetting('proxy', 'scale', float, 1.0, 1.0)
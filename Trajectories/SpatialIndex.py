@@ -0,0 +1,106 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Spatial index of the nodes of the trajectories in a frame.
+
+__metaclass__=type
+
+import math
+import numpy
+
+class FrameGrid:
+    '''Uniform grid with the nodes of the trajectories in a frame, for fast selection of the node at a
+    given point. Each cell of the grid stores the nodes that overlap the cell, so that only the nodes
+    of the cell including the point must be checked. Nodes overlapping too many cells are stored apart,
+    and always checked'''
+
+    'Size of the grid cells, in pixels'
+    cellSize=64
+    'Maximum number of cells of a node (larger nodes are always checked)'
+    maxCells=64
+    'Selection margin around point nodes (see PointNode.selectNode)'
+    pointMargin=4
+
+    def __init__(self, ID, x, y, w, h):
+        'Build the grid for the nodes given as numpy arrays (see Trajectories.boxesAt)'
+        self.ID=ID
+        'Point nodes are selected inside a margin around the point, excluding the margin limits.'
+        'Rectangles are selected inside the rectangle, including its limits'
+        self.point=numpy.isnan(w)
+        w=numpy.where(self.point, 2*self.pointMargin, w)
+        h=numpy.where(self.point, 2*self.pointMargin, h)
+        'Node limits, computed as in RectangleNode.getPoints'
+        self.x1=x-w/2
+        self.x2=x+w/2
+        self.y1=y-h/2
+        self.y2=y+h/2
+        'Cells of the grid: dictionary (column, row): list of node indexes'
+        self.cells={}
+        'Nodes overlapping more than maxCells cells'
+        self.large=[]
+        c=float(self.cellSize)
+        for i, (x1, x2, y1, y2) in enumerate(zip(self.x1.tolist(), self.x2.tolist(), self.y1.tolist(), self.y2.tolist())):
+            if not (math.isfinite(x1) and math.isfinite(x2) and math.isfinite(y1) and math.isfinite(y2)):
+                self.large.append(i)
+                continue
+            columns=range(int(math.floor(x1/c)), int(math.floor(x2/c))+1)
+            rows=range(int(math.floor(y1/c)), int(math.floor(y2/c))+1)
+            if len(columns)*len(rows)>self.maxCells:
+                self.large.append(i)
+                continue
+            for column in columns:
+                for row in rows:
+                    self.cells.setdefault((column, row), []).append(i)
+
+    def __len__(self):
+        return len(self.ID)
+
+    def contains(self, i, x, y):
+        'Check whether the point (x, y) belongs to node i (see Node.selectNode)'
+        if self.point[i]:
+            return self.x1[i]<x<self.x2[i] and self.y1[i]<y<self.y2[i]
+        return self.x1[i]<=x<=self.x2[i] and self.y1[i]<=y<=self.y2[i]
+
+    def select(self, x, y):
+        'Return the index of the first node (in the order given) including the point (x, y), or None'
+        'if the point does not belong to any node'
+        c=float(self.cellSize)
+        candidates=self.cells.get((int(math.floor(x/c)), int(math.floor(y/c))), [])
+        for i in sorted(candidates+self.large):
+            if self.contains(i, x, y): return i
+        return None
+
+    def nearest(self, x, y, maxDistance=numpy.inf):
+        'Return the index of the node closest to the point (x, y), or None if there are no nodes closer'
+        'than maxDistance. The distance is measured to the limits of the node (0 inside the node)'
+        if len(self.ID)==0: return None
+        dx=numpy.maximum(numpy.maximum(self.x1-x, x-self.x2), 0)
+        dy=numpy.maximum(numpy.maximum(self.y1-y, y-self.y2), 0)
+        distance=numpy.hypot(dx, dy)
+        i=int(numpy.nanargmin(distance)) if not numpy.isnan(distance).all() else None
+        if i is None or distance[i]>maxDistance: return None
+        return i
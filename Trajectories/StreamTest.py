@@ -0,0 +1,119 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the annotation files read while they are parsed (see IterXMLTrajectories): the trajectories
+#must be the same as reading the whole XML tree first (as done before), also for elements that are
+#not trajectories, trajectories without ID or interpolation type, and nested elements with the same
+#tag. The trajectories already read are removed from the XML tree.
+#Run with: python -m Trajectories.StreamTest
+
+import io
+import os
+import tempfile
+import numpy
+from xml.etree import ElementTree
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory, IterXMLTrajectories, CreateTrajectoryFromXML
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import coord, PointNode, RectangleNode
+from .Trajectory.Exceptions import TrajectoryException
+
+rng=numpy.random.default_rng(0)
+methods=sorted(Interpolator.interpolatorMethod)
+
+def nodesXML(count, rectangle):
+    'XML text of the nodes of a random trajectory'
+    frames=numpy.sort(rng.choice(500, count, replace=False)).tolist()
+    text=''
+    for f in frames:
+        pos=coord(int(rng.integers(0, 640)), float(rng.integers(0, 480))+0.5)
+        node=RectangleNode(f, pos, coord(int(rng.integers(5, 100)), 20)) if rectangle else PointNode(f, pos)
+        text+=node.XMLText('Node')
+    return '<TrajectoryNodes>'+text+'</TrajectoryNodes>'
+
+def randomFile(count):
+    'XML text of an annotation file, with some elements that must be ignored'
+    text='<?xml version="1.0"?><VideoAnnotation date="now"><Comment>Not a trajectory</Comment>'
+    for ID in range(1, count+1):
+        nodes=nodesXML(int(rng.integers(1, 8)), ID%2==0)
+        kind=rng.integers(0, 8)
+        if kind==0: text+='<Trajectory Interpolation="LI">'+nodes+'</Trajectory>'
+        elif kind==1: text+='<Trajectory ID="'+str(ID)+'">'+nodes+'</Trajectory>'
+        elif kind==2: text+='<Group><Trajectory ID="'+str(ID)+'" Interpolation="LI">'+nodes+'</Trajectory></Group>'
+        else: text+='<Trajectory ID="'+str(ID)+'" Interpolation="'+methods[ID%len(methods)]+'">'+nodes+'</Trajectory>'
+    return text+'</VideoAnnotation>'
+
+def treeTrajectories(fileName):
+    'Trajectories read from the whole XML tree: (ID, interpolation type, nodes)'
+    result={}
+    for element in ElementTree.parse(fileName).getroot().findall('Trajectory'):
+        if not 'ID' in element.attrib: continue
+        trajectory=CreateTrajectoryFromXML(element.find('TrajectoryNodes'), element.attrib.get('Interpolation'))
+        result[int(element.attrib['ID'])]=(trajectory.InterpolationType(), [n.XMLText('Node') for n in trajectory.nodes])
+    return result
+
+class Events:
+    'iterparse events, keeping the root element, to check the size of the tree while it is parsed'
+    def __init__(self, fileName):
+        self.events=ElementTree.iterparse(fileName, ('start', 'end'))
+        self.root=None
+    def __iter__(self):
+        for event, element in self.events:
+            if self.root is None: self.root=element
+            yield event, element
+
+path=tempfile.mkdtemp()
+fileName=os.path.join(path, 'annotation.xml')
+for count in (0, 1, 50):
+    open(fileName, 'w').write(randomFile(count))
+    expected=treeTrajectories(fileName)
+    trajectories=Trajectories(fileName)
+    result={ID: (tr.InterpolationType(), [n.XMLText('Node') for n in tr.nodes]) for ID, tr in trajectories.trajectories.items()}
+    assert result==expected
+    assert trajectories.ID==max(expected, default=0)
+    'The trajectories already read are removed from the tree. NOTE: The parser reads the file in'
+    'blocks, so the tree can also have the elements of the rest of the block'
+    'The elements read are kept (by id), so that their ids are not reused by new elements'
+    events=Events(fileName)
+    read={}
+    for element in IterXMLTrajectories(events):
+        assert not any(id(e) in read for e in events.root), 'Trajectories kept in the tree'
+        read[id(element)]=element
+    assert len(read)==len([e for e in ElementTree.parse(fileName).getroot() if e.tag=='Trajectory'])
+    print('Trajectories: '+str(count)+' OK')
+
+'Empty annotation and incorrect files'
+open(fileName, 'w').write('<?xml version="1.0"?><VideoAnnotation />')
+assert len(Trajectories(fileName).trajectories)==0
+open(fileName, 'w').write(randomFile(5)[:-30])
+try: Trajectories(fileName)
+except TrajectoryException: pass
+else: raise AssertionError('Incorrect file accepted')
+print('Incorrect files OK')
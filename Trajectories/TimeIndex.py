@@ -0,0 +1,163 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Index of the time intervals where the trajectories exist.
+
+__metaclass__=type
+
+import random
+
+from .Occupancy import Occupancy
+
+'Random generator of the priorities of the tree nodes. It is not the global generator of the random'
+'module, so that adding trajectories does not change the random numbers of the application'
+priorities=random.Random(0)
+
+class IntervalNode:
+    'Node of the interval tree: time interval of a trajectory'
+    __slots__=('start', 'end', 'ID', 'key', 'maxEnd', 'priority', 'left', 'right')
+
+    def __init__(self, start, end, ID):
+        self.start=start
+        self.end=end
+        self.ID=ID
+        'Nodes are sorted by start frame (and ID, for trajectories starting in the same frame)'
+        self.key=(start, ID)
+        'Maximum end frame of the subtree of this node'
+        self.maxEnd=end
+        self.priority=priorities.random()
+        self.left=None
+        self.right=None
+
+    def update(self):
+        'Update the maximum end frame of the subtree, after changing the children of the node'
+        maxEnd=self.end
+        if self.left is not None and self.left.maxEnd>maxEnd: maxEnd=self.left.maxEnd
+        if self.right is not None and self.right.maxEnd>maxEnd: maxEnd=self.right.maxEnd
+        self.maxEnd=maxEnd
+
+def splitTree(node, key):
+    'Split the tree given into two trees, with the nodes whose key is lower than key, and the rest'
+    if node is None: return None, None
+    if node.key<key:
+        node.right, right=splitTree(node.right, key)
+        node.update()
+        return node, right
+    else:
+        left, node.left=splitTree(node.left, key)
+        node.update()
+        return left, node
+
+def mergeTree(left, right):
+    'Merge two trees, where all the keys of left are lower than the keys of right'
+    if left is None: return right
+    if right is None: return left
+    if left.priority>right.priority:
+        left.right=mergeTree(left.right, right)
+        left.update()
+        return left
+    else:
+        right.left=mergeTree(left, right.left)
+        right.update()
+        return right
+
+def removeNode(node, key):
+    'Remove the node with the given key from the tree'
+    if node.key==key: return mergeTree(node.left, node.right)
+    if key<node.key: node.left=removeNode(node.left, key)
+    else: node.right=removeNode(node.right, key)
+    node.update()
+    return node
+
+class TimeIndex:
+    '''Index of the time intervals (from start to end frame) where the trajectories of a trajectory
+    list exist, for fast access to the trajectories that exist in a given frame or range of frames.
+    The intervals are stored in an interval tree: a treap (randomized binary search tree) sorted by
+    start frame, where each node also stores the maximum end frame of its subtree. Adding or removing
+    a trajectory takes O(log n) expected time. Finding the k trajectories that exist in a range of
+    frames skips the subtrees whose maximum end frame is before the range, and stops at the first
+    trajectory starting after the range, which takes O((k+1) log n) expected time, regardless of the
+    length of the trajectories'''
+
+    def __init__(self):
+        'Root of the interval tree'
+        self.root=None
+        'Time interval (start, end) of each trajectory, by ID'
+        self.intervals={}
+        'Number of trajectories in each frame'
+        self.occupancy=Occupancy()
+
+    def __str__(self):
+        return str(dict(sorted(self.intervals.items(), key=lambda i: (i[1], i[0]))))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __contains__(self, ID):
+        return ID in self.intervals
+
+    def add(self, ID, start, end):
+        'Add the time interval of the trajectory with the given ID. If the trajectory is already in'
+        'the index, its time interval is updated'
+        if ID in self.intervals: self.remove(ID)
+        self.intervals[ID]=(start, end)
+        self.occupancy.add(start, end)
+        node=IntervalNode(start, end, ID)
+        left, right=splitTree(self.root, node.key)
+        self.root=mergeTree(mergeTree(left, node), right)
+
+    def remove(self, ID):
+        'Remove the trajectory with the given ID from the index'
+        'If the trajectory is not in the index, a KeyError exception is raised'
+        start, end=self.intervals.pop(ID)
+        self.occupancy.remove(start, end)
+        self.root=removeNode(self.root, (start, ID))
+
+    def overlap(self, start, end):
+        'Return the IDs of the trajectories that exist in any frame from start to end, sorted by'
+        'their start frame'
+        IDs=[]
+        'In order traversal of the tree, skipping the subtrees that end before start, and finishing'
+        'at the first node that begins after end'
+        stack=[]
+        node=self.root
+        while stack or node is not None:
+            if node is not None:
+                if node.maxEnd<start: node=None
+                else:
+                    stack.append(node)
+                    node=node.left
+                continue
+            node=stack.pop()
+            if node.start>end: break
+            if node.end>=start: IDs.append(node.ID)
+            node=node.right
+        return IDs
+
+    def at(self, frame):
+        'Return the IDs of the trajectories that exist in the given frame'
+        return self.overlap(frame, frame)
@@ -0,0 +1,82 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check the queries of the time index (see TimeIndex) against a brute force search over the time
+#intervals, after adding, updating and removing random intervals.
+#Run with: python -m Trajectories.TimeIndexTest
+
+import random
+import numpy
+
+from .TimeIndex import TimeIndex
+
+def bruteForce(intervals, start, end):
+    'IDs of the intervals overlapping the range from start to end, sorted by start frame and ID'
+    return [ID for (s, ID), e in sorted(((s, ID), e) for ID, (s, e) in intervals.items()) if s<=end and e>=start]
+
+random.seed(0)
+rng=numpy.random.default_rng(0)
+for count, length in ((1, 10), (50, 20), (500, 1000), (2000, 50)):
+    index=TimeIndex()
+    intervals={}
+    for k in range(3*count):
+        operation=rng.integers(0, 3)
+        ID=int(rng.integers(1, count+1))
+        if operation<2:
+            'Add or update an interval (with repeated start frames)'
+            start=int(rng.integers(0, 5000))//3*3
+            end=start+int(rng.integers(0, length))
+            index.add(ID, start, end)
+            intervals[ID]=(start, end)
+        elif ID in intervals:
+            index.remove(ID)
+            del intervals[ID]
+        if k%20==0 or k==3*count-1:
+            assert len(index)==len(intervals)
+            for j in range(20):
+                start=int(rng.integers(-100, 5200))
+                end=start+int(rng.integers(0, 300))
+                assert index.overlap(start, end)==bruteForce(intervals, start, end)
+                assert index.at(start)==bruteForce(intervals, start, start)
+            'Number of intervals in each frame'
+            counts=index.occupancy.counts(0, 6100)
+            reference=numpy.zeros(6101, int)
+            for s, e in intervals.values(): reference[s:e+1]+=1
+            assert numpy.array_equal(counts, reference)
+    print('Intervals: '+str(count)+' OK')
+
+'Adding intervals must not change the numbers of the global random generator'
+random.seed(1)
+reference=[random.random() for k in range(10)]
+random.seed(1)
+index=TimeIndex()
+values=[]
+for k in range(10):
+    index.add(k+1, k, k+10)
+    values.append(random.random())
+assert values==reference
+print('Random generator OK')
@@ -31,72 +31,176 @@ This file is part of the TrATVid Software
 from copy import deepcopy
 'XML support'
 from xml.etree import ElementTree
-from xml.etree.ElementTree import Element
-from xml.etree.ElementTree import SubElement
 import time
+import os
+import numpy
 
-from .Trajectory.Trajectory import CreateTrajectoryFromXML
+from .Trajectory.Trajectory import CreateTrajectoryFromXML, IterXMLTrajectories
 from .Trajectory.Exceptions import TrajectoryException
+from .Trajectory.Node import XMLEscape, NodeType, CreateNodeFromValues
+from .BinaryFile import IsBinaryFile, ReadBinaryFile, WriteBinaryFile
+from .IndexFile import ReadIndexFile, WriteIndexFile, entryType
+from .TimeIndex import TimeIndex
+from .Occupancy import Occupancy, frameRuns
+from .SpatialIndex import FrameGrid
+from .RegionIndex import RegionIndex
 
 __metaclass__=type
 
+def boxesColumns(boxes):
+    'Return the numpy arrays (frame, ID, x, y, w, h, nodeType) for the list of tuples (ID, frame, x,'
+    'y, w, h, nodeType) given (see Trajectories.boxesInRange)'
+    ID, frame, x, y, w, h, nodeType=zip(*boxes) if boxes else ((),)*7
+    return numpy.array(frame, int), numpy.array(ID, int), numpy.array(x, float), numpy.array(y, float), \
+        numpy.array(w, float), numpy.array(h, float), numpy.array(nodeType, numpy.int8)
+
 class Trajectories:
     '''
     List of trajectories.
     '''
-    def __init__(self, XMLFile=None):
+
+    'Number of frames whose spatial index is kept (see spatialIndex)'
+    maxFrameGrids=16
+
+    def __init__(self, XMLFile=None, loadWindow=0, scale=1.0):
+        '''If loadWindow>0, the trajectories of the XML file are loaded on demand: only the trajectories
+        close to the current frame (see loadFrame) are loaded, if the XML file has a valid index file.
+        Otherwise, all the trajectories are loaded.
+        scale is the scale of the trajectory coordinates with respect to the coordinates of the file
+        (for instance, when annotating a proxy of the video, see ProxyVideo): coordinates are
+        multiplied by scale when read, and divided by scale when written (see SaveXMLFile)'''
 
         'List of trajectories'
         self.trajectories={}
-        'Dictionary for fast access to trajectories, according to the trajectory starting and ending frame'
-        'This dictionary store the time intervals where a trajectory exists. Thus, if we need to access all'
-        'the trajectories that exist on a given time, we only have to check those included in the dictionary'
-        'for the time interval given'
-        self.timeIndex={}
-        'Time interval length. For instance, a time interval of 3, means that the first key in the timeIndex'
-        'dictionary includes time=0, 1 and 2. The second key will include time=3, 4 and 5, and so no'
+        'Index for fast access to trajectories, according to the trajectory starting and ending frame'
+        'If we need to access all the trajectories that exist on a given time, we only have to check'
+        'the trajectories given by the index (see TimeIndex)'
+        self.timeIndex=TimeIndex()
+        'Time interval length of computeIndex (the time index is not divided into time intervals any'
+        'more, but computeIndex is kept for compatibility)'
         self.timeInterval=11
+        'Spatial index of the nodes of the last frames used for selection, by frame (see spatialIndex)'
+        self.frameGrids={}
+        'Registration number of each trajectory, by ID: trajectories added (or added again, after'
+        'editing them) later get higher numbers. When the selected point belongs to several nodes,'
+        'the trajectory registered first is selected (see selectTrajectory)'
+        self.registration={}
+        self.registrations=0
+        'Spatio-temporal index of the trajectories, for region queries (see regionQuery)'
+        self.regionIndex=RegionIndex()
         'Auxiliary variable to assign a unique ID to each trajectory'
         self.ID=0
+        'Trajectories of the XML file not loaded yet (see loadRange). Only when the trajectories are'
+        'loaded on demand (loadWindow>0), and the XML file has a valid index file (see IndexFile)'
+        self.XMLFile=XMLFile
+        self.pending=None
+        'Frames around the current one whose trajectories are loaded (see loadFrame)'
+        self.loadWindow=loadWindow
+        'Range of frames whose trajectories are already loaded'
+        self.loadedRange=None
+        'Number of trajectories not loaded yet in each frame (see occupancy)'
+        self.pendingOccupancy=Occupancy()
+        'Scale of the coordinates with respect to the annotation file'
+        self.scale=scale
+        if IsBinaryFile(XMLFile):
+            'Binary annotation file (see BinaryFile)'
+            try:
+                for ID, trajectory in ReadBinaryFile(XMLFile, scale):
+                    self.addTrajectory(trajectory, ID)
+                    if ID>self.ID: self.ID=ID
+            except IOError:
+                'If the file does not exist, finish the routine'
+                pass
+            return
+        if loadWindow>0:
+            self.pending=ReadIndexFile(XMLFile)
+            if self.pending is not None:
+                self.pendingOccupancy.add(self.pending['start'], self.pending['end'])
+                'Get the last ID used in the file, to have a unique ID for new trajectories'
+                self.ID=int(self.pending['ID'].max(initial=0))
+                self.loadFrame(0)
+                return
         try:
-            'Read data structure from XML file'
-            XMLElement=ElementTree.parse(XMLFile)
+            'Open the XML file. The file is parsed while reading the trajectories'
+            XMLEvents=ElementTree.iterparse(XMLFile, ('start', 'end'))
         except (TypeError, IOError):
             'If the file does not exist, finish the routine' 
             pass
-        except ElementTree.ParseError:
-            raise TrajectoryException('XML file '+XMLFile+' is incorrect')
         else:
             try:
-                'If the XML file is correct, read the trajectories'
-                for XMLTrajectories in XMLElement.findall('Trajectory'):
-                    'Read each trajectory on the XML file'
-                    'Read trajectory ID'
-                    try: 
-                        ID=int(XMLTrajectories.attrib['ID'])
-                    except KeyError:
-                        'If the trajectory does not have ID tag, ignore this trajectory' 
-                        continue
-                    try:
-                        'Read interpolation type for the trajectory'
-                        interType=XMLTrajectories.attrib['Interpolation']
-                    except KeyError:
-                        'If the trajectory does not have interpolation type, give'
-                        'the default interpolation type (old files)'
-                        interType=None
-                    'Read trajectory nodes'
-                    XMLTrajectory=XMLTrajectories.find('TrajectoryNodes')
-                    trajectory=CreateTrajectoryFromXML(XMLTrajectory, interType)                    
-                    'Add the trajectory (updating timeIndex)'
-                    self.addTrajectory(trajectory, ID)
-                    'Get the last ID used in the file, to have a unique ID for new trajectories'
-                    if ID>self.ID: self.ID=ID
+                'Read each trajectory on the XML file, as soon as it is parsed'
+                for XMLTrajectories in IterXMLTrajectories(XMLEvents):
+                    self.addXMLTrajectory(XMLTrajectories)
+            except ElementTree.ParseError:
+                raise TrajectoryException('XML file '+XMLFile+' is incorrect')
             except AttributeError:
                 raise TrajectoryException('XML file '+XMLFile+' is incorrect')
             except UnboundLocalError:
                 pass
-        XMLElement=None
-        
+
+    def addXMLTrajectory(self, XMLTrajectories):
+        'Create the trajectory given by a Trajectory element of the XML file, and add it to the list'
+        'Read trajectory ID'
+        try: 
+            ID=int(XMLTrajectories.attrib['ID'])
+        except KeyError:
+            'If the trajectory does not have ID tag, ignore this trajectory' 
+            return
+        try:
+            'Read interpolation type for the trajectory'
+            interType=XMLTrajectories.attrib['Interpolation']
+        except KeyError:
+            'If the trajectory does not have interpolation type, give'
+            'the default interpolation type (old files)'
+            interType=None
+        'Read trajectory nodes'
+        XMLTrajectory=XMLTrajectories.find('TrajectoryNodes')
+        trajectory=CreateTrajectoryFromXML(XMLTrajectory, interType, self.scale)                    
+        'Add the trajectory (updating timeIndex)'
+        self.addTrajectory(trajectory, ID)
+        'Get the last ID used in the file, to have a unique ID for new trajectories'
+        if ID>self.ID: self.ID=ID
+
+    def loadRange(self, start, end):
+        'Load the trajectories of the XML file not loaded yet, that exist between the start and end'
+        'frames. Each trajectory is read from its position in the XML file, given by the index file'
+        if self.pending is None: return
+        if self.loadedRange is None or start>self.loadedRange[1]+1 or end<self.loadedRange[0]-1:
+            self.loadedRange=(start, end)
+        else:
+            self.loadedRange=(min(start, self.loadedRange[0]), max(end, self.loadedRange[1]))
+        inRange=(self.pending['start']<=end)&(self.pending['end']>=start)
+        if not inRange.any(): return
+        entries=self.pending[inRange]
+        self.pending=self.pending[~inRange]
+        self.pendingOccupancy.remove(entries['start'], entries['end'])
+        f=open(self.XMLFile, 'rb')
+        try:
+            for entry in entries:
+                f.seek(int(entry['offset']))
+                self.addXMLTrajectory(ElementTree.fromstring(f.read(int(entry['length']))))
+        except (ElementTree.ParseError, AttributeError):
+            raise TrajectoryException('XML file '+self.XMLFile+' is incorrect')
+        finally:
+            f.close()
+
+    def loadFrame(self, frame):
+        'Load the trajectories not loaded yet that exist in the frames around the given one (from'
+        'frame-loadWindow to frame+loadWindow). This function must be called before accessing the'
+        'trajectories of a frame (see drawNode, drawPath and selectTrajectory)'
+        if self.pending is None: return
+        start=frame-self.loadWindow
+        end=frame+self.loadWindow
+        if self.loadedRange is None or start<self.loadedRange[0] or end>self.loadedRange[1]:
+            self.loadRange(start, end)
+
+    def loadAll(self):
+        'Load all the trajectories of the XML file not loaded yet'
+        if self.pending is None: return
+        if len(self.pending)>0:
+            self.loadRange(int(self.pending['start'].min()), int(self.pending['end'].max()))
+        self.pending=None
+
     def __str__(self):
         s=''
         for ID, tr in self.trajectories.items():
@@ -105,35 +209,96 @@ class Trajectories:
 
     def SaveXMLFile(self, XMLFile, complete=False):
         'Write data to a XML file'
-        'Create the XML element'
-        XMLElement=Element('VideoAnnotation', date=repr(time.asctime()))
-        'Include data for all the trajectories'
+        'The XML text is written directly to the file, trajectory by trajectory, instead of building'
+        'the XML tree. The result is the same as writing the tree with ElementTree.tostring'
+        '(us-ascii encoding, with character references for other characters)'
+        'The index file of the XML file is also written (see IndexFile)'
+        if IsBinaryFile(XMLFile) or complete:
+            'All the trajectories are needed'
+            self.loadAll()
+        if IsBinaryFile(XMLFile):
+            'Binary annotation file (see BinaryFile)'
+            WriteBinaryFile(XMLFile, sorted(self.trajectories.items(), key=lambda tr: (tr[1],tr[0])), complete, 1.0/self.scale)
+            return
+        'Node coordinates are written in the scale of the file (see scale)'
+        'Trajectories not loaded yet are copied from the original XML file, as they are. If the'
+        'original XML file is overwritten, the data is written to a temporary file, which replaces'
+        'the original file at the end'
+        pending=self.pending if self.pending is not None else numpy.zeros(0, entryType)
+        replace=len(pending)>0 and os.path.exists(XMLFile) and os.path.samefile(XMLFile, self.XMLFile)
+        f=open(XMLFile+'.tmp' if replace else XMLFile, 'w', encoding='us-ascii', errors='xmlcharrefreplace', newline='')
+        f.write('<?xml version="1.0"?>')
+        f.write('<VideoAnnotation date="'+XMLEscape(repr(time.asctime()))+'"')
         'Sort trajectories before save it'
-        'NOTE: sorting criteria is defined in the rich comparison method of trajectory class'
-        #for ID, tr in sorted(self.trajectories.items(), key=lambda k,v: (v,k)):
-        for ID, tr in sorted(self.trajectories.items(), key=lambda tr: (tr[1],tr[0])):
-            intertype=tr.InterpolationType()
-            e=SubElement(XMLElement, 'Trajectory', ID=str(ID), Interpolation=intertype)
-            tr.XMLData(e, 'TrajectoryNodes', complete)
-        'Write data to file'
-        XMLFile = open(XMLFile, 'wb')
-        XMLFile.write(b'<?xml version="1.0"?>')
-        XMLFile.write(ElementTree.tostring(XMLElement))
-        XMLFile.close()       
+        'NOTE: sorting criteria is the same as in the rich comparison method of trajectory class'
+        items=[(tr.start, ID, tr, None) for ID, tr in self.trajectories.items()]
+        items+=[(int(entry['start']), int(entry['ID']), None, entry) for entry in pending]
+        items.sort(key=lambda item: item[:2])
+        table=numpy.zeros(len(items), entryType)
+        if not items:
+            'Empty element'
+            f.write(' />')
+        else:
+            f.write('>')
+            'Include data for all the trajectories'
+            source=open(self.XMLFile, 'rb') if len(pending)>0 else None
+            for i, (start, ID, tr, entry) in enumerate(items):
+                offset=f.tell()
+                if tr is None:
+                    source.seek(int(entry['offset']))
+                    f.write(source.read(int(entry['length'])).decode('utf-8'))
+                    end=int(entry['end'])
+                else:
+                    intertype=tr.InterpolationType()
+                    f.write('<Trajectory ID="'+XMLEscape(str(ID))+'" Interpolation="'+XMLEscape(intertype)+'">')
+                    tr.XMLWrite(f, 'TrajectoryNodes', complete, 1.0/self.scale)
+                    f.write('</Trajectory>')
+                    end=tr.end
+                table[i]=(ID, start, end, offset, f.tell()-offset)
+            if source is not None: source.close()
+            f.write('</VideoAnnotation>')
+        f.close()
+        if replace:
+            os.replace(XMLFile+'.tmp', XMLFile)
+            'Trajectories not loaded yet are now in the new file'
+            self.pending=table[[item[2] is None for item in items]]
+        WriteIndexFile(XMLFile, table)
+        
+    def occupancy(self, start=None, end=None):
+        'Return the number of trajectories that exist in each frame from start to end, as numpy arrays'
+        '(frames, counts). If not given, start and end are the first and last frames where any'
+        'trajectory exists. The trajectories not loaded yet are also counted'
+        if start is None or end is None:
+            extents=[e for e in (self.timeIndex.occupancy.extent(), self.pendingOccupancy.extent()) if e is not None]
+            if start is None: start=min([e[0] for e in extents], default=0)
+            if end is None: end=max([e[1] for e in extents], default=-1)
+        counts=self.timeIndex.occupancy.counts(start, end)+self.pendingOccupancy.counts(start, end)
+        return numpy.arange(start, start+len(counts)), counts
+
+    def maxConcurrency(self, start=None, end=None):
+        'Return the maximum number of trajectories that exist at the same time in the frames from start'
+        'to end (see occupancy), and the list of frame intervals (first, last) where it happens'
+        frames, counts=self.occupancy(start, end)
+        if len(counts)==0: return 0, []
+        maximum=int(counts.max())
+        return maximum, frameRuns(frames, counts==maximum)
+
+    def idleGaps(self, start=None, end=None, minLength=1):
+        'Return the list of frame intervals (first, last) without any trajectory in the frames from'
+        'start to end (see occupancy), with at least minLength frames'
+        frames, counts=self.occupancy(start, end)
+        return [(a, b) for a, b in frameRuns(frames, counts==0) if b-a+1>=minLength]
         
     def computeIndex(self, start, end=None):
-        'Return the list of indexes for the trajectory dictionary, according to the start and end frame'
-        'This function is intended to be passed to the trajectory for self computation of their'
-        'trajectory dictionary indexes'
-        'If end is not provided, return the index for start'
+        'Return the list of time intervals (of timeInterval frames) between the start and end frame, or'
+        'the time interval of start if end is not provided. Kept for compatibility: it was used by the'
+        'time index of the old versions (see registerTrajectory)'
         lowerIndex=int(start/self.timeInterval)
         if end is None:
             return lowerIndex
-        'Otherwise, return a list with all the indexes between start and end'
         upperIndex=int((end/self.timeInterval)+1)
-        l=[n for n in range(lowerIndex,upperIndex)]
-        return l
-        
+        return list(range(lowerIndex, upperIndex))
+
     def addTrajectory(self, trajectory, ID):
         'Add the trajectory to the list of trajectories'
         'Also, update timeIndex, for fast access to trajectories as a function of frame number'
@@ -151,6 +316,10 @@ class Trajectories:
         'And add the new trajectory'
         trajectory.registerTrajectory(self.timeIndex, self.computeIndex, ID)
         self.trajectories[ID]=trajectory 
+        self.registrations+=1
+        self.registration[ID]=self.registrations
+        self.frameGrids.clear()
+        self.regionIndex.add(ID, trajectory)
             
     def deleteTrajectoryCheck(self, ID):
         'Check if the trajectory can be deleted (for GUI message purposes)'
@@ -161,45 +330,79 @@ class Trajectories:
         'If the trajectory does not exists, a KeyError exception is raised'
         t=self.trajectories.pop(ID)
         t.unregisterTrajectory(ID)
+        del self.registration[ID]
+        self.frameGrids.clear()
+        self.regionIndex.remove(ID)
         
-    def selectTrajectory(self, frame, x, y):
-        'Check if the point belongs to a node for the current frame'
-        try:
-            'Check only the trajectories registered for the given frame (that is, trajectories that exist'
-            'in the given frame)'
-            index=self.computeIndex(frame)
-            for ID in self.timeIndex[index]:
-                tr=self.trajectories[ID]
-                if tr.exists(frame):
-                    node=tr.selectNode(frame)
-                    if node.selectNode(x, y):
-                        'Make a complete copy of the trajectory'
-                        return deepcopy(tr), ID
-        except KeyError: pass 
-        'Exception happens when there is no one trajectory for the given frame'
-        return None, 0
+    def spatialIndex(self, frame):
+        'Return the grid with the nodes of the trajectories in the given frame (see FrameGrid). The'
+        'grid is built the first time it is required, and kept until the trajectories change'
+        self.loadFrame(frame)
+        try: return self.frameGrids[frame]
+        except KeyError: pass
+        frames, ID, x, y, w, h, nodeType=self.boxesAt(frame)
+        'The nodes are sorted in the order the trajectories were registered'
+        order=numpy.argsort(numpy.array([self.registration[i] for i in ID.tolist()], numpy.int64), kind='stable')
+        grid=FrameGrid(ID[order], x[order], y[order], w[order], h[order])
+        'Keep only the grids of the last frames'
+        if len(self.frameGrids)>=self.maxFrameGrids:
+            del self.frameGrids[next(iter(self.frameGrids))]
+        self.frameGrids[frame]=grid
+        return grid
+
+    def selectTrajectory(self, frame, x, y, maxDistance=0):
+        'Check if the point belongs to a node for the current frame. If the point does not belong to'
+        'any node, select the trajectory with the closest node, if it is closer than maxDistance.'
+        'If there are several candidates, the trajectory registered first is selected'
+        grid=self.spatialIndex(frame)
+        i=grid.select(x, y)
+        if i is None and maxDistance>0:
+            i=grid.nearest(x, y, maxDistance)
+        if i is None:
+            return None, 0
+        ID=int(grid.ID[i])
+        'Make a complete copy of the trajectory'
+        return deepcopy(self.trajectories[ID]), ID
     
+    def regionQuery(self, x1, y1, x2, y2, start, end):
+        'Return the IDs (sorted) of the trajectories passing through the image region (x1, y1)-(x2, y2)'
+        '(that is, with any node overlapping the region) in any frame from start to end'
+        self.loadRange(start, end)
+        return self.regionIndex.query(x1, y1, x2, y2, start, end)
+
+    def boxesInRange(self, start, end):
+        'Return the nodes of all the trajectories for the frames from start to end, as numpy arrays'
+        '(frame, ID, x, y, w, h, nodeType), sorted by frame. For each trajectory, only the frames where'
+        'the trajectory exists are included. (x, y) is the node position, and (w, h) its size (NaN for'
+        'point nodes). nodeType holds the values of NodeType'
+        self.loadRange(start, end)
+        columns=[]
+        for ID in self.timeIndex.overlap(start, end):
+            tr=self.trajectories[ID]
+            time, x, y, w, h, nodeType=tr.selectBoxes(max(start, tr.start), min(end, tr.end))
+            columns.append((time, numpy.full(len(time), ID), x, y, w, h, nodeType))
+        if not columns:
+            return boxesColumns([])
+        frame, ID, x, y, w, h, nodeType=(numpy.concatenate(c) for c in zip(*columns))
+        'Sort by frame. For each frame, the trajectories keep the order given by timeIndex'
+        order=numpy.argsort(frame, kind='stable')
+        return frame[order], ID[order], x[order], y[order], w[order], h[order], nodeType[order]
+
+    def boxesAt(self, frame):
+        'Same as boxesInRange, for a single frame. The nodes are taken from the frame cache of the'
+        'trajectories (see Trajectory.selectValues), intended for drawing the video frames'
+        self.loadFrame(frame)
+        return boxesColumns([(ID,)+self.trajectories[ID].selectValues(frame) for ID in self.timeIndex.at(frame)])
+
     def drawNode(self, img, frame):
         'Draw the node for the given frame for all the trajectories'
-        try:
-            'We take only the trajectories that exist for the given frame (trajectories registered in the given frame)'
-            index=self.computeIndex(frame)
-            for ID in self.timeIndex[index]:
-                tr=self.trajectories[ID]
-                if tr.exists(frame):
-                    node=tr.selectNode(frame)
-                    node.drawNode(img)
-        except KeyError: return
-        'Exception happens when there is no one trajectory for the given frame'
+        frame, ID, x, y, w, h, nodeType=self.boxesAt(frame)
+        for values in zip(frame.tolist(), x.tolist(), y.tolist(), w.tolist(), h.tolist(), nodeType.tolist()):
+            CreateNodeFromValues(*values[:5], NodeType(values[5])).drawNode(img)
         
     def drawPath(self, img, frame):
         'Draw the paths for all the trajectories that exists for the given frame'
-        try:
-            'Same as drawNode'
-            index=self.computeIndex(frame)
-            for ID in self.timeIndex[index]:
-                tr=self.trajectories[ID]
-                if tr.exists(frame):
-                    tr.drawPath(img)
-        except KeyError: return
-        
\ No newline at end of file
+        self.loadFrame(frame)
+        'Same as drawNode'
+        for ID in self.timeIndex.at(frame):
+            self.trajectories[ID].drawPath(img)
@@ -0,0 +1,124 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the deferred update of the interpolator (see Trajectory.refreshInterpolator): editing a
+#trajectory does not update the interpolator, the first query after the editions updates it once,
+#and a batchEdit block updates it once when it finishes. The interpolated frames must be the same
+#as the frames of a trajectory built from scratch with the same nodes.
+#Run with: python -m Trajectories.Trajectory.DirtyFlagTest
+
+import numpy
+from .Node import coord, PointNode, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+rng=numpy.random.default_rng(0)
+methods=sorted(Interpolator.interpolatorMethod)
+
+class UpdateCounter:
+    'Count the updates of the interpolators (calls to Interpolator.updateInterpolatorArrays)'
+    def __init__(self):
+        self.count=0
+        self.update=Interpolator.updateInterpolatorArrays
+        counter=self
+        def update(interpolator, *args, **kwargs):
+            counter.count+=1
+            return counter.update(interpolator, *args, **kwargs)
+        Interpolator.updateInterpolatorArrays=update
+    def restore(self):
+        Interpolator.updateInterpolatorArrays=self.update
+
+def randomNode(frame, rectangle):
+    pos=coord(int(rng.integers(0, 400)), int(rng.integers(0, 300)))
+    if rectangle: return RectangleNode(frame, pos, coord(int(rng.integers(5, 100)), int(rng.integers(5, 100))))
+    return PointNode(frame, pos)
+
+def edit(trajectory, rectangle):
+    'Move, add or delete a random node (nodes are not deleted from trajectories with 2 nodes)'
+    operation=rng.integers(0, 3 if len(trajectory.nodes)>2 else 2)
+    if operation==0:
+        frame=trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time
+        trajectory.addNode(randomNode(frame, rectangle))
+    elif operation==1:
+        trajectory.addNode(randomNode(int(rng.integers(trajectory.start-20, trajectory.end+20)), rectangle))
+    else:
+        trajectory.deleteNode(trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time)
+
+def checkFrames(trajectory):
+    'The interpolated frames must be the same as for a new trajectory with the same nodes'
+    nodes=list(trajectory.nodes)
+    reference=Trajectory(nodes[0], trajectory.InterpolationType())
+    reference.setNodes(nodes)
+    for a, b in zip(trajectory.selectRange(), reference.selectRange()):
+        assert (a is None and b is None) or numpy.array_equal(a, b, equal_nan=True)
+    frames=list(range(trajectory.start-3, trajectory.end+4))
+    for a, b in zip(trajectory.selectNodes(frames), reference.selectNodes(frames)):
+        assert str(a)==str(b)
+
+counter=UpdateCounter()
+for storage in ('list', 'columnar'):
+    for rectangle in (True, False):
+        for method in methods:
+            frames=numpy.sort(rng.choice(200, 12, replace=False)).tolist()
+            trajectory=Trajectory(randomNode(frames[0], rectangle), method, storage)
+            'Adding the nodes one by one does not update the interpolator'
+            counter.count=0
+            for f in frames[1:]: trajectory.addNode(randomNode(f, rectangle))
+            assert counter.count==0 and trajectory.dirty
+            'The first query updates it, once'
+            trajectory.selectNode(frames[0]+1)
+            trajectory.selectNodes(frames)
+            trajectory.selectRange()
+            assert counter.count==1 and not trajectory.dirty
+            checkFrames(trajectory)
+            for k in range(20):
+                counter.count=0
+                if k%2==0:
+                    'Several editions, and then one query'
+                    for j in range(int(rng.integers(1, 5))): edit(trajectory, rectangle)
+                    assert trajectory.dirty
+                    trajectory.selectRange()
+                else:
+                    'Nested batchEdit blocks update the interpolator when the outer block finishes'
+                    with trajectory.batchEdit():
+                        edit(trajectory, rectangle)
+                        with trajectory.batchEdit():
+                            edit(trajectory, rectangle)
+                        assert counter.count==0
+                        edit(trajectory, rectangle)
+                    assert not trajectory.dirty
+                assert counter.count==1
+                checkFrames(trajectory)
+            'Changing the method also defers the update'
+            counter.count=0
+            trajectory.updateInterpolator(methods[(methods.index(method)+1)%len(methods)])
+            assert counter.count==0 and trajectory.dirty
+            checkFrames(trajectory)
+        print(storage+(' rectangle' if rectangle else ' point')+' trajectories OK')
+counter.restore()
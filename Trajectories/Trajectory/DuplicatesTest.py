@@ -0,0 +1,99 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the trajectories read from XML (see CreateTrajectoryFromXML) with repeated and unsorted node
+#times: the nodes must be the same as with the original implementation (below), which checks each
+#node with nodes.count (the first node read for each frame is kept), for list and columnar storage
+#and with a scale.
+#Run with: python -m Trajectories.Trajectory.DuplicatesTest
+
+import io
+import contextlib
+import numpy
+from xml.etree.ElementTree import Element
+from .Node import coord, PointNode, RectangleNode, CreateNodeFromXML
+from .Trajectory import Trajectory, CreateTrajectoryFromXML
+
+rng=numpy.random.default_rng(0)
+
+def originalNodes(XMLTrajectory):
+    'Nodes read by the original implementation of CreateTrajectoryFromXML, and number of duplicates'
+    XMLNodes=XMLTrajectory.findall('Node')
+    nodes=[CreateNodeFromXML(XMLNodes[0])]
+    duplicates=0
+    for XMLNode in XMLNodes[1:]:
+        node=CreateNodeFromXML(XMLNode)
+        if nodes.count(node)!=0:
+            duplicates+=1
+            continue
+        nodes.append(node)
+    nodes.sort()
+    return nodes, duplicates
+
+def nodeData(node):
+    'Node data, including the type of each coordinate'
+    values=[node.time, node.pos.x, node.pos.y]
+    try: values+=[node.size.x, node.size.y]
+    except AttributeError: pass
+    return [(type(v), v) for v in values]+[node.nodeType]
+
+def randomXML(count, rectangle):
+    'XML element of a trajectory with count nodes, some of them with the same time, unsorted'
+    frames=rng.integers(0, max(count//2, 1), count).tolist()
+    element=Element('TrajectoryNodes')
+    for f in frames:
+        x, y=int(rng.integers(0, 640)), int(rng.integers(0, 480))
+        if rng.random()<0.5: x+=0.25
+        if rectangle: RectangleNode(f, coord(x, y), coord(int(rng.integers(5, 100)), 7.5)).XMLData(element, 'Node')
+        else: PointNode(f, coord(x, y)).XMLData(element, 'Node')
+    return element
+
+for storage in ('list', 'columnar'):
+    Trajectory.defaultStorage=storage
+    for count in (1, 2, 7, 200):
+        for rectangle in (True, False):
+            element=randomXML(count, rectangle)
+            nodes, duplicates=originalNodes(element)
+            output=io.StringIO()
+            with contextlib.redirect_stdout(output):
+                trajectory=CreateTrajectoryFromXML(element, 'LI')
+            assert [nodeData(n) for n in trajectory.nodes]==[nodeData(n) for n in nodes]
+            assert (trajectory.start, trajectory.end)==(nodes[0].time, nodes[-1].time)
+            assert ('Found '+str(duplicates)+' duplicated' in output.getvalue())==(duplicates>0)
+            'The interpolated frames are the same as for the nodes given one by one'
+            reference=Trajectory(nodes[0], 'LI')
+            for n in nodes[1:]: reference.addNode(n)
+            for a, b in zip(trajectory.selectRange(), reference.selectRange()):
+                assert (a is None and b is None) or numpy.array_equal(a, b, equal_nan=True)
+            'With a scale, the nodes are scaled after removing the duplicates'
+            with contextlib.redirect_stdout(output):
+                scaled=CreateTrajectoryFromXML(element, 'LI', 0.5)
+            assert [nodeData(n) for n in scaled.nodes]==[nodeData(n.scaleNode(0.5)) for n in nodes]
+    print(storage+' storage OK')
+Trajectory.defaultStorage='list'
@@ -0,0 +1,155 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that editing a node of a long trajectory (moving, adding or deleting it, and updating the
+#interpolator) does the same work regardless of the trajectory length, for list and columnar node
+#storage, and that the incremental update gives the same interpolator data than building it again.
+#The work is measured as the number of nodes used to fit splines and to compute the data of pairs
+#of nodes, so that the test does not depend on timing (see Benchmark for the edition time).
+#Run with: python -m Trajectories.Trajectory.EditLatencyTest
+
+import numpy
+from .Node import coord, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+class WorkCounter:
+    'Count the nodes processed by the interpolator: nodes of the fitted splines, and pairs of nodes'
+    'whose data is computed (see Interpolator.updateSegments)'
+    def __init__(self):
+        self.nodes=0
+        self.fitSpline=Interpolator.fitSpline
+        self.segments={}
+        Interpolator.fitSpline=self.countSpline(self.fitSpline)
+        for name, functions in Interpolator.interpolatorMethod.items():
+            if 'S' in functions:
+                self.segments[name]=functions['S']
+                functions['S']=self.countSegments(functions['S'])
+
+    def countSpline(self, function):
+        def fitSpline(interpolator, t, *args):
+            self.nodes+=len(t)
+            return function(interpolator, t, *args)
+        return fitSpline
+
+    def countSegments(self, function):
+        def segment(interpolator, x1, *args):
+            self.nodes+=len(x1)
+            return function(interpolator, x1, *args)
+        return segment
+
+    def restore(self):
+        Interpolator.fitSpline=self.fitSpline
+        for name, function in self.segments.items():
+            Interpolator.interpolatorMethod[name]['S']=function
+
+Interpolator.windowNodes=50
+rng=numpy.random.default_rng(0)
+counter=WorkCounter()
+
+def createTrajectory(n, method, storage):
+    'Trajectory with n rectangle nodes, one every 5 frames'
+    nodes=[RectangleNode(5*i, coord(int(rng.integers(0, 640)), int(rng.integers(0, 480))),
+                         coord(int(rng.integers(10, 100)), int(rng.integers(10, 100)))) for i in range(n)]
+    trajectory=Trajectory(nodes[0], method, storage)
+    trajectory.setNodes(nodes)
+    trajectory.refreshInterpolator()
+    return trajectory
+
+def editNode(trajectory, operation):
+    'Apply one edition to a random node, and update the interpolator. Return the number of nodes'
+    'processed (see WorkCounter)'
+    frame=5*int(rng.integers(1, len(trajectory.nodes)-1))
+    start=counter.nodes
+    if operation=='move':
+        node=trajectory.selectNode(frame)
+        node.pos=node.pos+coord(1, 1)
+        trajectory.addNode(node)
+    elif operation=='add':
+        node=trajectory.selectNode(frame+2)
+        trajectory.addNode(node)
+    elif trajectory.deleteNodeCheck(frame):
+        trajectory.deleteNode(frame)
+    trajectory.refreshInterpolator()
+    return counter.nodes-start
+
+def checkInterpolator(trajectory):
+    'Check that the interpolator data is the same than when built again from the current nodes'
+    interpolator=trajectory.interpolator
+    t, x, y, w, h=trajectory.getArrays()
+    reference=Interpolator(interpolator.interpolatorType)
+    reference.updateInterpolatorArrays(t, x, y, w, h)
+    try: segments=interpolator.segments
+    except AttributeError: pass
+    else:
+        assert numpy.array_equal(segments[1], reference.segments[1])
+        for a, b in zip(segments[2], reference.segments[2]):
+            assert numpy.allclose(a, b, rtol=1e-12, atol=1e-12, equal_nan=True)
+    try: bounds, tckp=interpolator.windows
+    except AttributeError: return
+    'The pieces may be different from the ones built at once, but they must be valid: the'
+    'boundaries are nodes, including the trajectory start and end, the pieces have between'
+    'windowNodes/2 and 2*windowNodes nodes, and each one is the spline of its fitting window'
+    n=len(t)
+    idx=numpy.searchsorted(t, bounds)
+    assert numpy.array_equal(t[idx], bounds) and idx[0]==0 and idx[-1]==n-1
+    counts=numpy.diff(idx)
+    assert counts.min()>=Interpolator.windowNodes//2 and counts.max()<=2*Interpolator.windowNodes
+    for k, tck in enumerate(tckp):
+        a=max(0, idx[k]-Interpolator.windowMargin)
+        b=min(n-1, idx[k+1]+Interpolator.windowMargin)+1
+        fitted=interpolator.fitSpline(t[a:b], x[a:b], y[a:b], w[a:b], h[a:b])
+        assert numpy.array_equal(tck[0], fitted[0])
+        assert all(numpy.allclose(c1, c2, rtol=1e-9, atol=1e-9) for c1, c2 in zip(tck[1], fitted[1]))
+
+'Correctness of the incremental update, after many random editions'
+for method in ('GC', 'LM'):
+    for storage in ('list', 'columnar'):
+        trajectory=createTrajectory(500, method, storage)
+        for k in range(300):
+            editNode(trajectory, ('move', 'add', 'delete')[k%3])
+            if k%10==0: checkInterpolator(trajectory)
+        'Several editions in the same update'
+        with trajectory.batchEdit():
+            for k in range(20): editNode(trajectory, ('move', 'add', 'delete')[k%3])
+        checkInterpolator(trajectory)
+        print('Incremental update '+method+' '+storage+' OK')
+
+'Work done by an edition for short and long trajectories'
+print('Method Storage   Operation      1k nodes 50k nodes (maximum nodes processed)')
+'Nodes of the pieces of the spline fitted again (the piece of the node and its neighbours, with'
+'their margins), or pairs of nodes including the node'
+limit=4*(2*Interpolator.windowNodes+2*Interpolator.windowMargin+1)
+for method in ('GC', 'LM'):
+    for storage in ('list', 'columnar'):
+        trajectories=[createTrajectory(n, method, storage) for n in (1000, 50000)]
+        for operation in ('move', 'add', 'delete'):
+            work=[max(editNode(tr, operation) for k in range(100)) for tr in trajectories]
+            print('%-6s %-9s %-14s %8d %9d' % (method, storage, operation, work[0], work[1]))
+            assert work[1]<=limit, 'Edition work grows with the trajectory length'
+counter.restore()
+Interpolator.windowNodes=0
@@ -0,0 +1,110 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Cache of interpolated nodes for the frames of the trajectories.
+
+__metaclass__=type
+
+from collections import OrderedDict
+import weakref
+
+class FrameCache:
+    '''Cache of interpolated nodes, shared by all the trajectories.
+    For each trajectory, the interpolated nodes between the trajectory start and end are computed
+    (see Trajectory.selectRange) in blocks of consecutive frames, the first time one of the frames
+    of the block is required. The blocks are kept until the trajectory changes, or until the
+    memory used by all the blocks exceeds maxBytes, in which case the least recently used blocks
+    are discarded.'''
+
+    'Number of frames of each block'
+    blockFrames=64
+
+    def __init__(self, maxBytes=64*1024*1024):
+        self.maxBytes=maxBytes
+        'Blocks of all the trajectories, in least recently used order. Each block is indexed by'
+        'the trajectory id and block number, and consists on the arrays returned by selectRange'
+        self.blocks=OrderedDict()
+        self.usedBytes=0
+        'Block numbers stored for each trajectory id'
+        self.owners={}
+
+    def select(self, trajectory, frame):
+        'Return the interpolated node data (time, x, y, w, h, nodeType) of the trajectory for the'
+        'given frame. The frame must be between the trajectory start and end'
+        key=(id(trajectory), frame//self.blockFrames)
+        try:
+            block=self.blocks[key]
+            self.blocks.move_to_end(key)
+        except KeyError:
+            block=self.fill(trajectory, key)
+        i=frame-block[0][0]
+        if not 0<=i<len(block[0]):
+            'The block was computed before the trajectory start or end changed'
+            self.invalidate(trajectory, frame, frame)
+            block=self.fill(trajectory, key)
+            i=frame-block[0][0]
+        return [c[i].item() for c in block]
+
+    def fill(self, trajectory, key):
+        'Compute the block given for the trajectory, and store it'
+        try: self.owners[key[0]].add(key[1])
+        except KeyError:
+            'New trajectory. When the trajectory is destroyed, its blocks must be removed too, since'
+            'its id can be reused by a new trajectory'
+            self.owners[key[0]]=set([key[1]])
+            weakref.finalize(trajectory, self.discard, key[0])
+        start=max(trajectory.start, key[1]*self.blockFrames)
+        end=min(trajectory.end, (key[1]+1)*self.blockFrames-1)
+        block=trajectory.selectRange(start, end)
+        self.blocks[key]=block
+        self.usedBytes+=sum(c.nbytes for c in block)
+        'Discard least recently used blocks, if needed'
+        while self.usedBytes>self.maxBytes and len(self.blocks)>1:
+            oldKey, oldBlock=self.blocks.popitem(False)
+            self.usedBytes-=sum(c.nbytes for c in oldBlock)
+            self.owners[oldKey[0]].discard(oldKey[1])
+        return block
+
+    def invalidate(self, trajectory, start=None, end=None):
+        'Remove the blocks of the trajectory including frames from start to end (by default, all'
+        'the blocks of the trajectory). This function must be called whenever the trajectory changes'
+        ID=id(trajectory)
+        blocks=self.owners.get(ID, set())
+        if start is None: first=min(blocks, default=0)
+        else: first=start//self.blockFrames
+        if end is None: last=max(blocks, default=-1)
+        else: last=end//self.blockFrames
+        for b in [b for b in blocks if first<=b<=last]:
+            blocks.discard(b)
+            block=self.blocks.pop((ID, b))
+            self.usedBytes-=sum(c.nbytes for c in block)
+
+    def discard(self, ID):
+        'Remove all the blocks of the trajectory with the given id'
+        for b in self.owners.pop(ID, set()):
+            block=self.blocks.pop((ID, b))
+            self.usedBytes-=sum(c.nbytes for c in block)
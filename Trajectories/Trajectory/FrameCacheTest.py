@@ -0,0 +1,109 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that the cache of interpolated nodes (FrameCache) never returns stale nodes after editing
+#the trajectory: moving, adding and deleting nodes (inside and outside the trajectory), with and
+#without batchEdit, changing the interpolation method, and with piecewise splines (where only the
+#frames in Interpolator.updatedRange are removed from the cache).
+#Run with: python -m Trajectories.Trajectory.FrameCacheTest
+
+import numpy
+from .Node import coord, PointNode, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+from .FrameCache import FrameCache
+
+rng=numpy.random.default_rng(0)
+
+def nodeValues(node):
+    try: size=(node.size.x, node.size.y)
+    except AttributeError: size=(numpy.nan, numpy.nan)
+    return (node.time, node.pos.x, node.pos.y)+size+(node.nodeType.value,)
+
+def randomNode(frame, rectangle):
+    pos=coord(int(rng.integers(0, 640)), int(rng.integers(0, 480)))
+    if rectangle: return RectangleNode(frame, pos, coord(int(rng.integers(5, 200)), int(rng.integers(5, 200))))
+    return PointNode(frame, pos)
+
+def checkFrames(trajectory):
+    'Read all the frames of the trajectory (and some frames outside) through the cache, and compare'
+    'them with the nodes computed without the cache'
+    frames=range(trajectory.start-3, trajectory.end+4)
+    cached=numpy.array([nodeValues(trajectory.selectNode(f)) for f in frames], float)
+    values=numpy.array([trajectory.selectValues(f) for f in frames], float)
+    frameCache=Trajectory.frameCache
+    Trajectory.frameCache=None
+    try: reference=numpy.array([nodeValues(trajectory.selectNode(f)) for f in frames], float)
+    finally: Trajectory.frameCache=frameCache
+    assert numpy.allclose(cached, reference, rtol=1e-9, atol=1e-9, equal_nan=True), 'Stale node'
+    assert numpy.allclose(values, reference, rtol=1e-9, atol=1e-9, equal_nan=True), 'Stale values'
+
+def randomEdit(trajectory, rectangle):
+    'Move, add or delete a random node, or add a node before the start or after the end'
+    operation=rng.integers(0, 5)
+    frames=[n.time for n in trajectory.nodes]
+    if operation==0:
+        trajectory.addNode(randomNode(int(rng.choice(frames)), rectangle))
+    elif operation==1:
+        trajectory.addNode(randomNode(int(rng.integers(trajectory.start, trajectory.end+1)), rectangle))
+    elif operation==2 and len(frames)>2:
+        trajectory.deleteNode(int(rng.choice(frames)))
+    elif operation==3:
+        trajectory.addNode(randomNode(trajectory.start-int(rng.integers(1, 40)), rectangle))
+    else:
+        trajectory.addNode(randomNode(trajectory.end+int(rng.integers(1, 40)), rectangle))
+
+frameCache=Trajectory.frameCache
+'Small cache, so that blocks are also discarded by memory'
+Trajectory.frameCache=FrameCache(256*1024)
+try:
+    for windowNodes in (0, 8):
+        Interpolator.windowNodes=windowNodes
+        for method in sorted(Interpolator.interpolatorMethod):
+            for rectangle in (False, True):
+                nodes=[randomNode(f, rectangle) for f in range(0, 900, 30)]
+                trajectory=Trajectory(nodes[0], method)
+                trajectory.setNodes(nodes)
+                checkFrames(trajectory)
+                for k in range(20):
+                    randomEdit(trajectory, rectangle)
+                    checkFrames(trajectory)
+                for k in range(5):
+                    'Several editions in the same update, reading frames inside the block'
+                    with trajectory.batchEdit():
+                        for j in range(5):
+                            randomEdit(trajectory, rectangle)
+                        trajectory.selectNode(trajectory.start)
+                        randomEdit(trajectory, rectangle)
+                    checkFrames(trajectory)
+                'Change of interpolation method'
+                trajectory.updateInterpolator('LI' if method!='LI' else 'GC')
+                checkFrames(trajectory)
+                print('Method '+method+(' rectangle' if rectangle else ' point')+' window '+str(windowNodes)+' OK')
+finally:
+    Trajectory.frameCache=frameCache
+    Interpolator.windowNodes=0
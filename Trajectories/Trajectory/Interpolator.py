@@ -30,6 +30,7 @@ This file is part of the TrATVid Software
 __metaclass__=type
 
 'BSpline interpolation tools'
+import bisect
 import numpy
 import scipy.interpolate as si
 from math import sqrt
@@ -41,7 +42,13 @@ class Interpolator:
     
     'Default value for the interpolation method.'
     defaultInterpolator='GC'
-    
+
+    'Piecewise spline for long trajectories (0 to disable). When a trajectory has more than'
+    '2*windowNodes nodes, the spline is built in pieces of about windowNodes nodes, each one fitted'
+    'with windowMargin extra nodes at both sides. Thus, editing a node only requires fitting again'
+    'the pieces close to it, regardless of the trajectory length'
+    windowNodes=0
+    windowMargin=8
 
     def __init__(self, interpolatorType):
         '''Constructor: type refers to the type of interpolation to use
@@ -72,42 +79,262 @@ class Interpolator:
         '[0]: time'
         '[1]: dict{pos:pos, size:size} when a rectangle'
         '[1]: dict{pos:pos} when a point'
-        
-        'Change interpolation interType, if a new interType is given. Otherwise, not change it.'
-        if not self.getUpdatable():
-            'In this case, remove previous auxilar data, if any'
-            try: del self.tckp
+        t=numpy.array([d[0] for d in data])
+        x=numpy.array([d[1]['pos'].x for d in data])
+        y=numpy.array([d[1]['pos'].y for d in data])
+        try:
+            w=numpy.array([d[1]['size'].x for d in data])
+            h=numpy.array([d[1]['size'].y for d in data])
+        except KeyError:
+            w=h=None
+        self.updateInterpolatorArrays(t, x, y, w, h)
+
+    def updateInterpolatorArrays(self, t, x, y, w=None, h=None, changed=None):
+        'Same as updateInterpolator, with the node data given as numpy arrays (t, x, y, w, h),'
+        'sorted by time. For point nodes, w and h must be None.'
+        'changed is the list of frames of the nodes modified (added, replaced or deleted) since the'
+        'last update. If given, only the pieces of a piecewise spline close to these nodes are'
+        'updated (see windowNodes). Otherwise, the whole interpolator is built again.'
+        'After the update, updatedRange holds the frames (first, last) whose interpolated values'
+        'may have changed, or None if all the frames may have changed'
+        self.updatedRange=None
+        if not w is None and 'S' in self.interpolatorMethod[self.interpolatorType]:
+            'Data of each pair of nodes'
+            self.updateSegments(t, x, y, w, h, changed)
+        else:
+            try: del self.segments
             except AttributeError: pass
+        if not self.getUpdatable() or len(t)==1:
+            'Interpolator not needed. Remove previous auxilar data, if any'
+            self.clearInterpolator()
             return
-        
-        'If the trajectory has only one node, the interpolator is not needed.'
-        if len(data)==1: 
-            'In this case, remove previous auxilar data, if any'
-            try: del self.tckp
-            except AttributeError: pass
+        if self.windowNodes<=0 or len(t)<=2*self.windowNodes:
+            'Short trajectories: Single spline for the whole trajectory'
+            self.clearInterpolator()
+            self.tckp=self.fitSpline(t, x, y, w, h)
+            return
+        try: pieces=len(self.windows[1])
+        except AttributeError: pieces=0
+        if changed is None or len(changed)>pieces:
+            'No previous piecewise spline (or too many changes): build all the pieces'
+            self.clearInterpolator()
+            n=len(t)
+            idx=list(range(0, n-1-self.windowNodes, self.windowNodes))+[n-1]
+            tckp=[]
+            for a, b in zip(idx[:-1], idx[1:]):
+                'Fitting window of each piece'
+                a=max(0, a-self.windowMargin)
+                b=min(n-1, b+self.windowMargin)+1
+                tckp.append(self.fitSpline(t[a:b], x[a:b], y[a:b],
+                                           None if w is None else w[a:b], None if h is None else h[a:b]))
+            self.windows=(t[idx].tolist(), tckp)
             return
+        self.updateWindows(t, x, y, w, h, changed)
+
+    def clearInterpolator(self):
+        'Remove the interpolator data (single or piecewise spline), if any'
+        try: del self.tckp
+        except AttributeError: pass
+        try: del self.windows
+        except AttributeError: pass
+
+    def fitSpline(self, t, x, y, w=None, h=None):
+        'Build a spline through all the nodes given (numpy arrays sorted by time), and return it'
+        if not w is None and 'VI' in self.interpolatorMethod[self.interpolatorType]:
+            'If needed, transform coordinates'
+            x, y, w, h=self.interpolatorMethod[self.interpolatorType]['VI'](self, x, y, w, h)
         'With only two actual nodes, only linear interpolation is possible'
-        if len(data)<=2: kl=1
+        if len(t)<=2: kl=1
         else: kl=2
+        'Build a 4-D interpolator for rectangle nodes, and 2-D for point nodes'
+        columns=[x, y] if w is None else [x, y, w, h]
+        tckp, u=si.splprep(columns, u=t, k=kl, s=0)
+        del u
+        return tckp
+
+    def updateWindows(self, t, x, y, w, h, changed):
+        'Update the piecewise spline after modifying the nodes at the frames given (see'
+        'updateInterpolatorArrays). Each piece covers the frames between two nodes (boundaries),'
+        'and is fitted with windowMargin extra nodes at both sides, so that consecutive pieces'
+        'join smoothly. Only the pieces close to the changed nodes are checked and fitted again,'
+        'while the rest of the pieces keep their boundaries and coefficients, so that the cost of'
+        'the update does not depend on the number of pieces'
+        n=len(t)
+        bounds, tckp=self.windows
+        changed=sorted(set(changed))
+        def nodeIndex(frame):
+            'Position of the node of the frame given (or of the following node, if it does not exist)'
+            return int(numpy.searchsorted(t, frame))
+        'Pieces fitted again, given by a frame within each piece'
+        refit=set()
+        for f in changed:
+            'The boundaries must be node times, so that consecutive pieces share the boundary node.'
+            'The boundaries of deleted nodes are moved to the following node, and the first and'
+            'last boundaries are always the trajectory start and end'
+            k=bisect.bisect_left(bounds, f)
+            i=nodeIndex(f)
+            if k<len(bounds) and bounds[k]==f and (i==n or t[i]!=f):
+                bounds[k]=t[min(i, n-1)].item()
+                if k+1<len(bounds) and bounds[k+1]<=bounds[k]:
+                    'The piece is now empty'
+                    del bounds[k], tckp[k]
+            if bounds[0]!=t[0]:
+                bounds[0]=t[0].item()
+                while len(bounds)>2 and bounds[1]<=bounds[0]: del bounds[1], tckp[0]
+            if bounds[-1]!=t[-1]:
+                bounds[-1]=t[-1].item()
+                while len(bounds)>2 and bounds[-2]>=bounds[-1]: del bounds[-2], tckp[-1]
+            'Check the number of nodes of the piece with the changed node, and split it if it is'
+            'too long, or merge it with the next one if it is too short (see resizeWindows)'
+            k=min(max(bisect.bisect_right(bounds, f)-1, 0), len(tckp)-1)
+            count=nodeIndex(bounds[k+1])-nodeIndex(bounds[k])
+            if count>2*self.windowNodes or (len(tckp)>1 and count<self.windowNodes//2):
+                k0=max(k-1, 0)
+                k1=min(k+2, len(bounds)-1)
+                newBounds=t[self.resizeWindows([nodeIndex(b) for b in bounds[k0:k1+1]])].tolist()
+                bounds[k0:k1+1]=newBounds
+                tckp[k0:k1]=[None]*(len(newBounds)-1)
+                refit.update(newBounds[:-1])
+
+        'Fit again the pieces with a changed node within its fitting window'
+        for f in changed:
+            i=nodeIndex(f)
+            k=min(max(bisect.bisect_right(bounds, f)-1, 0), len(tckp)-1)
+            refit.add(bounds[k])
+            j=k-1
+            while j>=0 and nodeIndex(bounds[j+1])+self.windowMargin>=i:
+                refit.add(bounds[j])
+                j-=1
+            j=k+1
+            while j<len(tckp) and nodeIndex(bounds[j])-self.windowMargin<=i:
+                refit.add(bounds[j])
+                j+=1
+        refit=sorted(set(min(max(bisect.bisect_right(bounds, f)-1, 0), len(tckp)-1) for f in refit))
+        'Only the frames covered by the pieces fitted again change (empty if none)'
+        if refit: self.updatedRange=(bounds[refit[0]], bounds[refit[-1]+1])
+        else: self.updatedRange=()
+        for k in refit:
+            'Fitting window of the piece'
+            a=max(0, nodeIndex(bounds[k])-self.windowMargin)
+            b=min(n-1, nodeIndex(bounds[k+1])+self.windowMargin)+1
+            tckp[k]=self.fitSpline(t[a:b], x[a:b], y[a:b],
+                                   None if w is None else w[a:b], None if h is None else h[a:b])
+        self.windows=(bounds, tckp)
 
-        'If needed, transform coordinates. If not needed, this function does not modify the data'
-        try: self.interpolatorMethod[self.interpolatorType]['I'](self, data)
-        #TODO: Remove this exception
-        except KeyError: pass
+    def resizeWindows(self, idx):
+        'Split the pieces with more than 2*windowNodes nodes, and merge the pieces with less than'
+        'windowNodes/2 nodes with the next one. idx is the list of node indexes of the boundaries'
+        newIdx=[idx[0]]
+        for k in range(1, len(idx)):
+            if idx[k]-newIdx[-1]<self.windowNodes//2:
+                if k<len(idx)-1:
+                    'Merge with the next piece, removing this boundary'
+                    continue
+                if len(newIdx)>1:
+                    'The last piece is merged with the previous one'
+                    newIdx.pop()
+            while idx[k]-newIdx[-1]>2*self.windowNodes:
+                newIdx.append(newIdx[-1]+self.windowNodes)
+            newIdx.append(idx[k])
+        return newIdx
 
-        'Create list with all the data in scipy format compatible'         
-        t=[d[0] for d in data]
-        x=[d[1]['pos'].x for d in data]
-        y=[d[1]['pos'].y for d in data]
+    def splineValues(self, times, reference=None):
+        'Evaluate the spline of the interpolator (see si.splev) at the times given.'
+        'For piecewise splines, the piece used is the one covering the reference times (by'
+        'default, the times given). This allows evaluating the same piece at different times.'
+        try: return si.splev(times, self.tckp)
+        except AttributeError: pass
+        bounds, tckp=self.windows
+        if reference is None: reference=times
+        if numpy.ndim(reference)==0:
+            k=min(max(bisect.bisect_right(bounds, reference)-1, 0), len(tckp)-1)
+            return si.splev(times, tckp[k])
+        k=numpy.clip(numpy.searchsorted(bounds, reference, 'right')-1, 0, len(tckp)-1)
+        if numpy.ndim(times)==0:
+            return si.splev(times, tckp[k])
+        'Evaluate each piece for its own times'
+        times=numpy.asarray(times)
+        values=[numpy.empty(times.shape) for c in tckp[0][1]]
+        for piece in numpy.unique(k).tolist():
+            mask=k==piece
+            for v, c in zip(values, si.splev(times[mask], tckp[piece])):
+                v[mask]=c
+        return values
+
+    def updateSegments(self, t, x, y, w, h, changed=None):
+        'Compute the data of each pair of consecutive nodes used by the interpolation method (see'
+        'S in interpolatorMethod), so that it is not computed again for each frame. The data of the'
+        'pair (k, k+1) is stored at position k of each array (the last position, without pair, repeats'
+        'the previous one), so that the arrays have one value per node. If the frames of the nodes'
+        'changed are given, the data of the previous update is kept: the positions of the nodes added'
+        'and deleted are inserted and deleted at once, and only the pairs including the changed nodes'
+        'are computed again'
+        segment=self.interpolatorMethod[self.interpolatorType]['S']
+        n=len(t)
         try:
-            'Rectangle nodes. Build a 4-D interpolator'
-            w=[d[1]['size'].x for d in data]
-            h=[d[1]['size'].y for d in data]
-            self.tckp, u=si.splprep([x,y,w, h], u=t, k=kl, s=0)
-        except KeyError:
-            'Point nodes. Build a 2-D interpolator'
-            self.tckp, u=si.splprep([x,y],u=t, k=kl, s=0)
-        del u
+            interpolatorType, segT, data=self.segments
+            if changed is None or interpolatorType!=self.interpolatorType or len(segT)<2 or n<2:
+                raise AttributeError
+        except AttributeError:
+            'Compute the data of all the pairs'
+            'NOTE: Node times are copied, since the arrays given can be modified by the trajectory'
+            values=segment(self, x[:-1], y[:-1], w[:-1], h[:-1], x[1:], y[1:], w[1:], h[1:])
+            self.segments=(self.interpolatorType, numpy.array(t),
+                           tuple(numpy.concatenate((c, c[-1:])) for c in values))
+            return
+        changed=numpy.unique(changed)
+        'Changed frames with a node before (old) and after (new) the changes'
+        j=numpy.searchsorted(segT, changed)
+        old=segT[numpy.minimum(j, len(segT)-1)]==changed
+        i=numpy.searchsorted(t, changed)
+        new=t[numpy.minimum(i, n-1)]==changed
+        deleted=j[old & ~new]
+        added=changed[new & ~old]
+        if len(segT)-len(deleted)+len(added)!=n:
+            'The changes given do not match the nodes. Compute the data of all the pairs'
+            return self.updateSegments(t, x, y, w, h)
+        if len(deleted) or len(added):
+            segT=numpy.delete(segT, deleted)
+            k=numpy.searchsorted(segT, added)
+            segT=numpy.insert(segT, k, added)
+            data=[numpy.insert(numpy.delete(c, deleted, 0), k, c[0], 0) for c in data]
+        else:
+            data=list(data)
+        'Pairs including the changed nodes (or joined after deleting a node)'
+        k=numpy.unique(numpy.clip(numpy.concatenate((i-1, i)), 0, n-2))
+        values=segment(self, x[k], y[k], w[k], h[k], x[k+1], y[k+1], w[k+1], h[k+1])
+        for c, v in zip(data, values):
+            c[k]=v
+            c[-1]=c[-2]
+        self.segments=(self.interpolatorType, segT, tuple(data))
+
+    def segmentValues(self, t, x, y, w, h, i):
+        'Return the data of the pairs of nodes (i, i+1) (see updateSegments), for the array of'
+        'node indexes i. The data is taken from the last update, so the node data given must be the'
+        'same used in the last update (Trajectory ensures it, updating the interpolator before using'
+        'it, see Trajectory.refreshInterpolator). Only the method and number of nodes are checked'
+        try:
+            interpolatorType, segT, data=self.segments
+            if interpolatorType==self.interpolatorType and len(segT)==len(t):
+                return tuple(c[i] for c in data)
+        except AttributeError: pass
+        segment=self.interpolatorMethod[self.interpolatorType]['S']
+        return segment(self, x[i], y[i], w[i], h[i], x[i+1], y[i+1], w[i+1], h[i+1])
+
+    def segmentNodes(self, node1, node2):
+        'Same as segmentValues, for a single pair of nodes'
+        try:
+            interpolatorType, segT, data=self.segments
+            k=int(numpy.searchsorted(segT, node1.time))
+            if interpolatorType==self.interpolatorType and k<len(segT)-1 and \
+               segT[k]==node1.time and segT[k+1]==node2.time:
+                return tuple(c[k] for c in data)
+        except AttributeError: pass
+        segment=self.interpolatorMethod[self.interpolatorType]['S']
+        values=segment(self, *(numpy.array([v]) for v in
+                       (node1.pos.x, node1.pos.y, node1.size.x, node1.size.y,
+                        node2.pos.x, node2.pos.y, node2.size.x, node2.size.y)))
+        return tuple(c[0] for c in values)
         
 ###################################################################################################
 ###################################################################################################
@@ -149,7 +376,53 @@ class Interpolator:
         'Compute the coordinates using the corresponding function'
         pos, size=self.interpolatorMethod[self.interpolatorType]['R'](self, node1, node2, frame)
         return pos, size, self.interpolationType(frame, node1.time, node2.time)
-        
+
+    def interpolateArray(self, t, x, y, w, h, frames):
+        '''Vectorized version of interpolatePoint/interpolateRectangle, for a whole set of frames.
+        Node data is given as numpy arrays (t, x, y, w, h) sorted by time. For point trajectories,
+        w and h must be None. Return the arrays (x, y, w, h, nodeType) for the frames given, where
+        nodeType holds the values of NodeType, and w and h are None for point trajectories'''
+        frames=numpy.asarray(frames)
+        n=len(t)
+        'Nodes used to interpolate each frame. The criteria is the same as in Trajectory.selectNode:'
+        'the two nodes surrounding the frame, or the two first/last nodes when extrapolating'
+        if n==1:
+            i1=numpy.zeros(frames.shape, numpy.intp)
+            i2=i1
+        else:
+            i1=numpy.clip(numpy.searchsorted(t, frames, 'left')-1, 0, n-2)
+            i2=i1+1
+        t1=t[i1]
+        t2=t[i2]
+        'Type of node for each frame (see interpolationType)'
+        nodeType=numpy.full(frames.shape, NodeType.interpolated.value, numpy.int8)
+        nodeType[(frames<t1) & (frames<t2)]=NodeType.anterior.value
+        nodeType[(frames>t1) & (frames>t2)]=NodeType.posterior.value
+        real1=frames==t1
+        real2=frames==t2
+        nodeType[real1 | real2]=NodeType.real.value
+
+        if n==1:
+            'With only one sample, all the frames get the coordinates of the same node'
+            xi, yi=x[i1].astype(float), y[i1].astype(float)
+            if w is None: return xi, yi, None, None, nodeType
+            return xi, yi, w[i1].astype(float), h[i1].astype(float), nodeType
+
+        'Compute the coordinates using the corresponding function'
+        if w is None:
+            xi, yi=self.interpolatorMethod[self.interpolatorType]['VP'](self, t, x, y, i1, i2, frames)
+            wi=hi=None
+        else:
+            xi, yi, wi, hi=self.interpolatorMethod[self.interpolatorType]['VR'](self, t, x, y, w, h, i1, i2, frames)
+        'Frames matching a node take the node coordinates directly (as in the scalar functions)'
+        columns=[xi, yi] if w is None else [xi, yi, wi, hi]
+        data=[x, y] if w is None else [x, y, w, h]
+        for c, d in zip(columns, data):
+            c[real1]=d[i1[real1]]
+            c[real2]=d[i2[real2]]
+        if w is None: return xi, yi, None, None, nodeType
+        return xi, yi, wi, hi, nodeType
+
 ###################################################################################################
 ###################################################################################################
 ###################################################################################################
@@ -176,7 +449,7 @@ class Interpolator:
  
     def interpolatePointBSpline(self, node1, node2, frame):
         'Point to point b-spline interpolation'
-        x,y = si.splev(frame, self.tckp)
+        x,y = self.splineValues(frame)
         'Build a coord with the interpolated elements'
         'NOTE: splev returns a ndarray of 0 dimension. Although it can be used as a normal'
         'number, to prevent further errors, extract the scalar using item() method'
@@ -197,7 +470,7 @@ class Interpolator:
 
     def interpolateRectangleBSpline(self, node1, node2, frame):
         'Rectangle to rectangle b-spline interpolation'
-        x, y, w, h=si.splev(frame,self.tckp)
+        x, y, w, h=self.splineValues(frame)
         'Build a coord with the interpolated elements'
         'NOTE: splev returns a ndarray of 0 dimension. Although it can be used as a normal'
         'number, to prevent further errors, extract the scalar using item() method'
@@ -207,7 +480,11 @@ class Interpolator:
     
     def interpolateRectangle3D(self, node1, node2, frame):
         'Rectangle to rectangle linear interpolation using 3D reconstruction (see paper)'
-        XY, DXY, Z, DZ, WH, r=self.rectangle3DReconstruction(node1.pos, node1.size, node2.pos, node2.size)
+        'The 3D reconstruction of the pair of nodes (see segment3D) is computed only once'
+        X, Y, DX, DY, Z, DZ, W, H, r=(float(v) for v in self.segmentNodes(node1, node2))
+        XY=coord(X, Y)
+        DXY=coord(DX, DY)
+        WH=coord(W, H)
         'Variables:'
         'XY: Coordinates, on the plane XY, of the rectangle center at frame1'
         'DXY: Shift on the plane XY of the rectangle center from frame1 to frame2'
@@ -248,7 +525,7 @@ class Interpolator:
         'and then compute the relation between the projected rectangle, and the actual one'
         'which is just node1.size'
         'So, compute parameters for frame of node 1'
-        X, Y, Z, R=si.splev(node1.time, self.tckp)
+        X, Y, Z, R=self.splineValues(node1.time, frame)
         'NOTE: splev returns a ndarray of 0 dimension. Although it can be used as a normal'
         'number, to prevent further errors, extract the scalar using item() method'
         R0=R.item()
@@ -256,7 +533,7 @@ class Interpolator:
         del X, Y #Remove the warning
 
         'Then, compute parameters for the frame required'
-        X, Y, Z, R=si.splev(frame, self.tckp)
+        X, Y, Z, R=self.splineValues(frame)
         'The relation between the projected frame, and the actual one, is just Z1/Z0 (and'
         'R1/R0 for the variation in aspect ratio)'
         R1=R.item()/R0
@@ -292,79 +569,160 @@ class Interpolator:
     def interpolateRectangleLabelMe(self, node1, node2, frame):
         'Interpolation using the method defined in LabelMe (see [Yuen 2009])'
         
-        'Get corner in homogeneous coordinates'
-        p1_0=numpy.matrix([node1.points[0].x, node1.points[0].y, 1], numpy.float32) 
-        p1_1=numpy.matrix([node1.points[1].x, node1.points[1].y, 1], numpy.float32)
-        p2_0=numpy.matrix([node2.points[0].x, node2.points[0].y, 1], numpy.float32)
-        p2_1=numpy.matrix([node2.points[1].x, node2.points[1].y, 1], numpy.float32)
-        'Get line parameter in homogeneous coordinates'
-        l0=numpy.cross(p1_0, p2_0)
-        l1=numpy.cross(p1_1, p2_1)
-        'Get cross point for l0 and l1'
-        pC=numpy.cross(l0, l1)
-        'Dehomogenize point'
-        if numpy.abs(pC[0,2])<=0.0001*numpy.abs(pC[0,0]) or numpy.abs(pC[0,2])<=0.0001*numpy.abs(pC[0,1]):
-            'If the point reaches infinite, means parallel lines. Parallel lines happen'
-            'when the object moves parallel to the image plane, and so, there is no change'
-            'in depth. In this case, the interpolation can be done with a simple linear'
-            'interpolation.'
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        'Otherwise, dehomogenize the poiint'
-        pv=(pC[0,0]/pC[0,2], pC[0,1]/pC[0,2])
-        
-        
-        if ((pv[0]<=p1_0[0,0] and pv[0]>=p2_0[0,0]) or (pv[0]>=p1_0[0,0] and pv[0]<=p2_0[0,0])):
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if ((pv[1]<=p1_0[0,1] and pv[1]>=p2_0[0,1]) or (pv[1]>=p1_0[0,1] and pv[1]<=p2_0[0,1])):
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if ((pv[0]<=p1_1[0,0] and pv[0]>=p2_1[0,0]) or (pv[0]>=p1_1[0,0] and pv[0]<=p2_1[0,0])):
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if ((pv[1]<=p1_1[0,1] and pv[1]>=p2_1[0,1]) or (pv[1]>=p1_1[0,1] and pv[1]<=p2_1[0,1])):
+        'Vanishing point geometry of the pair of nodes (see segmentLabelMe)'
+        p1_0, p1_1, pv, v0, v1, linear=self.segmentNodes(node1, node2)
+        if linear:
+            'LabelMe can not be applied to this pair of nodes. Use linear interpolation instead'
             return self.interpolateRectangleLinear(node1, node2, frame)
 
-        'Check zero division. In case it happens, change LM interpolation to Linear'
-        if numpy.abs(p2_0[0,0]-pv[0])<0.01:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if numpy.abs(p2_0[0,1]-pv[1])<0.01:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if numpy.abs(p2_1[0,0]-pv[0])<0.01:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if numpy.abs(p2_1[0,1]-pv[1])<0.01:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-
-        'Compute velocity as described in [Yuen 2009]'
-        v0=( \
-                (p2_0[0,0]-p1_0[0,0]) / (pv[0]-p2_0[0,0]), \
-                (p2_0[0,1]-p1_0[0,1]) / (pv[1]-p2_0[0,1]))
-        v1=( \
-                (p2_1[0,0]-p1_1[0,0]) / (pv[0]-p2_1[0,0]), \
-                (p2_1[0,1]-p1_1[0,1]) / (pv[1]-p2_1[0,1]))
-        
         f=self.interpolatorFactor(frame, node1.time, node2.time)
         'Project point as described in [Yuen 2009]'
-        if numpy.abs(1+v0[0]*f)<1e-5:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if numpy.abs(1+v0[1]*f)<1e-5:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if numpy.abs(1+v1[0]*f)<1e-5:
-            return self.interpolateRectangleLinear(node1, node2, frame)
-        if numpy.abs(1+v1[1]*f)<1e-5:
+        d0=1+v0*f
+        d1=1+v1*f
+        if (numpy.abs(d0)<1e-5).any() or (numpy.abs(d1)<1e-5).any():
             return self.interpolateRectangleLinear(node1, node2, frame)
-
-        p0=( \
-                (p1_0[0,0]+pv[0]*v0[0]*f) / (1+v0[0]*f), \
-                (p1_0[0,1]+pv[1]*v0[1]*f) / (1+v0[1]*f))
-        p1=( \
-                (p1_1[0,0]+pv[0]*v1[0]*f) / (1+v1[0]*f), \
-                (p1_1[0,1]+pv[1]*v1[1]*f) / (1+v1[1]*f))
+        p0=(p1_0+pv*v0*f)/d0
+        p1=(p1_1+pv*v1*f)/d1
         pos= coord(0.5*(p0[0]+p1[0]), 0.5*(p0[1]+p1[1]))
         size=coord((p0[0]-p1[0]), (p0[1]-p1[1]))
         return pos, size
-        
+
+###################################################################################################
+###################################################################################################
+###################################################################################################
+    'Private functions: Vectorized interpolation'
+    'These functions are the counterpart of the previous ones, working on numpy arrays. Node data'
+    'is given as arrays (t, x, y, w, h), and i1, i2 are the indexes of the nodes used to interpolate'
+    'each one of the frames.'
+
+    def interpolateArrayNoInterpolate(self, t, x, y, *args):
+        'No interpolation method. Return the same coordinates than the previous node'
+        'args is (i1, i2, frames) for points, and (w, h, i1, i2, frames) for rectangles'
+        i1=args[-3]
+        return tuple(c[i1].astype(float) for c in (x, y)+args[:-3])
+
+    def interpolatePointArrayLinear(self, t, x, y, i1, i2, frames):
+        'Point to point linear interpolation'
+        f=self.interpolatorFactorArray(frames, t[i1], t[i2])
+        x1=x[i1].astype(float)
+        y1=y[i1].astype(float)
+        return x1+(x[i2]-x1)*f, y1+(y[i2]-y1)*f
+
+    def interpolatePointArrayBSpline(self, t, x, y, i1, i2, frames):
+        'Point to point b-spline interpolation'
+        xi, yi=self.splineValues(frames)
+        return xi, yi
+
+    def interpolateRectangleArrayLinear(self, t, x, y, w, h, i1, i2, frames):
+        'Rectangle to rectangle linear interpolation'
+        xi, yi=self.interpolatorMethod[self.interpolatorType]['VP'](self, t, x, y, i1, i2, frames)
+        wi, hi=self.interpolatePointArrayLinear(t, w, h, i1, i2, frames)
+        return xi, yi, wi, hi
+
+    def interpolateRectangleArrayBSpline(self, t, x, y, w, h, i1, i2, frames):
+        'Rectangle to rectangle b-spline interpolation'
+        xi, yi, wi, hi=self.splineValues(frames)
+        return xi, yi, wi, hi
+
+    def interpolateRectangleArray3D(self, t, x, y, w, h, i1, i2, frames):
+        'Rectangle to rectangle linear interpolation using 3D reconstruction (see interpolateRectangle3D)'
+        '3D reconstruction of the pairs of nodes'
+        X, Y, DX, DY, Z, DZ, W, H, r=self.segmentValues(t, x, y, w, h, i1)
+        'Projection of the 3D rectangle for the frames given'
+        f=self.interpolatorFactorArray(frames, t[i1], t[i2])
+        X=X+DX*f
+        Y=Y+DY*f
+        Z=Z+DZ*f
+        r=1+(r-1)*f
+        return X/Z, Y/Z, W*r/Z, H/r/Z
+
+    def segment3D(self, x1, y1, w1, h1, x2, y2, w2, h2):
+        '3D reconstruction (see rectangle3DReconstruction) for pairs of nodes, given as arrays with'
+        'the coordinates of the first (x1, y1, w1, h1) and second (x2, y2, w2, h2) node of each pair.'
+        'Return the arrays (X, Y, DX, DY, Z, DZ, W, H, r)'
+        w1=w1.astype(float)
+        h1=h1.astype(float)
+        w2=w2.astype(float)
+        h2=h2.astype(float)
+        bm1=numpy.sqrt(w1*h1)
+        Z=numpy.sqrt(w2*h2)
+        DZ=bm1-Z
+        X=x1*Z
+        Y=y1*Z
+        DX=x2*(Z+DZ)-X
+        DY=y2*(Z+DZ)-Y
+        r=numpy.sqrt((w2*h1)/(h2*w1))
+        return X, Y, DX, DY, Z, DZ, w1*Z, h1*Z, r
+
+    def interpolateRectangleArrayBSpline3D(self, t, x, y, w, h, i1, i2, frames):
+        'Rectangle to rectangle b-spline interpolation using 3D reconstruction (see interpolateRectangleBSpline3D)'
+        X0, Y0, Z0, R0=self.splineValues(t[i1], frames)
+        X, Y, Z, R=self.splineValues(frames)
+        R1=R/R0
+        Z1=Z/Z0
+        return X/Z, Y/Z, w[i1]*R1/Z1, h[i1]/R1/Z1
+
+    def interpolateRectangleArrayLabelMe(self, t, x, y, w, h, i1, i2, frames):
+        'Interpolation using the method defined in LabelMe (see interpolateRectangleLabelMe)'
+        'Vanishing point geometry of the pairs of nodes, and pairs where LabelMe can not be applied'
+        p1_0, p1_1, pv, v0, v1, linear=self.segmentValues(t, x, y, w, h, i1)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            f=self.interpolatorFactorArray(frames, t[i1], t[i2]).astype(numpy.float32)[:,None]
+            d0=1+v0*f
+            d1=1+v1*f
+            linear=linear | (numpy.abs(d0)<1e-5).any(1) | (numpy.abs(d1)<1e-5).any(1)
+            'Project point as described in [Yuen 2009]'
+            p0=(p1_0+pv*v0*f)/d0
+            p1=(p1_1+pv*v1*f)/d1
+        xi=(0.5*(p0[:,0]+p1[:,0])).astype(float)
+        yi=(0.5*(p0[:,1]+p1[:,1])).astype(float)
+        wi=(p0[:,0]-p1[:,0]).astype(float)
+        hi=(p0[:,1]-p1[:,1]).astype(float)
+        if linear.any():
+            xl, yl, wl, hl=self.interpolateRectangleArrayLinear(t, x, y, w, h, i1, i2, frames)
+            xi[linear]=xl[linear]
+            yi[linear]=yl[linear]
+            wi[linear]=wl[linear]
+            hi[linear]=hl[linear]
+        return xi, yi, wi, hi
+
+    def segmentLabelMe(self, x1, y1, w1, h1, x2, y2, w2, h2):
+        'Vanishing point geometry used by LabelMe for pairs of nodes, given as arrays with the'
+        'coordinates of the first (x1, y1, w1, h1) and second (x2, y2, w2, h2) node of each pair.'
+        'Return the arrays (p1_0, p1_1, pv, v0, v1, linear): corners of the first node, vanishing'
+        'point, velocities [Yuen 2009], and pairs where LabelMe can not be applied.'
+        'NOTE: As in the original implementation, computations are done in float32'
+        'Rectangle corners of both nodes, in homogeneous coordinates'
+        one=numpy.ones(len(x1), numpy.float32)
+        p1_0=numpy.stack([x1-w1/2, y1-h1/2, one], 1).astype(numpy.float32)
+        p1_1=numpy.stack([x1+w1/2, y1+h1/2, one], 1).astype(numpy.float32)
+        p2_0=numpy.stack([x2-w2/2, y2-h2/2, one], 1).astype(numpy.float32)
+        p2_1=numpy.stack([x2+w2/2, y2+h2/2, one], 1).astype(numpy.float32)
+        'Vanishing point of the lines joining the corners'
+        pC=numpy.cross(numpy.cross(p1_0, p2_0), numpy.cross(p1_1, p2_1))
+        'Parallel lines: there is no change in depth, and linear interpolation is used instead'
+        linear=(numpy.abs(pC[:,2])<=0.0001*numpy.abs(pC[:,0])) | (numpy.abs(pC[:,2])<=0.0001*numpy.abs(pC[:,1]))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            pv=pC[:,:2]/pC[:,2:]
+            for p1, p2 in ((p1_0, p2_0), (p1_1, p2_1)):
+                for c in (0, 1):
+                    'Vanishing point between both nodes'
+                    linear|=((pv[:,c]<=p1[:,c]) & (pv[:,c]>=p2[:,c])) | ((pv[:,c]>=p1[:,c]) & (pv[:,c]<=p2[:,c]))
+                    'Zero division'
+                    linear|=numpy.abs(p2[:,c]-pv[:,c])<0.01
+            'Velocity as described in [Yuen 2009]'
+            v0=(p2_0[:,:2]-p1_0[:,:2])/(pv-p2_0[:,:2])
+            v1=(p2_1[:,:2]-p1_1[:,:2])/(pv-p2_1[:,:2])
+        return p1_0[:,:2], p1_1[:,:2], pv, v0, v1, linear
+
     def interpolatorFactor(self, frame, time1, time2):
         'Computes the interpolation factor for the frame given.'
         return float(frame-time1)/float(time2-time1)
-    
+
+    def interpolatorFactorArray(self, frames, time1, time2):
+        'Same as interpolatorFactor, for numpy arrays'
+        return (frames-time1).astype(float)/(time2-time1)
+
     def interpolationType(self, frame, time1, time2):
         if frame<time1 and frame<time2:
             return NodeType.anterior
@@ -406,6 +764,21 @@ class Interpolator:
         'Update the last element'
         data[-1][1]['pos']=XY+DXY
         data[-1][1]['size']=coord(Z1, r1)
+
+    def transformArrays3D(self, x, y, w, h):
+        'Vectorized version of transformData3D, for the node data given as numpy arrays (x, y, w, h).'
+        'Return the arrays (X, Y, Z, R): 3D position, depth and change in aspect ratio with respect'
+        'to the first node'
+        'Chaining the reconstruction of consecutive nodes, the depth of each node is the depth of'
+        'the previous one times the ratio of their geometric mean sizes, which reduces to the ratio'
+        'of the geometric mean sizes of the first node and the current one. Likewise, the change'
+        'in aspect ratio reduces to the change from the first node'
+        w=numpy.asarray(w, float)
+        h=numpy.asarray(h, float)
+        bm=numpy.sqrt(w*h)
+        Z=bm[0]/bm
+        R=numpy.sqrt((w*h[0])/(h*w[0]))
+        return x*Z, y*Z, Z, R
             
     interpolatorMethod={
         #Relation between interpolation ID and methods used for computations
@@ -413,10 +786,20 @@ class Interpolator:
         #P: Method for point interpolation
         #R: Method for rectangle interpolation
         #I: Data transformation
-        'NI':{'U':False, 'P': interpolateNoInterpolate, 'R':interpolateNoInterpolate},
-        'LI':{'U':False, 'P': interpolatePointLinear,   'R':interpolateRectangleLinear},
-        'GI':{'U':False, 'P': interpolatePointLinear,   'R':interpolateRectangle3D},
-        'CS':{'U':True,  'P': interpolatePointBSpline,  'R':interpolateRectangleBSpline},
-        'GC':{'U':True,  'P': interpolatePointBSpline,  'R':interpolateRectangleBSpline3D, 'I':transformData3D},
-        'LM':{'U':False, 'P': interpolatePointLinear,   'R':interpolateRectangleLabelMe}
+        #VI: Vectorized data transformation
+        #VP: Method for vectorized point interpolation
+        #VR: Method for vectorized rectangle interpolation
+        #S: Data computed for each pair of nodes (rectangles)
+        'NI':{'U':False, 'P': interpolateNoInterpolate, 'R':interpolateNoInterpolate,
+              'VP':interpolateArrayNoInterpolate, 'VR':interpolateArrayNoInterpolate},
+        'LI':{'U':False, 'P': interpolatePointLinear,   'R':interpolateRectangleLinear,
+              'VP':interpolatePointArrayLinear, 'VR':interpolateRectangleArrayLinear},
+        'GI':{'U':False, 'P': interpolatePointLinear,   'R':interpolateRectangle3D,
+              'VP':interpolatePointArrayLinear, 'VR':interpolateRectangleArray3D, 'S':segment3D},
+        'CS':{'U':True,  'P': interpolatePointBSpline,  'R':interpolateRectangleBSpline,
+              'VP':interpolatePointArrayBSpline, 'VR':interpolateRectangleArrayBSpline},
+        'GC':{'U':True,  'P': interpolatePointBSpline,  'R':interpolateRectangleBSpline3D, 'I':transformData3D, 'VI':transformArrays3D,
+              'VP':interpolatePointArrayBSpline, 'VR':interpolateRectangleArrayBSpline3D},
+        'LM':{'U':False, 'P': interpolatePointLinear,   'R':interpolateRectangleLabelMe,
+              'VP':interpolatePointArrayLinear, 'VR':interpolateRectangleArrayLabelMe, 'S':segmentLabelMe}
         }
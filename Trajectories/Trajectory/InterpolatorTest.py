@@ -0,0 +1,82 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that the vectorized interpolation (selectNodes and selectValues) gives the same results than
+#the interpolation of each frame (selectNode), for all the interpolation methods, with point and
+#rectangle nodes. Run with: python -m Trajectories.Trajectory.InterpolatorTest
+
+import numpy
+from .Node import coord, PointNode, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+rng=numpy.random.default_rng(0)
+
+def randomTrajectory(n, method, rectangle):
+    'Trajectory with n nodes at random frames, with integer coordinates (as in annotation files)'
+    frames=numpy.sort(rng.choice(numpy.arange(1000), n, replace=False)).tolist()
+    nodes=[]
+    for f in frames:
+        pos=coord(int(rng.integers(0, 640)), int(rng.integers(0, 480)))
+        if rectangle: nodes.append(RectangleNode(f, pos, coord(int(rng.integers(5, 200)), int(rng.integers(5, 200)))))
+        else: nodes.append(PointNode(f, pos))
+    trajectory=Trajectory(nodes[0], method)
+    trajectory.setNodes(nodes)
+    return trajectory
+
+def nodeValues(node):
+    'Node data (time, x, y, w, h, nodeType), as returned by selectValues'
+    try: size=(node.size.x, node.size.y)
+    except AttributeError: size=(numpy.nan, numpy.nan)
+    return (node.time, node.pos.x, node.pos.y)+size+(node.nodeType.value,)
+
+def checkTrajectory(trajectory):
+    'Compare selectNodes and selectValues with selectNode, for all the frames of the trajectory and'
+    'some frames before and after it'
+    frames=numpy.arange(trajectory.start-5, trajectory.end+6)
+    'Reference: selectNode without the frame cache (the scalar interpolation of each frame)'
+    frameCache=Trajectory.frameCache
+    Trajectory.frameCache=None
+    try: reference=numpy.array([nodeValues(trajectory.selectNode(f)) for f in frames.tolist()], float)
+    finally: Trajectory.frameCache=frameCache
+    values=numpy.column_stack(trajectory.selectNodes(frames)).astype(float)
+    assert numpy.array_equal(values[:,0], reference[:,0])
+    assert numpy.array_equal(values[:,5], reference[:,5])
+    assert numpy.allclose(values[:,1:5], reference[:,1:5], rtol=1e-9, atol=1e-9, equal_nan=True)
+    'selectValues (using the frame cache)'
+    values=numpy.array([trajectory.selectValues(f) for f in frames.tolist()], float)
+    assert numpy.array_equal(values[:,5], reference[:,5])
+    assert numpy.allclose(values[:,:5], reference[:,:5], rtol=1e-9, atol=1e-9, equal_nan=True)
+
+for windowNodes in (0, 10):
+    Interpolator.windowNodes=windowNodes
+    for method in sorted(Interpolator.interpolatorMethod):
+        for rectangle in (False, True):
+            for n in (1, 2, 3, 10, 60):
+                checkTrajectory(randomTrajectory(n, method, rectangle))
+            print('Method '+method+(' rectangle' if rectangle else ' point')+' window '+str(windowNodes)+' OK')
+Interpolator.windowNodes=0
@@ -0,0 +1,125 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the LabelMe interpolation (LM) with the vanishing point geometry computed once for each pair
+#of nodes (see Interpolator.segmentLabelMe): the frames interpolated one by one and in arrays must
+#be the same as with the original implementation (below), which computes everything for each
+#frame, also after editing the trajectory (as the original implementation, computations are done in
+#float32, so the results must be identical).
+#Run with: python -m Trajectories.Trajectory.LabelMeTest
+
+import numpy
+from .Node import coord, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+rng=numpy.random.default_rng(0)
+
+def labelMe(interpolator, node1, node2, frame):
+    'Original implementation of Interpolator.interpolateRectangleLabelMe'
+    p1_0=numpy.matrix([node1.points[0].x, node1.points[0].y, 1], numpy.float32) 
+    p1_1=numpy.matrix([node1.points[1].x, node1.points[1].y, 1], numpy.float32)
+    p2_0=numpy.matrix([node2.points[0].x, node2.points[0].y, 1], numpy.float32)
+    p2_1=numpy.matrix([node2.points[1].x, node2.points[1].y, 1], numpy.float32)
+    l0=numpy.cross(p1_0, p2_0)
+    l1=numpy.cross(p1_1, p2_1)
+    pC=numpy.cross(l0, l1)
+    linear=lambda: interpolator.interpolateRectangleLinear(node1, node2, frame)
+    if numpy.abs(pC[0,2])<=0.0001*numpy.abs(pC[0,0]) or numpy.abs(pC[0,2])<=0.0001*numpy.abs(pC[0,1]):
+        return linear()
+    pv=(pC[0,0]/pC[0,2], pC[0,1]/pC[0,2])
+    for p1, p2 in ((p1_0, p2_0), (p1_1, p2_1)):
+        for c in (0, 1):
+            if (pv[c]<=p1[0,c] and pv[c]>=p2[0,c]) or (pv[c]>=p1[0,c] and pv[c]<=p2[0,c]):
+                return linear()
+    for p2 in (p2_0, p2_1):
+        for c in (0, 1):
+            if numpy.abs(p2[0,c]-pv[c])<0.01: return linear()
+    v0=((p2_0[0,0]-p1_0[0,0])/(pv[0]-p2_0[0,0]), (p2_0[0,1]-p1_0[0,1])/(pv[1]-p2_0[0,1]))
+    v1=((p2_1[0,0]-p1_1[0,0])/(pv[0]-p2_1[0,0]), (p2_1[0,1]-p1_1[0,1])/(pv[1]-p2_1[0,1]))
+    f=interpolator.interpolatorFactor(frame, node1.time, node2.time)
+    for v in v0+v1:
+        if numpy.abs(1+v*f)<1e-5: return linear()
+    p0=((p1_0[0,0]+pv[0]*v0[0]*f)/(1+v0[0]*f), (p1_0[0,1]+pv[1]*v0[1]*f)/(1+v0[1]*f))
+    p1=((p1_1[0,0]+pv[0]*v1[0]*f)/(1+v1[0]*f), (p1_1[0,1]+pv[1]*v1[1]*f)/(1+v1[1]*f))
+    return coord(0.5*(p0[0]+p1[0]), 0.5*(p0[1]+p1[1])), coord((p0[0]-p1[0]), (p0[1]-p1[1]))
+
+def randomNode(frame, previous=None):
+    'Random rectangle. Some nodes keep the size of the previous one (parallel lines), or move it'
+    'towards a vanishing point (depth changes)'
+    kind=rng.integers(0, 3)
+    if previous is None or kind==0:
+        return RectangleNode(frame, coord(int(rng.integers(50, 600)), int(rng.integers(50, 400))),
+                             coord(int(rng.integers(5, 120)), int(rng.integers(5, 120))))
+    if kind==1:
+        return RectangleNode(frame, coord(previous.pos.x+int(rng.integers(-30, 30)), previous.pos.y),
+                             coord(previous.size.x, previous.size.y))
+    s=float(rng.uniform(0.5, 1.5))
+    v=coord(float(rng.uniform(0, 640)), float(rng.uniform(0, 480)))
+    return RectangleNode(frame, coord(v.x+(previous.pos.x-v.x)*s, v.y+(previous.pos.y-v.y)*s),
+                         coord(previous.size.x*s, previous.size.y*s))
+
+def checkFrames(trajectory):
+    'Compare the interpolated frames (one by one and in arrays) with the original implementation'
+    trajectory.refreshInterpolator()
+    nodes=list(trajectory.nodes)
+    time, x, y, w, h, nodeType=trajectory.selectRange()
+    for i, fr in enumerate(time.tolist()):
+        k=max(0, min(numpy.searchsorted([n.time for n in nodes], fr, 'right')-1, len(nodes)-2))
+        if fr==nodes[k].time or fr==nodes[k+1].time: continue
+        'Nodes store the absolute value of the size (see RectangleNode)'
+        reference=RectangleNode(fr, *labelMe(trajectory.interpolator, nodes[k], nodes[k+1], fr))
+        expected=(reference.pos.x, reference.pos.y, reference.size.x, reference.size.y)
+        node=nodes[k].interpolateNode(nodes[k+1], trajectory.interpolator, fr)
+        assert (x[i], y[i], w[i], h[i])==expected, fr
+        assert (node.pos.x, node.pos.y, node.size.x, node.size.y)==expected, fr
+
+linear=labelMePairs=0
+for storage in ('list', 'columnar'):
+    for k in range(20):
+        frames=numpy.sort(rng.choice(300, int(rng.integers(2, 12)), replace=False)).tolist()
+        nodes=[randomNode(frames[0])]
+        for f in frames[1:]: nodes.append(randomNode(f, nodes[-1]))
+        trajectory=Trajectory(nodes[0], 'LM', storage)
+        trajectory.setNodes(nodes)
+        checkFrames(trajectory)
+        linear+=int(trajectory.interpolator.segments[2][5][:-1].sum())
+        labelMePairs+=int((~trajectory.interpolator.segments[2][5][:-1]).sum())
+        'Edit the trajectory: only the pairs of the nodes changed are computed again'
+        for j in range(5):
+            frame=int(rng.integers(trajectory.start-10, trajectory.end+10))
+            i=max(0, min(trajectory.bisectNode(frame), len(trajectory.nodes)-1))
+            if rng.random()<0.3 and len(trajectory.nodes)>2:
+                trajectory.deleteNode(trajectory.nodes[i].time)
+            else:
+                trajectory.addNode(randomNode(frame, trajectory.nodes[i]))
+            checkFrames(trajectory)
+    print(storage+' storage OK')
+'Both LabelMe and the linear fallback are tested'
+assert linear>0 and labelMePairs>0
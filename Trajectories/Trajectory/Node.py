@@ -32,6 +32,7 @@ __metaclass__=type
 import cv2
 from enum import Enum
 import copy
+import math
 'XML support'
 from xml.etree.ElementTree import SubElement
 
@@ -64,6 +65,21 @@ def CreateNodeFromXML(XMLNode):
         s=CreateCoordFromXML(XMLCoord)
         return RectangleNode(nodeTime, c, s)
 
+def XMLEscape(text):
+    'Escape an attribute value for XML text, as done by ElementTree when writing XML files'
+    for c, e in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'),
+                 ('\r', '&#13;'), ('\n', '&#10;'), ('\t', '&#09;')):
+        if c in text: text=text.replace(c, e)
+    return text
+
+def CreateNodeFromValues(nodeTime, x, y, w=None, h=None, nodeType=None):
+    'Create a node from its coordinate values. If the size is not given (or it is NaN), a point'
+    'node is created'
+    if nodeType is None: nodeType=NodeType.real
+    if w is None or math.isnan(w):
+        return PointNode(nodeTime, coord(x, y), nodeType)
+    return RectangleNode(nodeTime, coord(x, y), coord(w, h), nodeType)
+
 class coord:
     'A pair of values defining a point in 2D' 
     def __init__(self, x, y):
@@ -73,6 +89,10 @@ class coord:
     def XMLData(self, element, tag):
         'Write coordinate data in XML file'
         return SubElement(element, tag, x=str(self.x), y=str(self.y))
+
+    def XMLText(self, tag):
+        'Same as XMLData, returning the XML text of the element'
+        return '<'+tag+' x="'+XMLEscape(str(self.x))+'" y="'+XMLEscape(str(self.y))+'" />'
         
     def __str__(self):
         return 'X:'+str(self.x)+' Y:'+str(self.y)
@@ -137,6 +157,16 @@ class coord:
         'Round float values to 2 decimal place'
         self.x=round(self.x, ndigits)
         self.y=round(self.y, ndigits)
+
+    def scaleCoord(self, factor, ndigits=None):
+        'Return the coordinates multiplied by factor. If ndigits is given, values are rounded to'
+        'ndigits decimal places, and integer values are converted to int'
+        c=self*factor
+        if ndigits is not None:
+            c.roundCoord(ndigits)
+            if c.x==int(c.x): c.x=int(c.x)
+            if c.y==int(c.y): c.y=int(c.y)
+        return c
         
     
 class NodeType(Enum):
@@ -189,6 +219,10 @@ class PointNode:
     
     def roundCoord(self, ndigits=0):
         self.pos.roundCoord(ndigits)
+
+    def scaleNode(self, factor, ndigits=None):
+        'Return a copy of the node with its coordinates scaled (see coord.scaleCoord)'
+        return PointNode(self.time, self.pos.scaleCoord(factor, ndigits), self.nodeType)
     
     def XMLData(self, element, tag):
         'Write node data to a XML file'
@@ -196,6 +230,10 @@ class PointNode:
         self.pos.XMLData(e, 'pos')
         return e
 
+    def XMLText(self, tag):
+        'Same as XMLData, returning the XML text of the element'
+        return '<'+tag+' time="'+str(self.time)+'" type="P">'+self.pos.XMLText('pos')+'</'+tag+'>'
+
     def interpolateNode(self, node2, interpolator, frame):
         'Compute the coordinates of an intermediate node between 2 point nodes'
         pos, NodeType=interpolator.interpolatePoint(self, node2, frame)
@@ -300,6 +338,10 @@ class RectangleNode(PointNode):
     def roundCoord(self, ndigits=0):
         super(RectangleNode, self).roundCoord(ndigits)
         self.size.roundCoord(ndigits)
+
+    def scaleNode(self, factor, ndigits=None):
+        'Return a copy of the node with its coordinates scaled (see coord.scaleCoord)'
+        return RectangleNode(self.time, self.pos.scaleCoord(factor, ndigits), self.size.scaleCoord(factor, ndigits), self.nodeType)
     
     def XMLData(self, element, tag):
         'Write node data to a XML file'
@@ -308,6 +350,11 @@ class RectangleNode(PointNode):
         self.size.XMLData(e, 'size')
         return e
 
+    def XMLText(self, tag):
+        'Same as XMLData, returning the XML text of the element'
+        return '<'+tag+' time="'+str(self.time)+'" type="R">'+self.pos.XMLText('pos')+ \
+            self.size.XMLText('size')+'</'+tag+'>'
+
     def interpolateNode(self, node2, interpolator, frame):
         'Compute the coordinates of an intermediate node between 2 rectangle nodes'
         pos, size, NodeType=interpolator.interpolateRectangle(self, node2, frame)
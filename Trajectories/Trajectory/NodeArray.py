@@ -0,0 +1,203 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Columnar storage for the nodes of a trajectory.
+
+__metaclass__=type
+
+import numpy
+from .Node import NodeType, CreateNodeFromValues
+
+def readOnly(column, n):
+    'Return a read-only view of the first n values of the column: writing into the data returned by'
+    'getArrays raises an exception, instead of modifying the nodes'
+    view=column[:n]
+    view.flags.writeable=False
+    return view
+
+class NodeArray:
+    '''Columnar (numpy based) storage for the nodes of a trajectory.
+    Node data is stored in parallel arrays (time, x, y, w, h and nodeType), sorted by time. It
+    behaves as the list of nodes used by Trajectory: indexing and iteration return node objects,
+    which are created on demand as copies of the stored data. Thus, modifying a returned node
+    does not modify the stored data (use item assignment instead).
+    For point nodes, w and h are stored as NaN.'''
+
+    'Initial number of nodes reserved for a new array'
+    initialCapacity=8
+
+    def __init__(self, nodes=()):
+        self.length=0
+        'True if the columns are arrays given to setArrays without copying them (see own)'
+        self.shared=False
+        self.setNodes(nodes)
+
+    def allocate(self, capacity):
+        'Reserve space for capacity nodes, keeping the nodes already stored'
+        'intMask stores which coordinates were integer values, so that the nodes are created'
+        'with the same type of data they were stored with (bits for x, y, w and h)'
+        columns={
+            'time':numpy.int64, 'x':numpy.float64, 'y':numpy.float64, 'w':numpy.float64,
+            'h':numpy.float64, 'nodeType':numpy.int8,
+            'intMask':numpy.uint8}
+        for name, dtype in columns.items():
+            a=numpy.empty(capacity, dtype)
+            try: a[:self.length]=getattr(self, name)[:self.length]
+            except AttributeError: pass
+            setattr(self, name, a)
+
+    def setArrays(self, t, x, y, w=None, h=None, nodeType=None, intMask=None, copy=True):
+        'Replace the content of the array with the data given (numpy arrays or lists, sorted by time)'
+        'If copy is False, the arrays given are used as the columns, without copying them (for'
+        'instance, the memory mapped data of a binary file, see BinaryFile). Then, the arrays given'
+        'must not change while they are used, and they are copied before the first change (see own)'
+        n=len(t)
+        if not copy:
+            self.length=n
+            self.time=numpy.asarray(t, numpy.int64)
+            self.x=numpy.asarray(x, numpy.float64)
+            self.y=numpy.asarray(y, numpy.float64)
+            self.w=numpy.full(n, numpy.nan) if w is None else numpy.asarray(w, numpy.float64)
+            self.h=numpy.full(n, numpy.nan) if h is None else numpy.asarray(h, numpy.float64)
+            self.nodeType=numpy.full(n, NodeType.real.value, numpy.int8) if nodeType is None else numpy.asarray(nodeType, numpy.int8)
+            self.intMask=numpy.zeros(n, numpy.uint8) if intMask is None else numpy.asarray(intMask, numpy.uint8)
+            self.shared=True
+            return
+        self.length=0
+        self.shared=False
+        self.allocate(max(n, self.initialCapacity))
+        self.length=n
+        self.time[:n]=t
+        self.x[:n]=x
+        self.y[:n]=y
+        self.w[:n]=numpy.nan if w is None else w
+        self.h[:n]=numpy.nan if h is None else h
+        self.nodeType[:n]=NodeType.real.value if nodeType is None else nodeType
+        self.intMask[:n]=0 if intMask is None else intMask
+
+    def setNodes(self, nodes):
+        'Replace the content of the array with the nodes given (sorted by time)'
+        values=[self.nodeValues(node) for node in nodes]
+        self.setArrays(*(zip(*values) if values else [()]*7))
+
+    def getArrays(self):
+        'Return the node data as numpy arrays (t, x, y, w, h). For point nodes, w and h are None'
+        'The arrays are read-only views of the internal storage (see readOnly)'
+        n=self.length
+        if n>0 and numpy.isnan(self.w[0]):
+            return readOnly(self.time, n), readOnly(self.x, n), readOnly(self.y, n), None, None
+        return tuple(readOnly(c, n) for c in (self.time, self.x, self.y, self.w, self.h))
+
+    def own(self):
+        'Copy the columns used without copying them (see setArrays), before changing them'
+        if self.shared:
+            self.allocate(max(self.length, self.initialCapacity))
+            self.shared=False
+
+    def __len__(self):
+        return self.length
+
+    def index(self, i):
+        'Convert index i to a positive index, checking the bounds as a list does'
+        if i<0: i+=self.length
+        if not 0<=i<self.length:
+            raise IndexError('NodeArray index out of range')
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.length))]
+        i=self.index(i)
+        mask=int(self.intMask[i])
+        values=[]
+        for bit, c in enumerate((self.x, self.y, self.w, self.h)):
+            v=c[i].item()
+            values.append(int(v) if mask & (1<<bit) else v)
+        return CreateNodeFromValues(int(self.time[i]), *values, nodeType=NodeType(int(self.nodeType[i])))
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def __setitem__(self, i, node):
+        self.store(self.index(i), node)
+
+    def nodeValues(self, node):
+        'Return the data stored for node: (time, x, y, w, h, nodeType, intMask)'
+        try: values=(node.pos.x, node.pos.y, node.size.x, node.size.y)
+        except AttributeError: values=(node.pos.x, node.pos.y, numpy.nan, numpy.nan)
+        mask=0
+        for bit, v in enumerate(values):
+            if isinstance(v, (int, numpy.integer)): mask|=1<<bit
+        return (node.time,)+values+(node.nodeType.value, mask)
+
+    def store(self, i, node):
+        'Write the data of node at position i'
+        self.own()
+        columns=(self.time, self.x, self.y, self.w, self.h, self.nodeType, self.intMask)
+        for c, v in zip(columns, self.nodeValues(node)):
+            c[i]=v
+
+    def insert(self, i, node):
+        'Insert node before position i (same behaviour as list.insert)'
+        if i<0: i=max(0, i+self.length)
+        i=min(i, self.length)
+        self.own()
+        if self.length==len(self.time):
+            self.allocate(2*len(self.time))
+        for c in (self.time, self.x, self.y, self.w, self.h, self.nodeType, self.intMask):
+            c[i+1:self.length+1]=c[i:self.length]
+        self.length+=1
+        self.store(i, node)
+
+    def append(self, node):
+        self.insert(self.length, node)
+
+    def pop(self, i=-1):
+        i=self.index(i)
+        node=self[i]
+        self.own()
+        for c in (self.time, self.x, self.y, self.w, self.h, self.nodeType, self.intMask):
+            c[i:self.length-1]=c[i+1:self.length]
+        self.length-=1
+        return node
+
+    def sort(self):
+        'Sort the nodes by time. As list.sort, the sorting is stable'
+        n=self.length
+        self.own()
+        order=numpy.argsort(self.time[:n], kind='stable')
+        for c in (self.time, self.x, self.y, self.w, self.h, self.nodeType, self.intMask):
+            c[:n]=c[:n][order]
+
+    def count(self, node):
+        'Return the number of nodes with the same time as node (see PointNode comparison)'
+        return int(numpy.count_nonzero(self.time[:self.length]==node.time))
+
+    def bisectTime(self, frame):
+        'Same as bisect.bisect_left on the list of nodes, for a node at the given frame'
+        return int(numpy.searchsorted(self.time[:self.length], frame, 'left'))
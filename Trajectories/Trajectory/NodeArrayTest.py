@@ -0,0 +1,156 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that the columnar node storage (NodeArray) behaves as the list of nodes it replaces:
+#integer and float coordinates are kept, nodes are returned as copies, and list operations give
+#the same results. Run with: python -m Trajectories.Trajectory.NodeArrayTest
+
+import bisect
+import numpy
+from .Node import coord, PointNode, RectangleNode, NodeType
+from .NodeArray import NodeArray
+from .Trajectory import Trajectory
+
+def nodeData(node):
+    'Node data, including the type of each coordinate'
+    values=[node.time, node.pos.x, node.pos.y]
+    try: values+=[node.size.x, node.size.y]
+    except AttributeError: pass
+    return [(type(v), v) for v in values]+[node.nodeType]
+
+def checkNodes(array, nodes):
+    'Check that the array holds the same nodes than the list'
+    assert len(array)==len(nodes)
+    assert [nodeData(n) for n in array]==[nodeData(n) for n in nodes]
+    for n in nodes:
+        assert array.bisectTime(n.time)==bisect.bisect_left(nodes, PointNode(n.time))
+
+'Nodes with integer and float coordinates (as read from annotation files)'
+rectangles=[RectangleNode(0, coord(10, 20), coord(30, 40)),
+            RectangleNode(5, coord(10.5, 20), coord(30, 40.25), NodeType.interpolated),
+            RectangleNode(9, coord(-3, 7.75), coord(1.5, 2))]
+points=[PointNode(2, coord(1, 2)), PointNode(4, coord(1.5, -2)), PointNode(8, coord(0.0, 3))]
+for nodes in (rectangles, points):
+    array=NodeArray(nodes)
+    checkNodes(array, nodes)
+    assert array[-1].time==nodes[-1].time
+    assert [n.time for n in array[0:2]]==[n.time for n in nodes[0:2]]
+    'Point nodes are stored without size'
+    t, x, y, w, h=array.getArrays()
+    assert (w is None)==(nodes is points)
+    'The arrays are read-only: writing into them raises an exception, and the nodes do not change'
+    for c in (t, x, y, w, h):
+        if c is None: continue
+        assert not c.flags.writeable
+        try:
+            c[0]=1000
+            assert False, 'Array not read-only'
+        except ValueError: pass
+    checkNodes(array, nodes)
+
+    'Returned nodes are copies: modifying them does not modify the stored data'
+    node=array[1]
+    node.pos.x=1000
+    node.time=1000
+    assert nodeData(array[1])==nodeData(nodes[1])
+    'Item assignment modifies the stored data'
+    node=array[1]
+    node.pos=coord(7, 8)
+    array[1]=node
+    assert nodeData(array[1])==nodeData(node)
+    assert array[1].pos.x==7 and type(array[1].pos.x) is int
+    array[1]=nodes[1]
+
+    'List operations: the array grows over its initial capacity'
+    reference=list(nodes)
+    for k in range(3*NodeArray.initialCapacity):
+        node=PointNode(100+k, coord(k, k/2.0)) if nodes is points else RectangleNode(100+k, coord(k, k/2.0), coord(k+1, 3))
+        array.append(node)
+        reference.append(node)
+    node=PointNode(3, coord(4, 4)) if nodes is points else RectangleNode(3, coord(4, 4), coord(4, 4.5))
+    array.insert(1, node)
+    reference.insert(1, node)
+    checkNodes(array, reference)
+    assert nodeData(array.pop(0))==nodeData(reference.pop(0))
+    assert nodeData(array.pop())==nodeData(reference.pop())
+    checkNodes(array, reference)
+    'Sorting is stable, as for lists'
+    array.insert(0, reference[-1])
+    reference.insert(0, reference[-1])
+    array.sort()
+    reference.sort()
+    checkNodes(array, reference)
+    assert array.count(reference[-1])==reference.count(reference[-1])==2
+    print(('Point' if nodes is points else 'Rectangle')+' nodes OK')
+
+'Trajectories with columnar storage give the same nodes than with list storage'
+for nodes in (rectangles, points):
+    trajectories=[]
+    for storage in ('list', 'columnar'):
+        trajectory=Trajectory(nodes[0], 'LI', storage)
+        for n in nodes[1:]: trajectory.addNode(n)
+        trajectories.append(trajectory)
+    for f in range(-2, 12):
+        assert nodeData(trajectories[0].selectNode(f))==nodeData(trajectories[1].selectNode(f))
+    'Nodes read from the trajectory are copies'
+    node=trajectories[1].selectNode(nodes[0].time)
+    node.pos.x=1000
+    assert trajectories[1].selectNode(nodes[0].time).pos.x==nodes[0].pos.x
+    t0=trajectories[0].getArrays()
+    t1=trajectories[1].getArrays()
+    for a, b in zip(t0, t1):
+        assert (a is None and b is None) or numpy.array_equal(a, b)
+        assert a is None or not a.flags.writeable
+print('Trajectory storage OK')
+
+'Arrays used without copying them (as the memory mapped data of binary files) are copied before'
+'the first change, leaving the original data unchanged'
+for nodes in (rectangles, points):
+    values=NodeArray(nodes)
+    columns=[None if c is None else c.copy() for c in values.getArrays()]+[values.intMask[:len(nodes)].copy()]
+    for c in columns:
+        if c is not None: c.flags.writeable=False
+    for change in ('store', 'insert', 'pop', 'sort'):
+        array=NodeArray()
+        array.setArrays(*columns[:5], None, columns[5], copy=False)
+        reference=list(nodes)
+        assert numpy.shares_memory(array.x, columns[1]), 'Arrays copied'
+        checkNodes(array, reference)
+        if change=='store':
+            array[1]=reference[1]=reference[0]
+        elif change=='insert':
+            array.insert(1, reference[0])
+            reference.insert(1, reference[0])
+        elif change=='pop':
+            assert nodeData(array.pop(0))==nodeData(reference.pop(0))
+        else:
+            array.sort()
+        assert not numpy.shares_memory(array.x, columns[1])
+        checkNodes(array, reference)
+    for a, b in zip(columns, values.getArrays()):
+        assert (a is None and b is None) or numpy.array_equal(a, b), 'Original arrays changed'
+print('Shared arrays OK')
@@ -0,0 +1,99 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check that the path of a trajectory stored by drawPath (for updatable interpolators) is never
+#stale: after moving, adding and deleting nodes, with and without batchEdit, changing the
+#interpolation method and replacing all the nodes, the path drawn must be the same than the path
+#computed again from the current nodes.
+#Run with: python -m Trajectories.Trajectory.PathCacheTest
+
+import numpy
+from .Node import coord, PointNode, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+rng=numpy.random.default_rng(0)
+methods=sorted(Interpolator.interpolatorMethod)
+
+def randomNode(frame, rectangle):
+    pos=coord(int(rng.integers(0, 400)), int(rng.integers(0, 300)))
+    if rectangle: return RectangleNode(frame, pos, coord(int(rng.integers(5, 100)), int(rng.integers(5, 100))))
+    return PointNode(frame, pos)
+
+def draw(trajectory):
+    img=numpy.zeros((300, 400, 3), numpy.uint8)
+    trajectory.drawPath(img)
+    return img
+
+def checkPath(trajectory):
+    'The path drawn (stored, if any) must be the same than the path drawn after removing it'
+    img=draw(trajectory)
+    path=getattr(trajectory, 'path', None)
+    assert (path is not None)==trajectory.interpolator.updatable
+    'The stored path is used while the trajectory does not change'
+    draw(trajectory)
+    assert getattr(trajectory, 'path', None) is path
+    try: del trajectory.path
+    except AttributeError: pass
+    assert numpy.array_equal(img, draw(trajectory))
+    if path is not None: assert numpy.array_equal(path, trajectory.path)
+
+def edit(trajectory, rectangle):
+    'Move, add or delete a random node'
+    operation=rng.integers(0, 3)
+    if operation==0:
+        frame=trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time
+        trajectory.addNode(randomNode(frame, rectangle))
+    elif operation==1:
+        trajectory.addNode(randomNode(int(rng.integers(trajectory.start-20, trajectory.end+20)), rectangle))
+    elif len(trajectory.nodes)>2:
+        trajectory.deleteNode(trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time)
+
+for windowNodes in (0, 8):
+    Interpolator.windowNodes=windowNodes
+    for storage in ('list', 'columnar'):
+        for rectangle in (True, False):
+            for method in methods:
+                nodes=[randomNode(f, rectangle) for f in range(0, 400, 10)]
+                trajectory=Trajectory(nodes[0], method, storage)
+                trajectory.setNodes(nodes)
+                checkPath(trajectory)
+                for k in range(40):
+                    edit(trajectory, rectangle)
+                    checkPath(trajectory)
+                    if k%10==0:
+                        with trajectory.batchEdit():
+                            for j in range(5): edit(trajectory, rectangle)
+                        checkPath(trajectory)
+                'Changing the method, and replacing all the nodes'
+                trajectory.updateInterpolator(str(rng.choice(methods)))
+                checkPath(trajectory)
+                trajectory.setNodes([randomNode(f, rectangle) for f in range(5, 300, 15)])
+                checkPath(trajectory)
+        print('Window '+str(windowNodes)+' '+storage+' OK')
+Interpolator.windowNodes=0
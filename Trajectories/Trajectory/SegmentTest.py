@@ -0,0 +1,92 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check the data of the pairs of nodes of the GI and LM interpolators (see
+#Interpolator.updateSegments) after random editions of the trajectory: the data updated
+#incrementally, and the interpolated nodes, must be the same than when built again from the nodes.
+#Several nodes are added and deleted in the same update (batchEdit), including the first and last
+#nodes and consecutive nodes.
+#Run with: python -m Trajectories.Trajectory.SegmentTest
+
+import numpy
+from .Node import coord, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+rng=numpy.random.default_rng(0)
+
+def randomNode(frame):
+    return RectangleNode(frame, coord(int(rng.integers(0, 640)), int(rng.integers(0, 480))),
+                         coord(int(rng.integers(5, 200)), int(rng.integers(5, 200))))
+
+def edit(trajectory):
+    'Move, add or delete a random node (or the first or last node)'
+    operation=rng.integers(0, 4)
+    times=[node.time for node in trajectory.nodes]
+    if operation==0:
+        trajectory.addNode(randomNode(times[int(rng.integers(0, len(times)))]))
+    elif operation==1:
+        trajectory.addNode(randomNode(int(rng.integers(trajectory.start-30, trajectory.end+30))))
+    elif len(times)>3:
+        'Delete the first or last node, or a random one'
+        if operation==2: trajectory.deleteNode(times[int(rng.choice([0, -1]))])
+        else: trajectory.deleteNode(times[int(rng.integers(0, len(times)))])
+
+def checkSegments(trajectory):
+    'Compare the data of the pairs and the interpolated nodes with a trajectory built again'
+    trajectory.refreshInterpolator()
+    reference=Trajectory(trajectory.nodes[0], trajectory.InterpolationType())
+    reference.setNodes(list(trajectory.nodes))
+    reference.refreshInterpolator()
+    interpolatorType, segT, data=trajectory.interpolator.segments
+    referenceType, referenceT, referenceData=reference.interpolator.segments
+    assert interpolatorType==referenceType and numpy.array_equal(segT, referenceT)
+    for a, b in zip(data, referenceData):
+        assert a.shape==b.shape
+        assert numpy.allclose(a, b, rtol=1e-12, atol=1e-12, equal_nan=True)
+    values=trajectory.selectRange(trajectory.start-5, trajectory.end+5)
+    referenceValues=reference.selectRange(trajectory.start-5, trajectory.end+5)
+    for a, b in zip(values, referenceValues):
+        assert numpy.allclose(a, b, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+Trajectory.frameCache=None
+for method in ('GI', 'LM'):
+    for storage in ('list', 'columnar'):
+        for length in (2, 5, 60):
+            nodes=[randomNode(f) for f in range(0, 10*length, 10)]
+            trajectory=Trajectory(nodes[0], method, storage)
+            trajectory.setNodes(nodes)
+            checkSegments(trajectory)
+            for k in range(60):
+                if k%3==0:
+                    with trajectory.batchEdit():
+                        for j in range(int(rng.integers(2, 8))): edit(trajectory)
+                else:
+                    edit(trajectory)
+                checkSegments(trajectory)
+        print('Method '+method+' '+storage+' OK')
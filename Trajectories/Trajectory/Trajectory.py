@@ -33,57 +33,111 @@ __metaclass__=type
 'Module to work with sorted lists'
 import bisect
 import math
+import numpy
+'Context manager for batch edition'
+from contextlib import contextmanager
+'Drawing functions'
+import cv2
 'XML support'
 from xml.etree.ElementTree import SubElement
 
 from .Interpolator import Interpolator
 from .Exceptions import TrajectoryException
-from .Node import PointNode, NodeType, CreateNodeFromXML
+from .Node import PointNode, NodeType, CreateNodeFromXML, CreateNodeFromValues
+from .NodeArray import NodeArray
+from .FrameCache import FrameCache
 
-def CreateTrajectoryFromXML(XMLTrajectory, interType=None):
-    'Read trajectory data from XML file'
-    
-    'Find all nodes of the trajectory'
-    XMLNodes=XMLTrajectory.findall('Node')
-    'Create first node of the trajectory'
-    node=CreateNodeFromXML(XMLNodes[0])
-    'Create the trajectory'
-    trajectory=Trajectory(node, interType)
-    total=len(XMLNodes)
-    'and add the rest of nodes'
-    duplicates=0
-    for i in range(1, total):
-        'Read node data'
-        node=CreateNodeFromXML(XMLNodes[i])
-        'Check if time is already in the trajectory'
-        if trajectory.nodes.count(node)!=0:
-            'If node time is already in the list of nodes, do not include this'
-            'new node in the trajectory'
-            duplicates+=1
-            continue
-        'For the intermediate nodes, we need not update trajectory data, so it is'
-        'enough to append the nodes to the trajectory'
-        trajectory.nodes.append(node)
+def CreateTrajectoryFromXML(XMLTrajectory, interType=None, scale=1.0):
+    'Read trajectory data from XML file. The node coordinates are multiplied by scale'
     
+    'Read all nodes of the trajectory'
+    nodes=[CreateNodeFromXML(XMLNode) for XMLNode in XMLTrajectory.findall('Node')]
+    'Check if times are repeated. If a node time is already in the list of nodes, do not include'
+    'this new node in the trajectory (the first node read for each frame is kept)'
+    times=set()
+    uniqueNodes=[]
+    for node in nodes:
+        if not node.time in times:
+            times.add(node.time)
+            uniqueNodes.append(node)
+    duplicates=len(nodes)-len(uniqueNodes)
     if duplicates>0: print("Warning: Found "+str(duplicates)+ " duplicated nodes in trajectory. Check annotation file.")
-    'Check trajectory consistency.'
-    trajectory.checkConsistency()
-    'If the trajectory has only one node, not doing the two loops will five the correct structure'
-    'for the trajectory'
+    'Create the trajectory, and add all the nodes at once (this also sorts the nodes and updates'
+    'trajectory data)'
+    trajectory=Trajectory(uniqueNodes[0], interType)
+    trajectory.setNodes(uniqueNodes)
+    if scale!=1.0:
+        'Keep the trajectory read from the file, to write it back without rounding (see setOriginal)'
+        original=trajectory
+        nodes=[node.scaleNode(scale) for node in original.nodes]
+        trajectory=Trajectory(nodes[0], interType)
+        trajectory.setNodes(nodes)
+        trajectory.setOriginal(original, scale)
     return trajectory
 
+def IterXMLTrajectories(XMLEvents):
+    'Generator with the trajectories (Trajectory elements, children of the root element) of an'
+    'annotation file, read while the file is parsed. XMLEvents must be the iterator returned by'
+    'ElementTree.iterparse(XMLFile, (\'start\', \'end\')). Each trajectory is removed from the XML'
+    'tree when the next one is requested, so that only one trajectory is kept in memory at a time'
+    root=None
+    depth=0
+    for event, element in XMLEvents:
+        if event=='start':
+            if root is None: root=element
+            depth+=1
+        else:
+            depth-=1
+            if depth==1 and element.tag=='Trajectory':
+                yield element
+                'Remove the trajectories already read'
+                root.clear()
+
 class Trajectory:
     'List of node positions for an object'
 
+    '''Default storage for the nodes of the trajectory. Values:
+    - 'list': Python list of node objects
+    - 'columnar': numpy arrays with the node coordinates (see NodeArray). Intended for large
+      trajectories, where the memory used by node objects is too large
+    '''
+    defaultStorage='list'
+
+    'Cache of interpolated nodes, shared by all the trajectories (None to disable it)'
+    frameCache=FrameCache()
+
+    'Decimal places of the coordinates written with a scale (see XMLWrite)'
+    scaleDigits=2
+
     'List of nodes defining the nodes of the trajectory'
-    def __init__(self, node, interType=None):
+    def __init__(self, node, interType=None, storage=None):
         'Constructor: We can use the constructor to check whether the node type is correct'
         self.start=node.time
         self.end=node.time
+        'If no storage is given, use the default one'
+        if storage is None:
+            storage=self.defaultStorage
         'Add the first node to the nodes of the trajectory'
-        self.nodes=[node]
+        if storage=='list':
+            self.nodes=[node]
+        elif storage=='columnar':
+            self.nodes=NodeArray([node])
+        else:
+            raise TrajectoryException('Node storage '+storage+' not implemented')
         'Construct the interpolator without data'
         self.interpolator=Interpolator(interType)
+        'The interpolator data is only updated when needed (see refreshInterpolator). This flag'
+        'indicates that the trajectory has changed since the last update'
+        self.dirty=True
+        'Frames of the nodes changed since the last update (None if the whole interpolator must be'
+        'updated)'
+        self.changes=None
+        'Number of nested batchEdit blocks'
+        self.batchLevel=0
+        'For list storage, columnar copy of the node data (see getArrays). It is updated with each'
+        'node added or deleted, so that updating the interpolator does not need to read all the'
+        'nodes again (None if it must be built again)'
+        self.arrays=None
         
     def __str__(self):
         s=''
@@ -93,32 +147,78 @@ class Trajectory:
     
     'Rich comparison operators: needed for trajectories sorting using'
     'trajectory start. In this case, sort by trajectory starting time'
-    def __eq__(self, tr2): return self.nodes[0].time==tr2.nodes[0].time
-    def __ne__(self, tr2): return self.nodes[0].time!=tr2.nodes[0].time
-    def __gt__(self, tr2): return self.nodes[0].time> tr2.nodes[0].time
-    def __ge__(self, tr2): return self.nodes[0].time>=tr2.nodes[0].time
-    def __lt__(self, tr2): return self.nodes[0].time< tr2.nodes[0].time
-    def __le__(self, tr2): return self.nodes[0].time<=tr2.nodes[0].time
+    'NOTE: start is always the time of the first node'
+    def __eq__(self, tr2): return self.start==tr2.start
+    def __ne__(self, tr2): return self.start!=tr2.start
+    def __gt__(self, tr2): return self.start> tr2.start
+    def __ge__(self, tr2): return self.start>=tr2.start
+    def __lt__(self, tr2): return self.start< tr2.start
+    def __le__(self, tr2): return self.start<=tr2.start
     
-    def keyCompare(self): return self.nodes[0].time
+    def keyCompare(self): return self.start
    
     def InterpolationType(self):
         return self.interpolator.interpolatorType
     
-    def XMLData(self, element, tag, complete=False):
-        'Write trajectory data to XML file'
+    def XMLData(self, element, tag, complete=False, scale=1.0):
+        'Write trajectory data to XML file. If scale is given, the node coordinates are multiplied'
+        'by scale, and rounded to scaleDigits decimal places (except for trajectories not edited'
+        'since they were read, see originalTrajectory)'
+        original=self.originalTrajectory(scale)
+        if not original is None: return original.XMLData(element, tag, complete)
         e=SubElement(element, tag)
-        if complete:
-            for i in range(self.start, self.end+1):
-                'Get the node for time i'
-                n=self.selectNode(i)
-                n.roundCoord(1)
-                n.XMLData(e, 'Node')
-        else:
-            for n in self.nodes:
-                n.XMLData(e, 'Node')
+        for n in self.completeNodes() if complete else self.nodes:
+            if scale!=1.0: n=n.scaleNode(scale, self.scaleDigits)
+            n.XMLData(e, 'Node')
         return e
 
+    def XMLWrite(self, f, tag, complete=False, scale=1.0):
+        'Same as XMLData, writing the XML text directly to the file f, node by node'
+        original=self.originalTrajectory(scale)
+        if not original is None: return original.XMLWrite(f, tag, complete)
+        f.write('<'+tag+'>')
+        for n in self.completeNodes() if complete else self.nodes:
+            if scale!=1.0: n=n.scaleNode(scale, self.scaleDigits)
+            f.write(n.XMLText('Node'))
+        f.write('</'+tag+'>')
+
+    def setOriginal(self, trajectory, scale):
+        'Store the trajectory as read from an annotation file (trajectory), whose coordinates were'
+        'multiplied by scale to obtain this trajectory. It is discarded as soon as the nodes of this'
+        'trajectory change'
+        self.original=(trajectory, scale)
+
+    def originalTrajectory(self, scale):
+        'Return the trajectory read from the annotation file (see setOriginal) if the nodes have not'
+        'changed since then, and scale restores the coordinates of the file. Otherwise, return None.'
+        'This way, loading and saving a file with a scale (for instance, with a proxy video) does'
+        'not round the coordinates of the trajectories not edited'
+        if self.original is None or scale==1.0: return None
+        original, originalScale=self.original
+        if not math.isclose(scale*originalScale, 1.0): return None
+        if original.InterpolationType()!=self.InterpolationType():
+            original.updateInterpolator(self.InterpolationType())
+        return original
+
+    def completeNodes(self, blockFrames=4096):
+        'Generator with the nodes for all the frames of the trajectory, rounded to 1 decimal (as'
+        'written in complete XML files). The frames are interpolated in blocks of blockFrames, to'
+        'limit the memory used'
+        nodes=iter(self.nodes)
+        node=next(nodes)
+        for start in range(self.start, self.end+1, blockFrames):
+            time, x, y, w, h, nodeType=self.selectRange(start, min(start+blockFrames-1, self.end))
+            x, y, w, h=x.tolist(), y.tolist(), w.tolist(), h.tolist()
+            for i, fr in enumerate(time.tolist()):
+                if fr==node.time:
+                    'Frames with an actual node keep the original node coordinates'
+                    n=node.interpolateNode(node, self.interpolator, fr)
+                    node=next(nodes, node)
+                else:
+                    n=CreateNodeFromValues(fr, x[i], y[i], w[i], h[i], NodeType(nodeType[i]))
+                n.roundCoord(1)
+                yield n
+
     def checkConsistency(self):
         'Check if trajectory data is correct. Specially, if the node time order is not'
         'correct, nodes are ordered.'
@@ -131,72 +231,57 @@ class Trajectory:
         'Update trajectory interpolator (if required)'
         self.updateInterpolator()
         
+    def setNodes(self, nodes):
+        'Replace all the nodes of the trajectory with the nodes given (a list of nodes without'
+        'duplicated times), building the node storage in one step'
+        'NOTE: sorted is stable, and linear for nodes already sorted'
+        nodes=sorted(nodes)
+        try: self.nodes.setNodes(nodes)
+        except AttributeError: self.nodes=nodes
+        'Update trajectory start and end, and trajectory interpolator'
+        self.start=nodes[0].time
+        self.end=nodes[-1].time
+        self.original=None
+        self.updateInterpolator()
+
+    def setArrays(self, t, x, y, w=None, h=None, intMask=None, copy=True):
+        'Same as setNodes, with the node data given as arrays (see NodeArray.setArrays), sorted by'
+        'time and without duplicated times. If copy is False, columnar storage uses the arrays given'
+        'until the trajectory changes, without copying them (for instance, memory mapped files). List'
+        'storage always creates the node objects, reading all the data'
+        nodes=NodeArray()
+        nodes.setArrays(t, x, y, w, h, None, intMask, copy)
+        if isinstance(self.nodes, NodeArray): self.nodes=nodes
+        else: self.nodes=list(nodes)
+        self.start=self.nodes[0].time
+        self.end=self.nodes[-1].time
+        self.original=None
+        self.updateInterpolator()
+
     def registerTrajectory(self, timeIndex, computeIndex, ID):
         'This function must be called when the trajectory is added into a trajectory list'
-        'Store dictionary and function'
+        'Store the time index of the list (see TimeIndex). computeIndex is not used any more (the time'
+        'index is not divided into time intervals), and it is kept for compatibility'
         self.timeIndex=timeIndex
-        self.computeIndex=computeIndex
-        'Update dictionary'
+        'Update the index'
         self.updateTimeIndex(ID)
     
     def unregisterTrajectory(self, ID):
         'This function must be called when the trajectory is removed from a trajectory list'
-        'Remove trajectory from dictionary'
-        l=self.computeIndex(self.start, self.end)
-        for n in l:
-            self.timeIndex[n].remove(ID)
-            if self.timeIndex[n]==[]: self.timeIndex.pop(n)
+        'Remove trajectory from the index'
+        self.timeIndex.remove(ID)
         del self.timeIndex
-        del self.computeIndex
         
     def updateTimeIndex(self, ID):
-        'Compute the frame intervals where the trajectory exists, and update the frame index dictionary'
-        'adding/deleting its ID into the dictionary timeIndex'
-        'The computations of the frame intervals is performed using the provided function computeIndex'
-        l=self.computeIndex(self.start, self.end)
-        'l is the list with the frame intervals where the trajectory exists. Now, we have to ensure that'
-        'the trajectory is registered only on proper intervals'
-        'First, check if it is already registered in the first interval'
-        firstInterval=self.timeIndex.setdefault(l[0], [])
-        if ID in firstInterval:
-            'In this case, check if it is also registered on previous intervals'
-            'If so, remove then. This happens when the first node has been removed from the trajectory'
-            'so that the trajectory no longer exists on the lowest frame interval(s)'
-            n=l[0]-1
-            while True:
-                'Keep deleting until the trajectory is no longer registered'
-                try: 
-                    self.timeIndex[n].remove(ID)
-                    'Check if a given index is empty. If so, remove it from the dictionary'
-                    if self.timeIndex[n]==[]: self.timeIndex.pop(n)
-                    n-=1
-                except (ValueError, KeyError): break 
-                'ValueError happens when trying to delete a trajectory that is not present in the'
-                'given entry of the dictionary'
-                'KeyError happens when dictionary does not have the required entry'
-                'In both cases, do nothing'
-                
-        'Same as before, for the last interval'
-        lastInterval=self.timeIndex.setdefault(l[-1], [])
-        if ID in lastInterval:
-            'In this case, check if it is also registered on following intervals'
-            'If so, remove then. This happens when a node has been removed from the trajectory, so that'
-            'the trajectory does not exists in the lowest frame interval(s)'
-            n=l[-1]+1
-            while True:
-                'Keep deleting until the trajectory is no longer registered'
-                try: 
-                    self.timeIndex[n].remove(ID)
-                    'Check if a given index is empty. If so, remove it from the dictionary'
-                    if self.timeIndex[n]==[]: self.timeIndex.pop(n)
-                    n+=1
-                except (ValueError, KeyError): break 
-
-        'Ensure that the trajectory is registered in the intermediate intervals'
-        for n in range(l[0], l[-1]+1):
-            if not ID in self.timeIndex.get(n, []):
-                try: self.timeIndex[n].append(ID)
-                except KeyError: self.timeIndex[n]=[ID]
+        'Update the frame interval where the trajectory exists (from start to end) in the time index'
+        self.timeIndex.add(ID, self.start, self.end)
+
+    def __getstate__(self):
+        'Copies of the trajectory (deepcopy, pickle) are not registered in any trajectory list, so the'
+        'time index of the list is not copied'
+        state=self.__dict__.copy()
+        state.pop('timeIndex', None)
+        return state
         
     def addNode(self, node):
         'Add a node to the trajectory. If a node for the same frame already exists, the new node'
@@ -205,25 +290,28 @@ class Trajectory:
         node.nodeType=NodeType.real
         'Find the insertion point in the ordered nodes list. Ordered list means that node times are'
         'in ascending order'
-        i=bisect.bisect_left(self.nodes, node)
+        i=self.bisectNode(node.time)
         'Check whether the node exists for the same frame as node'
         '(otherwise index will point to the end of the list)'
         try:
             if self.nodes[i]==node:
                 'The node already exists. Substutite the old node with the new one'
                 self.nodes[i]=node
+                if not self.arrays is None: self.arrays[i]=node
             else:
                 'The node does not exists. Insert it at position i'
                 self.nodes.insert(i, node)
+                if not self.arrays is None: self.arrays.insert(i, node)
         except IndexError:
             pass
             'This exception occurs when node frame is posterior to the end of the current trajectory'
             'In this case, we need to update trajectory end'
             self.end=node.time
             self.nodes.insert(i, node)
+            if not self.arrays is None: self.arrays.insert(i, node)
         if node.time<self.start: 
             self.start=node.time
-        self.updateInterpolator()
+        self.nodeChanged(node.time)
 
     def deleteNodeCheck(self, frame):
         'Check if the required node can be deleted from the trajectory. This is intended to help the'
@@ -233,7 +321,7 @@ class Trajectory:
         node=PointNode(frame)
         if len(self.nodes)>1:
             'Find the node in the sorted list'
-            i=bisect.bisect_left(self.nodes, node)
+            i=self.bisectNode(frame)
             try:
                 if self.nodes[i]==node:
                     return True
@@ -249,11 +337,12 @@ class Trajectory:
             raise TrajectoryException('Can not delete last node of a trajectory. Delete the trajectory instead')
         else:
             'Find the node in the sorted list'
-            i=bisect.bisect_left(self.nodes, node)
+            i=self.bisectNode(frame)
             try:
                 if self.nodes[i]==node:
                     'Check that the required node exists'
                     self.nodes.pop(i)
+                    if not self.arrays is None: self.arrays.pop(i)
                 else: raise IndexError
             except IndexError:
                 'An exception is raised when selected node is posterior to the trajectory end.' 
@@ -265,40 +354,99 @@ class Trajectory:
             if i==len(self.nodes):
                 self.end=self.nodes[-1].time
             'Update interpolator data, if required'
-            self.updateInterpolator()
+            self.nodeChanged(frame)
 
     def updateInterpolator(self, interType=None):
         'Update data associated with the interpolator.'
-        'NOTE: This is only necessary for BSpline-based interpolator. Linear interpolator'
-        'do not need any update, since the data need for interpolation is obtained directly'
-        'from node coordinates'
+        'NOTE: The update is not done here, but deferred until the interpolator is actually'
+        'needed (see refreshInterpolator). This way, consecutive editions of the trajectory'
+        'only require one update'
         if not interType is None:
             'Change interpolation type if a new type is given. Otherwise, keep previous interType'
             self.interpolator.interpolatorType=interType
             
-        if self.interpolator.updatable:
-            positions=[]
-            'Obtain a list with all the coordinates of the nodes'
-            for node in self.nodes:
-                'Delete pre-computed node paths, if needed'
-                try: del node.path
-                except AttributeError: pass
-                positions.append((node.time, node.coords))
-                'and update the interpolator'
-            self.interpolator.updateInterpolator(positions)
+        self.dirty=True
+        self.changes=None
+        self.arrays=None
+        if not self.frameCache is None:
+            self.frameCache.invalidate(self)
+
+    def nodeChanged(self, frame):
+        'Same as updateInterpolator, when only the node at the given frame has changed (added,'
+        'replaced or deleted). Some interpolators can use this to update only part of their data'
+        self.dirty=True
+        self.original=None
+        if not self.changes is None:
+            self.changes.append(frame)
+        if not self.frameCache is None and not self.interpolator.updatable:
+            'Interpolators without data only use the nodes before and after each frame, so only'
+            'the frames between the previous and next nodes change. For updatable interpolators,'
+            'the frames changed are known when the interpolator is updated (see refreshInterpolator)'
+            i=self.bisectNode(frame)
+            previous=self.nodes[i-1].time if i>0 else frame
+            if i<len(self.nodes) and self.nodes[i].time==frame: i+=1
+            following=self.nodes[i].time if i<len(self.nodes) else frame
+            self.frameCache.invalidate(self, previous, following)
+
+    def refreshInterpolator(self):
+        'Update the interpolator data, if the trajectory has changed since the last update.'
+        'This function must be called before using the interpolator.'
+        'NOTE: This is only necessary for BSpline-based interpolator. Linear interpolator'
+        'do not need any update, since the data need for interpolation is obtained directly'
+        'from node coordinates'
+        if not self.dirty: return
+        'Update the interpolator with the coordinates of all the nodes'
+        t, x, y, w, h=self.getArrays()
+        self.interpolator.updateInterpolatorArrays(t, x, y, w, h, self.changes)
+        'Delete the pre-computed path (see drawPath), computed with the previous interpolator'
+        try: del self.path
+        except AttributeError: pass
+        if not self.frameCache is None and self.interpolator.updatable:
+            'Remove the cached frames affected by the update'
+            updatedRange=self.interpolator.updatedRange
+            if updatedRange is None: self.frameCache.invalidate(self)
+            elif updatedRange: self.frameCache.invalidate(self, *updatedRange)
+        self.dirty=False
+        self.changes=[]
+
+    @contextmanager
+    def batchEdit(self):
+        'Context manager to group several editions of the trajectory (for instance, adding many'
+        'nodes) in the same block. The interpolator is updated only once, when the block finishes:'
+        '    with trajectory.batchEdit():'
+        '        for node in nodes: trajectory.addNode(node)'
+        self.batchLevel+=1
+        try: yield self
+        finally:
+            self.batchLevel-=1
+            if self.batchLevel==0: self.refreshInterpolator()
+
+    def bisectNode(self, frame):
+        'Find the position of the node for the given frame in the sorted list of nodes (same as'
+        'bisect.bisect_left)'
+        try: return self.nodes.bisectTime(frame)
+        except AttributeError:
+            'List storage. To be able to use bisect functions, a temporal node, with the correct'
+            'frame, must be created'
+            return bisect.bisect_left(self.nodes, PointNode(frame))
              
     def selectNode(self, frame):
         'Select the node for the given frame, and return a copy of it. If the node does not exists, an'
         'interpolated/extrapolated node is created.'
+        self.refreshInterpolator()
         
-        'To be able to use bisect functions, a temporal node, with the correct frame, must be created'
-        node=PointNode(frame)
+        if not self.frameCache is None and self.exists(frame):
+            'Interpolated nodes within the trajectory are taken from the cache. Actual nodes are'
+            'copied from the trajectory nodes below, to keep their original coordinates'
+            time, x, y, w, h, nodeType=self.frameCache.select(self, frame)
+            if nodeType!=NodeType.real.value:
+                return CreateNodeFromValues(time, x, y, w, h, NodeType(nodeType))
         'Check if the trajectory only has one node'
         if len(self.nodes)==1:
             return self.nodes[0].interpolateNode(self.nodes[0], self.interpolator, frame)
         else:
             'Find the node in the sorted list'
-            i=bisect.bisect_left(self.nodes, node)
+            i=self.bisectNode(frame)
             
             if i==len(self.nodes):
                 'This case happens when requiring a frame posterior to the trajectory end'
@@ -309,6 +457,67 @@ class Trajectory:
                 'else: this case is for times anterior to the trajectory start'
             return self.nodes[i].interpolateNode(self.nodes[i+1], self.interpolator, frame)
         
+    def getArrays(self):
+        'Return the node data of the trajectory as numpy arrays (t, x, y, w, h), sorted by time'
+        'For point trajectories, w and h are None'
+        'The arrays are read-only views of the node storage (see NodeArray.getArrays)'
+        try: return self.nodes.getArrays()
+        except AttributeError: pass
+        'List storage: the data is taken from the columnar copy of the nodes'
+        if self.arrays is None: self.arrays=NodeArray(self.nodes)
+        return self.arrays.getArrays()
+
+    def selectNodes(self, frames):
+        'Vectorized version of selectNode, for a list (or array) of frames. Instead of nodes,'
+        'return the numpy arrays (time, x, y, w, h, nodeType), where nodeType holds the values'
+        'of NodeType. For point trajectories, w and h are filled with NaN'
+        time=numpy.asarray(frames)
+        self.refreshInterpolator()
+        t, x, y, w, h=self.getArrays()
+        x, y, w, h, nodeType=self.interpolator.interpolateArray(t, x, y, w, h, time)
+        if w is None:
+            w=numpy.full(time.shape, numpy.nan)
+            h=numpy.full(time.shape, numpy.nan)
+        else:
+            'Rectangle nodes always have positive sizes (see RectangleNode)'
+            w=numpy.abs(w)
+            h=numpy.abs(h)
+        return time, x, y, w, h, nodeType
+
+    def selectRange(self, start=None, end=None):
+        'Same as selectNodes, for all the frames from start to end (both included). If not given,'
+        'the trajectory start and end are used'
+        if start is None: start=self.start
+        if end is None: end=self.end
+        return self.selectNodes(numpy.arange(start, end+1))
+
+    def selectBoxes(self, start=None, end=None):
+        'Same as selectRange, but the frames with an actual node keep the original node coordinates'
+        '(as in selectNode)'
+        time, x, y, w, h, nodeType=self.selectRange(start, end)
+        real=numpy.flatnonzero(nodeType==NodeType.real.value)
+        if len(real)>0:
+            t, xn, yn, wn, hn=self.getArrays()
+            i=numpy.searchsorted(t, time[real])
+            x[real]=xn[i]
+            y[real]=yn[i]
+            if wn is not None:
+                w[real]=numpy.abs(wn[i])
+                h[real]=numpy.abs(hn[i])
+        return time, x, y, w, h, nodeType
+
+    def selectValues(self, frame):
+        'Same as selectNode, returning the node data (time, x, y, w, h, nodeType) instead of a node,'
+        'where nodeType is the value of NodeType. For point nodes, w and h are NaN'
+        self.refreshInterpolator()
+        if not self.frameCache is None and self.exists(frame):
+            values=self.frameCache.select(self, frame)
+            if values[5]!=NodeType.real.value: return tuple(values)
+        node=self.selectNode(frame)
+        try: size=(node.size.x, node.size.y)
+        except AttributeError: size=(numpy.nan, numpy.nan)
+        return (node.time, node.pos.x, node.pos.y)+size+(node.nodeType.value,)
+
     def exists(self, frame):
         'Check whether this trajectory exists for the given frame'
         return self.start<=frame<=self.end
@@ -319,38 +528,41 @@ class Trajectory:
     
     def length(self):
         'Return the length traversed by the tracked point'
-        it=iter(self.nodes)
-        n1=it.next()
+        t, x, y, w, h=self.getArrays()
+        del t, w, h
+        x=x.tolist()
+        y=y.tolist()
+        x1, y1=x[0], y[0]
         dist=0
-        while True:
-            try: n2=it.next()
-            except StopIteration: break
+        for x2, y2 in zip(x[1:], y[1:]):
             'Compute the euclidean distance to the next point'
-            dAux=n1.pos.distanceL2_2(n2.pos)
+            dAux=(x2-x1)*(x2-x1)+(y2-y1)*(y2-y1)
             if dAux>8:
                 'Only update with the new distance if this is'
                 'greater than sqrt(8) pixels. This prevent static but'
                 'erratic points from yield a large distance when'
                 'in fact, the point has not moved'
                 dist+=math.sqrt(dAux)
-                n1=n2
+                x1, y1=x2, y2
         return dist
     
     def occludedLength(self):
         'Return the length traversed by the tracked point when the point is occluded'
-        it=iter(self.nodes)
-        n1=it.next()
+        t, x, y, w, h=self.getArrays()
+        del w, h
+        t=t.tolist()
+        x=x.tolist()
+        y=y.tolist()
+        t1, x1, y1=t[0], x[0], y[0]
         dist=0
-        while True:
-            try: n2=it.next()
-            except StopIteration: break
+        for t2, x2, y2 in zip(t[1:], x[1:], y[1:]):
             'Check if there is an occlusion between both points'
-            if n2.time-n1.time==1:
+            if t2-t1==1:
                 'If there is not occlusion, advance to the next node'
-                n1=n2
+                t1, x1, y1=t2, x2, y2
             else:
                 'Compute the euclidean distance to the next point'
-                dAux=n1.pos.distanceL2_2(n2.pos)
+                dAux=(x2-x1)*(x2-x1)+(y2-y1)*(y2-y1)
                 if dAux>8:
                     'Only update with the new distance if this is'
                     'greater than sqrt(8) pixels. With filter real'
@@ -358,12 +570,25 @@ class Trajectory:
                     'is static. Remember that if the node is static'
                     'only the first and the last node are stored'
                     dist+=math.sqrt(dAux)
-                    n1=n2
+                    t1, x1, y1=t2, x2, y2
         return dist
         
           
     def drawPath(self, img, innerColor=(0xFF, 0xFF, 0xFF), outerColor=(0x00, 0x00, 0x00)):
         'Draw a line joining the center of all the nodes of the trajectory'
+        'With only one node, there is no path to draw'
+        if len(self.nodes)==1: return
+        self.refreshInterpolator()
+        if self.interpolator.updatable:
+            'If the interpolator is updatable, the path must be obtained from it, instead of'
+            'directly from node data. The path is computed only once, and stored until the'
+            'interpolator is updated again (see refreshInterpolator)'
+            try: path=self.path
+            except AttributeError:
+                path=self.path=self.computePath()
+            cv2.polylines(img, [path], False, outerColor, 2)
+            cv2.polylines(img, [path], False, innerColor, 1)
+            return
         it=iter(self.nodes)
         n1=next(it)
         while True:
@@ -378,3 +603,20 @@ class Trajectory:
             except StopIteration: break
             n1.drawPath(img, n2, self.interpolator, innerColor, 1)
             n1=n2
+
+    def computePath(self):
+        'Compute the points of the path drawn by drawPath with an updatable interpolator.'
+        'Instead of computing a point for each frame, the path between two nodes is sampled'
+        'roughly every 8 pixels (distance L1), to reduce the number of interpolations.'
+        t, x, y, w, h=self.getArrays()
+        del w, h
+        'Number of steps and time interval between samples for each pair of nodes'
+        steps=((numpy.abs(numpy.diff(x))+numpy.abs(numpy.diff(y)))/8.0+1).astype(int)
+        interval=numpy.diff(t)/steps.astype(float)
+        'Time for each sample of the path (the first node, and n steps for each pair of nodes)'
+        segment=numpy.repeat(numpy.arange(len(steps)), steps)
+        n=numpy.arange(len(segment))-numpy.repeat(numpy.cumsum(steps)-steps, steps)+1
+        frames=numpy.concatenate(([t[0]], t[segment]+interval[segment]*n))
+        time, x, y, w, h, nodeType=self.selectNodes(frames)
+        'Integer coordinates, as required by drawing functions'
+        return numpy.stack([x, y], 1).astype(numpy.int32).reshape(-1, 1, 2)
@@ -0,0 +1,58 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that the vectorized 3D transformation (transformArrays3D) gives the same results than
+#the original one (transformData3D). Run with: python -m Trajectories.Trajectory.Transform3DTest
+
+import numpy
+from .Node import coord
+from .Interpolator import Interpolator
+
+interpolator=Interpolator('GC')
+rng=numpy.random.default_rng(0)
+
+for n in (1, 2, 3, 10, 500):
+    'Random rectangles (integer coordinates, as read from annotation files)'
+    x=rng.integers(0, 640, n)
+    y=rng.integers(0, 480, n)
+    w=rng.integers(5, 200, n)
+    h=rng.integers(5, 200, n)
+    'Scalar transformation, on the list format (see Interpolator.updateInterpolator)'
+    data=[(i, {'pos':coord(xi, yi), 'size':coord(wi, hi)}) for i, (xi, yi, wi, hi) in
+          enumerate(zip(x.tolist(), y.tolist(), w.tolist(), h.tolist()))]
+    if n>1:
+        'NOTE: transformData3D needs at least two nodes'
+        interpolator.transformData3D(data)
+    X, Y, Z, R=interpolator.transformArrays3D(x, y, w, h)
+    assert numpy.allclose(X, [d[1]['pos'].x for d in data], rtol=1e-10)
+    assert numpy.allclose(Y, [d[1]['pos'].y for d in data], rtol=1e-10)
+    if n>1:
+        assert numpy.allclose(Z, [d[1]['size'].x for d in data], rtol=1e-10)
+        assert numpy.allclose(R, [d[1]['size'].y for d in data], rtol=1e-10)
+    else:
+        assert Z[0]==1 and R[0]==1
+    print('Nodes: '+str(n)+' OK')
@@ -0,0 +1,109 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+
+#Check the piecewise splines of long trajectories (see Interpolator.windowNodes): after any sequence
+#of editions, each piece must be the same as fitting again its window of nodes from scratch, the
+#pieces must cover the trajectory, and the interpolated frames must be close to the single spline
+#of the whole trajectory.
+#Run with: python -m Trajectories.Trajectory.WindowTest
+
+import numpy
+import scipy.interpolate as si
+from .Node import coord, PointNode, RectangleNode
+from .Interpolator import Interpolator
+from .Trajectory import Trajectory
+
+rng=numpy.random.default_rng(0)
+
+def smoothNode(frame, rectangle):
+    'Node of a smooth trajectory (so that the pieces are close to the single spline)'
+    pos=coord(320+200*numpy.sin(frame/40.0), 240+150*numpy.cos(frame/55.0))
+    if rectangle: return RectangleNode(frame, pos, coord(60+20*numpy.sin(frame/30.0), 80+10*numpy.cos(frame/70.0)))
+    return PointNode(frame, pos)
+
+def checkPieces(trajectory):
+    'Each piece must be the spline fitted with the nodes of its window'
+    trajectory.refreshInterpolator()
+    interpolator=trajectory.interpolator
+    t, x, y, w, h=trajectory.getArrays()
+    bounds, tckp=interpolator.windows
+    assert len(bounds)==len(tckp)+1 and bounds[0]==t[0] and bounds[-1]==t[-1]
+    assert all(a<b for a, b in zip(bounds[:-1], bounds[1:])), 'Empty pieces'
+    assert numpy.isin(bounds, t).all(), 'Boundaries must be node times'
+    index=numpy.searchsorted(t, bounds)
+    assert (numpy.diff(index)<=2*interpolator.windowNodes).all(), 'Pieces too long'
+    for k in range(len(tckp)):
+        a=max(0, index[k]-interpolator.windowMargin)
+        b=min(len(t)-1, index[k+1]+interpolator.windowMargin)+1
+        reference=interpolator.fitSpline(t[a:b], x[a:b], y[a:b], None if w is None else w[a:b], None if h is None else h[a:b])
+        frames=numpy.arange(bounds[k], bounds[k+1]+(k==len(tckp)-1))
+        for v, r in zip(interpolator.splineValues(frames), si.splev(frames, reference)):
+            assert numpy.allclose(v, r, rtol=1e-9, atol=1e-6), 'Piece '+str(k)+' not updated'
+
+def edit(trajectory, rectangle):
+    'Move, add or delete random nodes (also at the start and end of the trajectory)'
+    operation=rng.integers(0, 3)
+    if operation==0:
+        node=trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))]
+        moved=smoothNode(node.time, rectangle)
+        moved.pos=coord(moved.pos.x+float(rng.normal(0, 5)), moved.pos.y)
+        trajectory.addNode(moved)
+    elif operation==1:
+        trajectory.addNode(smoothNode(int(rng.integers(trajectory.start-10, trajectory.end+10)), rectangle))
+    else:
+        trajectory.deleteNode(trajectory.nodes[int(rng.integers(0, len(trajectory.nodes)))].time)
+
+for windowNodes, windowMargin in ((6, 3), (10, 8)):
+    for method in ('CS', 'GC'):
+        for storage in ('list', 'columnar'):
+            for rectangle in (True, False):
+                if method=='GC' and not rectangle: continue
+                frames=numpy.sort(rng.choice(2000, 150, replace=False)).tolist()
+                nodes=[smoothNode(f, rectangle) for f in frames]
+                'Single spline of the whole trajectory'
+                Interpolator.windowNodes=0
+                single=Trajectory(nodes[0], method, storage)
+                single.setNodes(list(nodes))
+                single.refreshInterpolator()
+                assert hasattr(single.interpolator, 'tckp')
+                Interpolator.windowNodes, Interpolator.windowMargin=windowNodes, windowMargin
+                trajectory=Trajectory(nodes[0], method, storage)
+                trajectory.setNodes(list(nodes))
+                checkPieces(trajectory)
+                'The pieces are close to the single spline'
+                for a, b in zip(trajectory.selectRange()[1:5 if rectangle else 3], single.selectRange()[1:5 if rectangle else 3]):
+                    assert numpy.abs(a-b).max()<0.1
+                for k in range(60):
+                    if k%3==0:
+                        with trajectory.batchEdit():
+                            for j in range(int(rng.integers(2, 6))): edit(trajectory, rectangle)
+                    else: edit(trajectory, rectangle)
+                    checkPieces(trajectory)
+                print('%s windowNodes=%d windowMargin=%d %s %s OK' % (method, windowNodes, windowMargin, storage, 'rectangle' if rectangle else 'point'))
+Interpolator.windowNodes, Interpolator.windowMargin=0, 8
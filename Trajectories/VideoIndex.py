@@ -0,0 +1,170 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Seek index of video files.
+#The seek index is written along with the video file (same name, adding indexExtension), and stores
+#the number of frames of the video and the position of its key frames, found by reading the whole
+#video once (without decoding it, see BuildVideoIndex). Later sessions use the index file, unless
+#the video file has been modified after writing the index. The file consists on:
+#- Header: file identifier, version, size and modification time of the video file, number of frames
+#  and number of key frames
+#- Key frame numbers
+#All the values are little endian.
+#The index of a video can be built with:
+#    python -m Trajectories.VideoIndex videoFile
+
+__metaclass__=type
+
+import sys
+import numpy
+'Opencv'
+import cv2
+
+from .IndexFile import fileStamp
+
+'Extension of video index files'
+indexExtension='.seek'
+
+fileIdentifier=b'TrATVidS'
+fileVersion=1
+
+headerType=numpy.dtype([
+    ('identifier', 'S8'), ('version', '<u4'), ('reserved', 'V4'), ('size', '<u8'), ('mtime', '<i8'),
+    ('frames', '<u8'), ('keyframes', '<u8')])
+
+class VideoIndex:
+    '''Number of frames and key frames of a video.
+    Seeking a frame with OpenCV always moves the video before the previous key frame and decodes
+    forward from it, even if the frame is a few frames after the current position. With the key
+    frames, the video is only moved if the frame cannot be reached decoding forward from the current
+    position without passing a key frame, so that the time needed to reach a frame is bounded by the
+    distance between key frames. The video is only moved to key frames, and the frames after them
+    are decoded forward (grabbed), since seeking other frames with OpenCV is not frame accurate for
+    some videos. Also, the number of frames is the actual number of frames read, not the estimation
+    given by OpenCV.
+    NOTE: Key frames are given in decoding order. For videos with B frames, a key frame can be
+    displayed a few frames later than its position in the index. In that case, the video is moved
+    more often than needed'''
+
+    def __init__(self, frameCount, keyframes):
+        self.frameCount=frameCount
+        self.keyframes=numpy.asarray(keyframes, numpy.int64)
+
+    def keyframe(self, frame):
+        'Return the last key frame before (or at) the given frame'
+        i=int(numpy.searchsorted(self.keyframes, frame, 'right'))-1
+        return int(self.keyframes[i]) if i>=0 else 0
+
+    def seek(self, capture, frame, position=None):
+        'Move the capture (cv2.VideoCapture) so that its next read returns the given frame. position'
+        'is the frame returned by the next read of the capture (None if unknown): if there is no key'
+        'frame between position and the frame, the capture decodes forward, instead of being moved.'
+        'Otherwise, the capture is moved to the last key frame before the frame (the only positions'
+        'where OpenCV seeking is exact), and decodes forward from it. Return False if the frame cannot'
+        'be reached'
+        if not 0<=frame<self.frameCount: return False
+        keyframe=self.keyframe(frame)
+        if position is None or not keyframe<=position<=frame:
+            if not capture.set(cv2.CAP_PROP_POS_FRAMES, keyframe): return False
+            position=keyframe
+        while position<frame:
+            if not capture.grab(): return False
+            position+=1
+        return True
+
+def IndexFileName(fileName):
+    'Name of the index file of the video file given'
+    return fileName+indexExtension
+
+def BuildVideoIndex(fileName):
+    'Build the index of the video file given, reading all the packets of the video without decoding'
+    'them. Return None if the key frames cannot be found (it requires the FFMPEG backend of OpenCV)'
+    capture=cv2.VideoCapture(fileName, cv2.CAP_FFMPEG)
+    try:
+        if not capture.isOpened() or not capture.set(cv2.CAP_PROP_FORMAT, -1):
+            return None
+        keyframes=[]
+        frame=0
+        while capture.grab():
+            if capture.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME)>0: keyframes.append(frame)
+            frame+=1
+    finally:
+        capture.release()
+    if not keyframes: return None
+    return VideoIndex(frame, keyframes)
+
+def ReadVideoIndex(fileName):
+    'Return the index of the video file given, or None if the index file does not exist, or if it'
+    'does not correspond to the current video file'
+    try:
+        size, mtime=fileStamp(fileName)
+        data=numpy.fromfile(IndexFileName(fileName), numpy.uint8)
+    except (TypeError, IOError):
+        return None
+    if len(data)<headerType.itemsize: return None
+    header=data[:headerType.itemsize].view(headerType)[0]
+    if header['identifier']!=fileIdentifier or header['version']!=fileVersion: return None
+    if header['size']!=size or header['mtime']!=mtime: return None
+    keyframes=data[headerType.itemsize:]
+    if len(keyframes)!=int(header['keyframes'])*8: return None
+    return VideoIndex(int(header['frames']), keyframes.view('<i8'))
+
+def WriteVideoIndex(fileName, index):
+    'Write the index of the video file given'
+    header=numpy.zeros(1, headerType)
+    header['identifier']=fileIdentifier
+    header['version']=fileVersion
+    header['size'], header['mtime']=fileStamp(fileName)
+    header['frames']=index.frameCount
+    header['keyframes']=len(index.keyframes)
+    f=open(IndexFileName(fileName), 'wb')
+    f.write(header.tobytes())
+    f.write(index.keyframes.astype('<i8').tobytes())
+    f.close()
+
+def OpenVideoIndex(fileName):
+    'Return the index of the video file given, building it if it does not exist yet (or None if'
+    'it cannot be built)'
+    index=ReadVideoIndex(fileName)
+    if index is None:
+        print('Indexing video '+fileName+'...')
+        index=BuildVideoIndex(fileName)
+        if index is not None: WriteVideoIndex(fileName, index)
+    return index
+
+if __name__=='__main__':
+    try:
+        fileName=sys.argv[1]
+    except IndexError:
+        print('Usage: python -m Trajectories.VideoIndex videoFile')
+        sys.exit(1)
+    index=BuildVideoIndex(fileName)
+    if index is None:
+        print('Key frames of '+fileName+' cannot be found')
+        sys.exit(1)
+    WriteVideoIndex(fileName, index)
+    print(str(index.frameCount)+' frames, '+str(len(index.keyframes))+' key frames. Index written to '+IndexFileName(fileName))
@@ -0,0 +1,88 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+
+#Check the seeking of video frames with the video index (see VideoIndex.seek): every frame must be
+#the same as reading the video sequentially, from any position of the capture, and the capture must
+#only be moved to key frames. The test video (FFV1, with a key frame every 12 frames) is written
+#with OpenCV.
+#Run with: python -m Trajectories.VideoIndexTest
+
+import os
+import sys
+import tempfile
+import numpy
+'Opencv'
+import cv2
+
+from .VideoIndex import BuildVideoIndex
+
+class Capture:
+    'Video capture that records the frames the video is moved to'
+    def __init__(self, fileName):
+        self.capture=cv2.VideoCapture(fileName)
+        self.moves=[]
+    def set(self, prop, value):
+        if prop==cv2.CAP_PROP_POS_FRAMES: self.moves.append(value)
+        return self.capture.set(prop, value)
+    def grab(self): return self.capture.grab()
+    def read(self): return self.capture.read()
+
+rng=numpy.random.default_rng(0)
+fileName=os.path.join(tempfile.mkdtemp(), 'video.mkv')
+writer=cv2.VideoWriter(fileName, cv2.VideoWriter_fourcc(*'FFV1'), 25, (64, 48))
+if not writer.isOpened():
+    print('FFV1 videos cannot be written with this OpenCV build. Test not run')
+    sys.exit(0)
+for frame in range(150):
+    writer.write(rng.integers(0, 256, (48, 64, 3), numpy.uint8))
+writer.release()
+
+index=BuildVideoIndex(fileName)
+assert index is not None and index.frameCount==150
+assert len(index.keyframes)>1 and index.keyframes[0]==0
+'Frames read sequentially'
+capture=cv2.VideoCapture(fileName)
+frames=[capture.read()[1] for frame in range(150)]
+capture.release()
+
+capture=Capture(fileName)
+position=None
+for k in range(300):
+    if k%3==0: frame=int(rng.integers(0, 150))
+    else: frame=min(149, frame+int(rng.integers(0, 15)))
+    assert index.seek(capture, frame, position)
+    ret, image=capture.read()
+    assert ret and numpy.array_equal(image, frames[frame]), frame
+    position=frame+1
+    'Seeking without the position of the capture'
+    if k%10==0: position=None
+assert capture.moves and set(capture.moves)<=set(index.keyframes.tolist())
+'Frames out of the video'
+assert not index.seek(capture, 150, position)
+assert not index.seek(capture, -1)
+print('Seek OK')
@@ -0,0 +1,92 @@
+'''
+MIT License
+
+Copyright (c) [2018] Pedro Gil-Jiménez (pedro.gil@uah.es). Universidad de Alcalá. Spain
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+This file is part of the TrATVid Software
+'''
+
+
+#Check that annotation files written by SaveXMLFile (streaming the XML text, see
+#Trajectory.XMLWrite) are identical, byte by byte, to the files written with the XML tree
+#(ElementTree.tostring), except for the date. Run with: python -m Trajectories.XMLWriteTest
+
+import os
+import re
+import time
+import tempfile
+from xml.etree import ElementTree
+from xml.etree.ElementTree import Element, SubElement
+import numpy
+
+from .Trajectories import Trajectories
+from .Trajectory.Trajectory import Trajectory
+from .Trajectory.Interpolator import Interpolator
+from .Trajectory.Node import coord, PointNode, RectangleNode
+
+def treeFile(trajectories, fileName, complete=False):
+    'Write the annotation file with the XML tree, as done before the streaming writer'
+    XMLElement=Element('VideoAnnotation', date=repr(time.asctime()))
+    for ID, tr in sorted(trajectories.trajectories.items(), key=lambda tr: (tr[1],tr[0])):
+        e=SubElement(XMLElement, 'Trajectory', ID=str(ID), Interpolation=tr.InterpolationType())
+        tr.XMLData(e, 'TrajectoryNodes', complete)
+    f=open(fileName, 'wb')
+    f.write(b'<?xml version="1.0"?>')
+    f.write(ElementTree.tostring(XMLElement))
+    f.close()
+
+def fileData(fileName):
+    'Content of the file, without the date'
+    return re.sub(b' date="[^"]*"', b'', open(fileName, 'rb').read())
+
+def randomTrajectories(count, rng):
+    'Point and rectangle trajectories with integer and float coordinates, all the interpolation'
+    'methods, and trajectories starting at the same frame (sorted by ID)'
+    trajectories=Trajectories()
+    methods=sorted(Interpolator.interpolatorMethod)
+    for ID in range(count):
+        rectangle=ID%3!=0
+        frames=numpy.sort(rng.choice(200, int(rng.integers(1, 8)), replace=False))+10*(ID//2)
+        nodes=[]
+        for f in frames.tolist():
+            pos=coord(int(rng.integers(0, 640)), int(rng.integers(0, 480)))
+            if ID%4==1: pos=coord(pos.x+0.25, pos.y/3.0)
+            if rectangle: nodes.append(RectangleNode(f, pos, coord(int(rng.integers(5, 100)), 20.5)))
+            else: nodes.append(PointNode(f, pos))
+        trajectory=Trajectory(nodes[0], methods[ID%len(methods)])
+        trajectory.setNodes(nodes)
+        trajectories.addTrajectory(trajectory, 3*count-ID)
+    return trajectories
+
+path=tempfile.mkdtemp()
+rng=numpy.random.default_rng(0)
+for count in (0, 1, 30):
+    trajectories=randomTrajectories(count, rng)
+    for complete in (False, True):
+        streamed=os.path.join(path, 'streamed.xml')
+        tree=os.path.join(path, 'tree.xml')
+        trajectories.SaveXMLFile(streamed, complete)
+        treeFile(trajectories, tree, complete)
+        assert fileData(streamed)==fileData(tree), 'Different XML files'
+        'The file is read back with the same trajectories'
+        trajectories2=Trajectories(streamed)
+        assert sorted(trajectories2.trajectories)==sorted(trajectories.trajectories)
+        print('Trajectories: '+str(count)+(' complete' if complete else '')+' OK')
@@ -54,8 +54,10 @@ def convert(path):
     node=createNode(s[0])
     tr=Trajectory(node)
     del s[0]
-    for n in s:
-        node=createNode(n)
-        tr.addNode(node)
+    'Add all the nodes, updating the interpolator only once'
+    with tr.batchEdit():
+        for n in s:
+            node=createNode(n)
+            tr.addNode(node)
     return tr
         